@@ -0,0 +1,138 @@
+"""
+Compare the DRF ingest view (POST /api/v1/notifications/) with the raw ASGI fast
+path (gateway_api/fast_ingest.py): requests per second and latency percentiles.
+
+Both paths run in-process against the real Redis (REDIS_URL) with the same
+organization and payloads. The user service, template service and RabbitMQ
+publish are stubbed, and the per-org rate limit is lifted, so the numbers show
+the gateway's own cost per request rather than its upstreams'. The notification
+row insert is stubbed too unless --with-database is given: each ASGI request
+runs its ORM calls in a fresh thread and so opens a fresh database connection,
+which otherwise dominates both paths equally.
+
+    python benchmarks/ingest_paths.py --requests 5000 --concurrency 50
+
+Run it from the repository root with the gateway's environment (.env) loaded and
+migrations applied. Rows created by the run are deleted at the end.
+"""
+
+import argparse
+import asyncio
+import functools
+import os
+import secrets
+import statistics
+import sys
+import time
+import uuid
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'notification_gateway.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+import httpx  # noqa: E402
+from django.core.asgi import get_asgi_application  # noqa: E402
+
+from gateway_api import quota as quota_periods  # noqa: E402
+from gateway_api.fast_ingest import FastIngestMiddleware  # noqa: E402
+from gateway_api.models import Notification, Organization  # noqa: E402
+from gateway_api.views import NotificationAPIView  # noqa: E402
+
+FAST_PATH = '/bench/fast-ingest/'
+PATHS = {'drf': '/api/v1/notifications/', 'fast': FAST_PATH}
+
+USER = {'success': True, 'data': {'email': 'bench@example.com', 'name': 'Bench', 'push_token': 'token', 'preferences': {}}}
+TEMPLATE = {'success': True, 'data': {'content': 'Hello {{name}}', 'subject': 'Hi', 'variables': ['name']}}
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def run_path(client, path, api_key, total, concurrency):
+    latencies = []
+    statuses = {}
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            payload = {
+                'notification_type': 'email',
+                'user_id': 'bench_user',
+                'template_code': 'bench_template',
+                'variables': {'name': 'Bench'},
+                'request_id': secrets.token_hex(12),
+            }
+            started = time.perf_counter()
+            response = await client.post(path, json=payload, headers={'X-API-Key': api_key})
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        'rps': total / elapsed,
+        'p50': percentile(latencies, 0.50) * 1000,
+        'p99': percentile(latencies, 0.99) * 1000,
+        'mean': statistics.fmean(latencies) * 1000,
+        'statuses': statuses,
+    }
+
+
+async def main(args):
+    api_key = f'org_bench_{secrets.token_urlsafe(24)}'
+    org = Organization(id=str(uuid.uuid4()), name='ingest-benchmark', plan='enterprise', quota_limit=10 ** 9)
+    org.set_api_key(api_key)
+    await org.asave()
+
+    app = FastIngestMiddleware(get_asgi_application(), path=FAST_PATH)
+    reserve = quota_periods.reserve
+    stubs = [
+        mock.patch.object(NotificationAPIView, '_get_user_data', new=mock.AsyncMock(return_value=USER)),
+        mock.patch.object(NotificationAPIView, '_get_template', new=mock.AsyncMock(return_value=TEMPLATE)),
+        mock.patch.object(NotificationAPIView, '_publish_to_queue', new=mock.AsyncMock()),
+        mock.patch.object(quota_periods, 'reserve', new=functools.partial(reserve, rate_limit=10 ** 9)),
+    ]
+    if not args.with_database:
+        stubs += [
+            mock.patch.object(Notification.objects, 'create'),
+            mock.patch('gateway_api.views.get_event_writer'),
+        ]
+    for stub in stubs:
+        stub.start()
+
+    results = {}
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://gateway') as client:
+            for name in args.paths:
+                await run_path(client, PATHS[name], api_key, args.warmup, args.concurrency)
+                results[name] = await run_path(client, PATHS[name], api_key, args.requests, args.concurrency)
+    finally:
+        for stub in stubs:
+            stub.stop()
+        await Notification.objects.filter(organization_id=org.id).adelete()
+        await org.adelete()
+
+    print(f"{'path':<6} {'req/s':>9} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9}  statuses")
+    for name, result in results.items():
+        print(
+            f"{name:<6} {result['rps']:>9.1f} {result['mean']:>9.2f} {result['p50']:>9.2f} "
+            f"{result['p99']:>9.2f}  {result['statuses']}"
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--requests', type=int, default=2000, help='Measured requests per path')
+    parser.add_argument('--warmup', type=int, default=200, help='Unmeasured requests per path before measuring')
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--paths', nargs='+', choices=sorted(PATHS), default=['drf', 'fast'])
+    parser.add_argument('--with-database', action='store_true', help='Insert the notification rows for real')
+    asyncio.run(main(parser.parse_args()))
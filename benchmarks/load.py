@@ -0,0 +1,327 @@
+"""
+Load test of the running gateway: starts the ASGI application (uvicorn, or
+gunicorn with --workers > 1) against local stand-ins for its upstreams and drives
+a configurable mix of requests at it over HTTP.
+
+Stand-ins: benchmarks/standins.py serves the user and template services, RabbitMQ
+is replaced by an in-process fake channel (or --amqp URL for a local broker).
+Redis (REDIS_URL, or --redis) and the database are the ones configured for the
+gateway; point them at local instances.
+
+Each request is drawn from --mix (seeded, so runs are repeatable):
+
+    hit        known user and template, both cached after the warmup
+    miss       a new user and template, fetched from the stand-ins
+    duplicate  a request_id that was already accepted (idempotent replay)
+    invalid    template_code missing (400)
+    bad_key    unknown API key (401)
+    opt_out    user who has disabled the channel (rejected)
+
+Prints JSON with requests per second and p50/p95/p99 latency, overall and per
+scenario, to stdout (or --output), and a summary table to stderr.
+
+    python benchmarks/load.py --requests 5000 --concurrency 50 --mix hit=80,miss=20
+    python benchmarks/load.py --workers 4 --path fast --output results.json
+
+Run it from the repository root with the gateway's environment (.env) loaded and
+migrations applied. The organization and notifications created by the run are
+deleted at the end; server output goes to logs/load-*.log.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import secrets
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'notification_gateway.settings')
+
+import django  # noqa: E402
+
+django.setup()
+# httpx logs every request at INFO
+logging.getLogger('httpx').setLevel(logging.WARNING)
+
+import httpx  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+from gateway_api.models import Notification, Organization  # noqa: E402
+
+SCENARIOS = ('hit', 'miss', 'duplicate', 'invalid', 'bad_key', 'opt_out')
+DEFAULT_MIX = 'hit=60,miss=10,duplicate=10,invalid=10,bad_key=5,opt_out=5'
+PATHS = {'drf': '/api/v1/notifications/', 'fast': settings.FAST_INGEST_PATH}
+
+# Users and templates that the hit and opt_out scenarios cycle through
+CACHED_USERS = 20
+SEEDED_REQUESTS = 50
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario '{name}' (choose from {', '.join(SCENARIOS)})")
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"'{part}' is not scenario=weight")
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError('the mix needs at least one positive weight')
+    return mix
+
+
+class Requests:
+    """Builds the (api_key, payload) for each scenario; request ids are unique to this run."""
+
+    def __init__(self, api_key, run_id):
+        self.api_key = api_key
+        self.run_id = run_id
+        self.counter = 0
+        self.seeded = [self._request_id() for _ in range(SEEDED_REQUESTS)]
+
+    def _request_id(self):
+        self.counter += 1
+        return f'bench-{self.run_id}-{self.counter}'
+
+    def _payload(self, user_id, template_code, request_id=None):
+        return {
+            'notification_type': 'email',
+            'user_id': user_id,
+            'template_code': template_code,
+            'variables': {'name': 'Bench'},
+            'request_id': request_id or self._request_id(),
+        }
+
+    def build(self, scenario):
+        n = self.counter
+        if scenario == 'hit':
+            return self.api_key, self._payload(f'bench-user-{n % CACHED_USERS}', 'bench-welcome')
+        if scenario == 'miss':
+            return self.api_key, self._payload(f'bench-{self.run_id}-user-{n}', f'bench-{self.run_id}-template-{n}')
+        if scenario == 'duplicate':
+            return self.api_key, self._payload('bench-user-0', 'bench-welcome', self.seeded[n % len(self.seeded)])
+        if scenario == 'invalid':
+            payload = self._payload('bench-user-0', 'bench-welcome')
+            del payload['template_code']
+            return self.api_key, payload
+        if scenario == 'bad_key':
+            return f'org_bench_{secrets.token_urlsafe(24)}', self._payload('bench-user-0', 'bench-welcome')
+        return self.api_key, self._payload(f'optout-{n % CACHED_USERS}', 'bench-welcome')
+
+
+async def drive(client, path, requests, plan, concurrency):
+    """Closed loop: `concurrency` clients each send their next request as soon as the last one returns."""
+    results = {name: {'latencies': [], 'statuses': {}} for name in set(plan)}
+    remaining = iter(plan)
+
+    async def worker():
+        for scenario in remaining:
+            api_key, payload = requests.build(scenario)
+            started = time.perf_counter()
+            try:
+                response = await client.post(path, json=payload, headers={'X-API-Key': api_key})
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            result = results[scenario]
+            result['latencies'].append(time.perf_counter() - started)
+            result['statuses'][status] = result['statuses'].get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results, time.perf_counter() - started
+
+
+def summarize(latencies, statuses, elapsed):
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed, 1),
+        'latency_ms': {
+            'mean': round(statistics.fmean(latencies) * 1000, 3),
+            'p50': round(percentile(latencies, 0.50) * 1000, 3),
+            'p95': round(percentile(latencies, 0.95) * 1000, 3),
+            'p99': round(percentile(latencies, 0.99) * 1000, 3),
+            'max': round(max(latencies) * 1000, 3),
+        },
+        'statuses': dict(sorted(statuses.items())),
+    }
+
+
+def start(command, env, log):
+    return subprocess.Popen(command, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def stop(process):
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+async def wait_until_up(url, process, log_path, timeout=60):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(timeout=2.0) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f'{url} exited with code {process.returncode}, see {log_path}')
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f'{url} did not come up within {timeout}s, see {log_path}')
+
+
+async def run(args, api_key, gateway, upstream, logs):
+    await wait_until_up(f'http://127.0.0.1:{args.upstream_port}/health', upstream, logs['upstream'])
+    await wait_until_up(f'http://127.0.0.1:{args.port}/health/', gateway, logs['gateway'])
+
+    rng = random.Random(args.seed)
+    names = list(args.mix)
+    weights = [args.mix[name] for name in names]
+    requests = Requests(api_key, secrets.token_hex(4))
+    path = PATHS[args.path]
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{args.port}', limits=limits, timeout=args.timeout) as client:
+        # Accept the requests that duplicates replay, then warm caches and connections
+        for request_id in requests.seeded:
+            await client.post(path, json=requests._payload('bench-user-0', 'bench-welcome', request_id),
+                              headers={'X-API-Key': api_key})
+        await drive(client, path, requests, rng.choices(names, weights, k=args.warmup), args.concurrency)
+        results, elapsed = await drive(client, path, requests, rng.choices(names, weights, k=args.requests), args.concurrency)
+
+    latencies, statuses = [], {}
+    for result in results.values():
+        latencies += result['latencies']
+        for status, count in result['statuses'].items():
+            statuses[status] = statuses.get(status, 0) + count
+    return {
+        'config': {
+            'path': args.path,
+            'workers': args.workers,
+            'concurrency': args.concurrency,
+            'requests': args.requests,
+            'warmup': args.warmup,
+            'mix': args.mix,
+            'seed': args.seed,
+            'upstream_latency_ms': args.upstream_latency_ms,
+            'amqp': 'fake' if args.amqp == 'fake' else 'broker',
+        },
+        'total': {**summarize(latencies, statuses, elapsed), 'elapsed_s': round(elapsed, 3)},
+        'scenarios': {
+            name: summarize(result['latencies'], result['statuses'], elapsed)
+            for name, result in sorted(results.items())
+        },
+    }
+
+
+def print_table(report, out):
+    print(f"{'scenario':<10} {'requests':>8} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  statuses", file=out)
+    for name, result in [*report['scenarios'].items(), ('total', report['total'])]:
+        latency = result['latency_ms']
+        print(
+            f"{name:<10} {result['requests']:>8} {result['rps']:>9.1f} {latency['p50']:>8.2f} "
+            f"{latency['p95']:>8.2f} {latency['p99']:>8.2f}  {result['statuses']}",
+            file=out
+        )
+
+
+def main(args):
+    api_key = f'org_bench_{secrets.token_urlsafe(24)}'
+    org = Organization(id=str(uuid.uuid4()), name='load-benchmark', plan='enterprise', quota_limit=10 ** 9)
+    org.set_api_key(api_key)
+    org.save()
+
+    upstream_url = f'http://127.0.0.1:{args.upstream_port}'
+    env = {
+        **os.environ,
+        'PORT': str(args.port),
+        'WEB_CONCURRENCY': str(args.workers),
+        'USER_SERVICE_URL': upstream_url,
+        'TEMPLATE_SERVICE_URL': upstream_url,
+        'BENCH_RATE_LIMIT': str(args.rate_limit),
+        'FAST_INGEST_ENABLED': str(args.path == 'fast'),
+    }
+    if args.redis:
+        env['REDIS_URL'] = args.redis
+    if args.amqp == 'fake':
+        env['BENCH_FAKE_AMQP'] = '1'
+    else:
+        env['RABBITMQ_URL'] = args.amqp
+
+    if args.workers > 1:
+        gateway_command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'benchmarks.serve:application']
+    else:
+        gateway_command = [
+            sys.executable, '-m', 'uvicorn', 'benchmarks.serve:application', '--port', str(args.port),
+            '--lifespan', 'on', '--no-access-log', '--log-level', 'warning',
+        ]
+    upstream_command = [
+        sys.executable, 'benchmarks/standins.py', '--port', str(args.upstream_port),
+        '--latency-ms', str(args.upstream_latency_ms),
+    ]
+
+    os.makedirs(os.path.join(ROOT, 'logs'), exist_ok=True)
+    logs = {name: os.path.join(ROOT, 'logs', f'load-{name}.log') for name in ('upstream', 'gateway')}
+    processes = []
+    try:
+        with open(logs['upstream'], 'w') as upstream_log, open(logs['gateway'], 'w') as gateway_log:
+            processes.append(start(upstream_command, os.environ, upstream_log))
+            processes.append(start(gateway_command, env, gateway_log))
+            report = asyncio.run(run(args, api_key, processes[1], processes[0], logs))
+    finally:
+        for process in reversed(processes):
+            stop(process)
+        Notification.objects.filter(organization_id=org.id).delete()
+        org.delete()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    print_table(report, sys.stderr)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--requests', type=int, default=5000, help='Measured requests')
+    parser.add_argument('--warmup', type=int, default=500, help='Unmeasured requests sent first')
+    parser.add_argument('--concurrency', type=int, default=50, help='Requests in flight at once')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f'Scenario weights (default {DEFAULT_MIX})')
+    parser.add_argument('--seed', type=int, default=1, help='Seed for the order of scenarios')
+    parser.add_argument('--path', choices=sorted(PATHS), default='drf', help='DRF view or the raw ASGI fast path')
+    parser.add_argument('--workers', type=int, default=1, help='More than 1 runs gunicorn (gunicorn.conf.py)')
+    parser.add_argument('--port', type=int, default=18000, help='Gateway port')
+    parser.add_argument('--upstream-port', type=int, default=18001, help='Stand-in user/template service port')
+    parser.add_argument('--upstream-latency-ms', type=float, default=2.0, help='Delay added by the stand-ins')
+    parser.add_argument('--redis', default='', help='Redis URL for the gateway (default REDIS_URL)')
+    parser.add_argument('--amqp', default='fake', help="'fake' for the in-process channel, or a RabbitMQ URL")
+    parser.add_argument('--rate-limit', type=int, default=10 ** 9, help='Per-org requests per minute')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Client timeout per request (seconds)')
+    parser.add_argument('--output', help='Write the JSON report here instead of stdout')
+    args = parser.parse_args()
+    if not (args.redis or settings.REDIS_URL):
+        parser.error('REDIS_URL is not set; pass --redis redis://localhost:6379/1')
+    main(args)
@@ -0,0 +1,292 @@
+"""
+Micro-benchmarks for the functions every notification passes through, with a
+regression gate against a stored JSON baseline.
+
+    authenticate                 APIKeyAuthentication.authenticate, cached key
+    authenticate_async           APIKeyAuthentication.authenticate_async, cached key
+    validate_template_variables  NotificationAPIView._validate_template_variables
+    build_message                views.build_message, the queue message for a worker
+    encode_message               views.encode_message, its AMQP body
+    render_response              the 202 response body, as the ORJSONRenderer writes it
+    handle_status_update         a worker's 'processing' report for a queued notification
+    update_quota                 settling a delivered notification's quota lease
+
+Each function is called in a loop until a round takes at least --min-time seconds,
+for --rounds rounds; the fastest round gives the cost per call, the least
+disturbed by whatever else the machine was doing. handle_status_update and
+update_quota get a fresh notification or lease for every call, created before the
+round starts, so a round never times the no-op of reporting the same one again.
+
+    python benchmarks/micro.py --save          # record benchmarks/micro_baseline.json
+    python benchmarks/micro.py                 # compare; exits 1 on a regression
+    python benchmarks/micro.py --threshold 0.1 --only build_message encode_message
+
+A function regresses when it is more than --threshold (default 25%) slower than
+its baseline. Baselines are only comparable on the machine (and Python) that
+recorded them, so record them where the gate runs. handle_status_update,
+update_quota and the authenticate functions use the configured Redis and
+database, like the gateway does: run from the repository root with the gateway's
+environment (.env) loaded and migrations applied. Rows created by the run are
+deleted at the end.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import secrets
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'notification_gateway.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from channels.db import database_sync_to_async  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+
+from gateway_api import quota, renderers, views  # noqa: E402
+from gateway_api.authentication import APIKeyAuthentication  # noqa: E402
+from gateway_api.models import Notification, Organization  # noqa: E402
+from gateway_api.partitions import new_notification_id  # noqa: E402
+from gateway_api.redis_client import get_redis_client  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'micro_baseline.json')
+
+TEMPLATE = {
+    'content': 'Hi {{name}}, order {{order_id}} ({{total}}) has shipped: {{link}}. Questions? {{support_email}}',
+    'subject': 'Your order has shipped',
+    'variables': ['name', 'order_id', 'total', 'link', 'support_email'],
+}
+VARIABLES = {
+    'name': 'Ada',
+    'order_id': 'A-10293',
+    'total': '$42.00',
+    'link': 'https://example.com/orders/A-10293',
+    'support_email': 'help@example.com',
+}
+USER = {'email': 'ada@example.com', 'name': 'Ada', 'push_token': 'token', 'preferences': {'email': True}}
+
+
+def new_notification(org):
+    return Notification(
+        id=new_notification_id(),
+        correlation_id=secrets.token_hex(16),
+        organization_id=org.id,
+        user_id='user-1',
+        notification_type='email',
+        template_code='order_shipped',
+        request_id=f'micro-{secrets.token_hex(8)}',
+    )
+
+
+def cases(org, api_key, notification):
+    """
+    name -> zero-argument function or coroutine function. A function with a
+    ``prepare(calls)`` coroutine attribute needs it awaited before each round.
+    """
+    authentication = APIKeyAuthentication()
+    request = RequestFactory().post('/api/v1/notifications/', HTTP_X_API_KEY=api_key)
+    view = views.NotificationAPIView()
+    message_args = (
+        notification.id, notification.correlation_id, org.id, 'user-1', 'email', 'order_shipped',
+        TEMPLATE, USER, VARIABLES, 5, {'campaign': 'shipping'}, notification.request_id,
+    )
+    message = views.build_message(*message_args)
+    response = {
+        'success': True,
+        'data': {
+            'notification_id': notification.id,
+            'status': 'accepted',
+            'request_id': notification.request_id,
+            'correlation_id': notification.correlation_id,
+        },
+        'message': 'Notification accepted for processing',
+        'meta': views.get_standard_meta(),
+    }
+
+    async def validate_template_variables():
+        return await view._validate_template_variables(TEMPLATE, VARIABLES)
+
+    queued = iter(())
+    leases = iter(())
+
+    async def handle_status_update():
+        return await views.handle_status_update(next(queued).id, org.id, 'processing', worker='bench')
+
+    async def create_queued(calls):
+        nonlocal queued
+        created = await database_sync_to_async(Notification.objects.bulk_create)([new_notification(org) for _ in range(calls)])
+        queued = iter(created)
+
+    async def update_quota():
+        return await views.update_quota(org.id, True, next(leases))
+
+    async def create_leases(calls):
+        nonlocal leases
+        ids = [new_notification_id() for _ in range(calls)]
+        redis_client = await get_redis_client()
+        await redis_client.zadd(quota.lease_key(org.id), {notification_id: quota.lease_deadline() for notification_id in ids})
+        leases = iter(ids)
+
+    handle_status_update.prepare = create_queued
+    update_quota.prepare = create_leases
+
+    return {
+        'authenticate': lambda: authentication.authenticate(request),
+        'authenticate_async': lambda: authentication.authenticate_async(request),
+        'validate_template_variables': validate_template_variables,
+        'build_message': lambda: views.build_message(*message_args),
+        'encode_message': lambda: views.encode_message(message),
+        'render_response': lambda: renderers.dumps(response),
+        'handle_status_update': handle_status_update,
+        'update_quota': update_quota,
+    }
+
+
+# The cases that are awaited; the others are plain calls
+ASYNC_CASES = {'authenticate_async', 'validate_template_variables', 'handle_status_update', 'update_quota'}
+
+
+def time_sync(fn, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return time.perf_counter() - started
+
+
+async def time_async(fn, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        await fn()
+    return time.perf_counter() - started
+
+
+async def measure(fn, is_async, rounds, min_time):
+    """Seconds per call: fastest and median of `rounds` rounds, each at least `min_time` long."""
+    prepare = getattr(fn, 'prepare', None)
+
+    async def run(calls):
+        if prepare is not None:
+            await prepare(calls)
+        return await time_async(fn, calls) if is_async else time_sync(fn, calls)
+
+    calls = 1
+    while (elapsed := await run(calls)) < min_time:
+        calls = max(calls * 2, int(calls * min_time / max(elapsed, 1e-9) * 1.2))
+    per_call = [elapsed / calls] + [await run(calls) / calls for _ in range(rounds - 1)]
+    return {
+        'min_us': round(min(per_call) * 1e6, 3),
+        'median_us': round(statistics.median(per_call) * 1e6, 3),
+        'calls': calls,
+        'rounds': rounds,
+    }
+
+
+async def run_cases(selected, rounds, min_time):
+    results = {}
+    for name, fn in selected.items():
+        results[name] = await measure(fn, name in ASYNC_CASES, rounds, min_time)
+        print(f"{name:<28} {results[name]['min_us']:>12.2f} us", file=sys.stderr)
+    return results
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'processor': platform.processor() or platform.machine(),
+        'recorded_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print current vs baseline per function; returns the names that regressed."""
+    regressed = []
+    print(f"\n{'function':<28} {'baseline us':>12} {'current us':>12} {'change':>8}", file=sys.stderr)
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<28} {'-':>12} {result['min_us']:>12.2f} {'new':>8}", file=sys.stderr)
+            continue
+        change = result['min_us'] / before['min_us'] - 1
+        flag = ''
+        if change > threshold:
+            regressed.append(name)
+            flag = '  REGRESSED'
+        print(f"{name:<28} {before['min_us']:>12.2f} {result['min_us']:>12.2f} {change:>+8.1%}{flag}", file=sys.stderr)
+    return regressed
+
+
+def main(args):
+    api_key = f'org_bench_{secrets.token_urlsafe(24)}'
+    org = Organization(id=str(uuid.uuid4()), name='micro-benchmark', plan='enterprise', quota_limit=10 ** 9)
+    org.set_api_key(api_key)
+    org.save()
+    notification = new_notification(org)
+    notification.save()
+
+    try:
+        # Cache the key so both authenticate functions measure the cache-hit path
+        APIKeyAuthentication().warm_cache(org)
+        available = cases(org, api_key, notification)
+        unknown = set(args.only or ()) - set(available)
+        if unknown:
+            raise SystemExit(f"Unknown benchmark(s): {', '.join(sorted(unknown))}")
+        selected = {name: fn for name, fn in available.items() if not args.only or name in args.only}
+        results = asyncio.run(run_cases(selected, args.rounds, args.min_time))
+    finally:
+        Notification.objects.filter(organization_id=org.id).delete()
+        org.delete()
+
+    report = {'environment': environment(), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+
+    if args.save:
+        if args.only and os.path.exists(args.baseline):
+            # Keep the baselines of the functions that were not run
+            with open(args.baseline) as f:
+                report['results'] = {**json.load(f)['results'], **results}
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+        print(f"\nBaseline saved to {args.baseline}", file=sys.stderr)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; record one with --save", file=sys.stderr)
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    recorded = {key: baseline['environment'].get(key) for key in ('python', 'machine', 'processor')}
+    current = {key: report['environment'][key] for key in recorded}
+    if recorded != current:
+        print(f"\nWarning: baseline was recorded on {recorded}, this is {current}", file=sys.stderr)
+
+    regressed = compare(results, baseline['results'], args.threshold)
+    if regressed:
+        print(f"\n{len(regressed)} regressed by more than {args.threshold:.0%}: {', '.join(regressed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--only', nargs='+', metavar='NAME', help='Run only these benchmarks')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2, help='Minimum seconds per round')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed slowdown before failing (0.25 = 25%%)')
+    parser.add_argument('--baseline', default=BASELINE, help='Baseline JSON file')
+    parser.add_argument('--save', action='store_true', help='Record the results as the new baseline')
+    parser.add_argument('--output', help='Also write the results as JSON here')
+    sys.exit(main(parser.parse_args()))
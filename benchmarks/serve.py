@@ -0,0 +1,33 @@
+"""
+The gateway's ASGI application as benchmarks/load.py serves it, under uvicorn or
+gunicorn (which import ``benchmarks.serve:application`` in each worker):
+
+- BENCH_FAKE_AMQP=1 publishes to benchmarks.standins.FakeChannel instead of
+  RabbitMQ (RABBITMQ_URL is not used).
+- BENCH_RATE_LIMIT replaces the per-org limit of 100 requests a minute, which a
+  load test would otherwise hit within its first second.
+
+Everything else (settings, Redis, database, upstream URLs) comes from the
+environment as usual.
+"""
+
+import functools
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'notification_gateway.settings')
+
+from notification_gateway.asgi import application  # noqa: E402  (sets up Django)
+
+from benchmarks.standins import FakeChannel  # noqa: E402
+from gateway_api import quota, rabbitmq  # noqa: E402
+
+if os.environ.get('BENCH_FAKE_AMQP'):
+    # get_channel() hands out the open channel it already has
+    rabbitmq._channel = FakeChannel()
+
+if os.environ.get('BENCH_RATE_LIMIT'):
+    quota.reserve = functools.partial(quota.reserve, rate_limit=int(os.environ['BENCH_RATE_LIMIT']))
+
+__all__ = ['application']
@@ -0,0 +1,125 @@
+"""
+Local stand-ins for the gateway's upstreams, for benchmarks/load.py.
+
+- A fake user service and template service in one ASGI app, so USER_SERVICE_URL
+  and TEMPLATE_SERVICE_URL can both point at it (GET /health answers for both). Users whose id starts with
+  'optout' have disabled email and push; every other user and template exists.
+  Each response is delayed by --latency-ms to mimic a real service.
+- FakeChannel, an in-process stand-in for the RabbitMQ channel that accepts and
+  counts publishes (used by benchmarks/serve.py).
+
+    python benchmarks/standins.py --port 18001 --latency-ms 2
+"""
+
+import argparse
+import asyncio
+import json
+
+import uvicorn
+
+
+def user_body(user_id):
+    opted_out = user_id.startswith('optout')
+    return {
+        'success': True,
+        'data': {
+            'id': user_id,
+            'email': f'{user_id}@bench.example.com',
+            'name': 'Bench User',
+            'push_token': f'token-{user_id}',
+            'preferences': {'email': not opted_out, 'push': not opted_out},
+        },
+        'message': 'User found',
+        'meta': {},
+    }
+
+
+def template_body(template_code):
+    return {
+        'success': True,
+        'data': {
+            'code': template_code,
+            'content': 'Hello {{name}}, this is a benchmark notification.',
+            'subject': 'Benchmark',
+            'variables': ['name'],
+        },
+        'message': 'Template retrieved successfully',
+        'meta': {},
+    }
+
+
+class UpstreamApp:
+    """GET /users/<id> (user service) and GET /api/v1/templates/<code>/ (template service)."""
+
+    def __init__(self, latency_ms=0.0):
+        self.latency = latency_ms / 1000
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while (await receive())['type'] != 'lifespan.shutdown':
+                await send({'type': 'lifespan.startup.complete'})
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+        parts = scope['path'].strip('/').split('/')
+        if parts == ['health']:
+            status, body = 200, {'status': 'healthy'}
+        elif len(parts) == 2 and parts[0] == 'users':
+            status, body = 200, user_body(parts[1])
+        elif len(parts) == 4 and parts[:3] == ['api', 'v1', 'templates']:
+            status, body = 200, template_body(parts[3])
+        else:
+            status, body = 404, {'success': False, 'message': 'Not found'}
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        content = json.dumps(body).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(content)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': content})
+
+
+class FakeExchange:
+    def __init__(self, channel):
+        self.channel = channel
+
+    async def publish(self, message, routing_key):
+        self.channel.published[routing_key] = self.channel.published.get(routing_key, 0) + 1
+
+
+class FakeQueue:
+    async def bind(self, exchange, routing_key=None):
+        pass
+
+
+class FakeChannel:
+    """Just enough of aio_pika's RobustChannel for the gateway's declare / bind / publish."""
+
+    is_closed = False
+
+    def __init__(self):
+        self.published = {}
+
+    async def declare_exchange(self, name, *args, **kwargs):
+        return FakeExchange(self)
+
+    async def declare_queue(self, name, *args, **kwargs):
+        return FakeQueue()
+
+    async def get_exchange(self, name, *args, **kwargs):
+        return FakeExchange(self)
+
+    async def close(self):
+        self.is_closed = True
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=18001)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Delay added to every response')
+    args = parser.parse_args()
+    uvicorn.run(UpstreamApp(args.latency_ms), host=args.host, port=args.port, log_level='warning', access_log=False)
@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_init, post_save
 
 
 class GatewayApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gateway_api'
+
+    def ready(self):
+        from . import invalidation, key_filter, quota
+        quota.check_period_settings()
+
+        post_save.connect(key_filter.organization_saved, sender='gateway_api.Organization')
+
+        # Publish changes to cached organization data to every gateway
+        post_init.connect(invalidation.organization_loaded, sender='gateway_api.Organization')
+        post_save.connect(invalidation.organization_changed, sender='gateway_api.Organization')
+        post_delete.connect(invalidation.organization_changed, sender='gateway_api.Organization')
+        post_save.connect(invalidation.quota_caps_changed, sender='gateway_api.QuotaCap')
+        post_delete.connect(invalidation.quota_caps_changed, sender='gateway_api.QuotaCap')
@@ -2,21 +2,41 @@
 
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
-import hashlib
 import json
 import logging
-from gateway_api.redis_client import get_redis
+from gateway_api.redis_client import get_redis, get_redis_client
+from gateway_api.quota import remember_plan
+from gateway_api import key_filter
+from gateway_api import invalidation
+from gateway_api import timing
+from gateway_api import tracing
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
 
+# Seconds an API key -> organization lookup stays in Redis. Organization changes
+# delete the entry right away (see gateway_api/invalidation.py), so this is only a
+# backstop for changes made without signals, e.g. queryset.update()
+API_KEY_CACHE_TTL = settings.API_KEY_CACHE_TTL
+
+# Cached in place of the organization for keys the database does not know, so a
+# client retrying a bad key costs one Redis GET instead of a query per attempt
+INVALID_KEY_MARKER = 'invalid'
+
+
+def api_key_cache_key(api_key_hash):
+    # Same digest as Organization.api_key_hash; keys never reach Redis in plaintext
+    return f"api_key:{api_key_hash}"
+
+
 class OrganizationUser:
     """Lightweight user object representing an authenticated organization."""
-    def __init__(self, organization_id, name, quota_limit):
+    def __init__(self, organization_id, name, quota_limit, plan=None):
         self.organization_id = organization_id
         self.name = name
         self.quota_limit = quota_limit
+        self.plan = plan
         self.is_authenticated = True
     
     def __str__(self):
@@ -39,13 +59,16 @@ class APIKeyAuthentication(BaseAuthentication):
         
         logger.info(f"Authenticating API key: {api_key[:15]}...")
         
+        api_key_hash = key_filter.key_hash(api_key)
+        if not key_filter.might_exist(api_key_hash):
+            logger.warning(f"✗ Unknown API key rejected by key filter: {api_key[:15]}...")
+            raise AuthenticationFailed('Invalid API Key')
+        
         try:
             # Get sync Redis client
             redis_client = get_redis()
             
-            # Create cache key using SHA256 hash
-            api_key_hash = hashlib.sha256(api_key.encode()).hexdigest()
-            cache_key = f"api_key:{api_key_hash}"
+            cache_key = self._cache_key(api_key_hash)
             logger.debug(f"Cache key: {cache_key}")
             
             # Try to get from cache
@@ -61,6 +84,8 @@ class APIKeyAuthentication(BaseAuthentication):
                     # But let's handle both cases for safety
                     if isinstance(cached_value, bytes):
                         cached_value = cached_value.decode('utf-8')
+                    if cached_value == INVALID_KEY_MARKER:
+                        raise AuthenticationFailed('Invalid API Key')
                     
                     # Parse JSON
                     org_data = json.loads(cached_value)
@@ -68,6 +93,8 @@ class APIKeyAuthentication(BaseAuthentication):
                 else:
                     logger.info("✗ Cache MISS - querying database")
                     
+            except AuthenticationFailed:
+                raise
             except json.JSONDecodeError as e:
                 logger.warning(f"Failed to decode cached JSON: {e}. Value: {repr(cached_value)}")
                 # Delete corrupted cache
@@ -84,40 +111,34 @@ class APIKeyAuthentication(BaseAuthentication):
                 
                 try:
                     # Query database
-                    org = Organization.objects.get(api_key=api_key, is_active=True)
+                    org = Organization.objects.get(api_key_hash=api_key_hash, is_active=True)
                     logger.info(f"✓ Found organization in database: {org.name} (ID: {org.id})")
                     
-                    # Prepare data
-                    org_data = {
-                        "organization_id": str(org.id),
-                        "name": org.name,
-                        "quota_limit": org.quota_limit,
-                    }
+                    org_data = self._org_data(org)
+                    key_filter.add_key(api_key_hash)
                     
                     # Cache it for 5 minutes (300 seconds)
                     try:
                         cache_value = json.dumps(org_data)
-                        redis_client.setex(cache_key, 300, cache_value)
-                        logger.info(f"✓ Cached organization data (TTL: 300s)")
+                        redis_client.setex(cache_key, API_KEY_CACHE_TTL, cache_value)
+                        logger.info(f"✓ Cached organization data (TTL: {API_KEY_CACHE_TTL}s)")
                     except Exception as cache_error:
                         logger.warning(f"Failed to cache organization data: {cache_error}")
                         # Continue anyway - caching failure is not critical
                         
                 except Organization.DoesNotExist:
                     logger.warning(f"✗ Invalid API key attempted: {api_key[:15]}...")
+                    try:
+                        redis_client.setex(cache_key, settings.API_KEY_NEGATIVE_TTL, INVALID_KEY_MARKER)
+                    except Exception:
+                        pass
                     raise AuthenticationFailed('Invalid API Key')
                     
                 except Exception as db_error:
                     logger.error(f"✗ Database query error: {db_error}", exc_info=True)
                     raise AuthenticationFailed('Database error during authentication')
             
-            # Create user object
-            user = OrganizationUser(
-                organization_id=org_data['organization_id'],
-                name=org_data['name'],
-                quota_limit=org_data['quota_limit']
-            )
-            
+            user = self._user(org_data)
             logger.info(f"✓ Authentication successful for: {user.name} ({user.organization_id})")
             return (user, None)
             
@@ -129,11 +150,125 @@ class APIKeyAuthentication(BaseAuthentication):
             # Log unexpected errors with full stack trace
             logger.error(f"✗ Unexpected authentication error: {type(e).__name__}: {e}", exc_info=True)
             raise AuthenticationFailed('Authentication service error')
+
+    async def authenticate_async(self, request):
+        """
+        Async twin of authenticate(), awaited by AsyncAPIView on the event loop.
+        Same cache and same failures, but reads Redis with the async client and
+        only falls back to the (async) ORM on a cache miss, so a request never
+        holds an executor thread just to authenticate.
+        """
+        with timing.stage('auth'):
+            return await self._authenticate_async(request)
+
+    async def _authenticate_async(self, request):
+        api_key = request.headers.get('X-API-Key')
+        
+        if not api_key:
+            logger.debug("No X-API-Key header provided")
+            return None
+        
+        # Most bad keys (typos, revoked keys, scanners) stop here, in memory
+        api_key_hash = key_filter.key_hash(api_key)
+        await key_filter.ensure_loaded()
+        invalidation.ensure_listener()
+        if not key_filter.might_exist(api_key_hash):
+            logger.warning(f"✗ Unknown API key rejected by key filter: {api_key[:15]}...")
+            raise AuthenticationFailed('Invalid API Key')
+        
+        try:
+            redis_client = await get_redis_client()
+            cache_key = self._cache_key(api_key_hash)
+            org_data = None
+            
+            try:
+                with tracing.span('cache.get api_key') as span:
+                    cached_value = await redis_client.get(cache_key)
+                    if span is not None:
+                        span.set('cache.hit', bool(cached_value))
+                if cached_value == INVALID_KEY_MARKER:
+                    raise AuthenticationFailed('Invalid API Key')
+                if cached_value:
+                    org_data = json.loads(cached_value)
+            except AuthenticationFailed:
+                raise
+            except json.JSONDecodeError as e:
+                logger.warning(f"Failed to decode cached JSON: {e}")
+                try:
+                    await redis_client.delete(cache_key)
+                except Exception:
+                    pass
+            except Exception as cache_error:
+                logger.warning(f"Cache read error: {cache_error}", exc_info=True)
+            
+            if not org_data:
+                from .models import Organization
+                
+                try:
+                    with tracing.span('db.get organization'):
+                        org = await Organization.objects.aget(api_key_hash=api_key_hash, is_active=True)
+                except Organization.DoesNotExist:
+                    logger.warning(f"✗ Invalid API key attempted: {api_key[:15]}...")
+                    try:
+                        await redis_client.setex(cache_key, settings.API_KEY_NEGATIVE_TTL, INVALID_KEY_MARKER)
+                    except Exception:
+                        pass
+                    raise AuthenticationFailed('Invalid API Key')
+                except Exception as db_error:
+                    logger.error(f"✗ Database query error: {db_error}", exc_info=True)
+                    raise AuthenticationFailed('Database error during authentication')
+                
+                org_data = self._org_data(org)
+                # A key created by another process that the filter has not caught up with yet
+                key_filter.add_key(api_key_hash)
+                try:
+                    await redis_client.setex(cache_key, API_KEY_CACHE_TTL, json.dumps(org_data))
+                except Exception as cache_error:
+                    logger.warning(f"Failed to cache organization data: {cache_error}")
+            
+            return (self._user(org_data), None)
+            
+        except AuthenticationFailed:
+            raise
+            
+        except Exception as e:
+            logger.error(f"✗ Unexpected authentication error: {type(e).__name__}: {e}", exc_info=True)
+            raise AuthenticationFailed('Authentication service error')
     
     def authenticate_header(self, request):
         """Return header type for 401 responses"""
         return 'X-API-Key'
 
+    def warm_cache(self, org):
+        """
+        Cache a newly created organization's key, replacing any invalid-key entry a
+        client probing it early may have left, so its first request needs no query.
+        """
+        cache_key = self._cache_key(org.api_key_hash)
+        get_redis().setex(cache_key, API_KEY_CACHE_TTL, json.dumps(self._org_data(org)))
+
+    def _cache_key(self, api_key_hash):
+        return api_key_cache_key(api_key_hash)
+
+    def _org_data(self, org):
+        return {
+            "organization_id": str(org.id),
+            "name": org.name,
+            "quota_limit": org.quota_limit,
+            "plan": org.plan,
+        }
+
+    def _user(self, org_data):
+        user = OrganizationUser(
+            organization_id=org_data['organization_id'],
+            name=org_data['name'],
+            quota_limit=org_data['quota_limit'],
+            plan=org_data.get('plan')
+        )
+        if user.plan:
+            remember_plan(user.organization_id, user.plan)
+        return user
+
 
 class InternalKeyAuthentication(BaseAuthentication):
     """
@@ -164,6 +299,10 @@ class InternalKeyAuthentication(BaseAuthentication):
         
         logger.info("✓ Internal service authentication successful")
         return (self.InternalUser(), None)
+
+    async def authenticate_async(self, request):
+        """No I/O involved, so AsyncAPIView can run it on the event loop."""
+        return self.authenticate(request)
     
     def authenticate_header(self, request):
         """Return header type for 401 responses"""
@@ -0,0 +1,62 @@
+# gateway_api/buffering.py
+
+import asyncio
+
+
+class BufferedWriter:
+    """
+    Base for the writers that collect items in memory on the event loop and write
+    them out in the background (notification events, usage counters, spans).
+
+    Pending items are flushed every ``flush_interval`` seconds by a task started on
+    the first record, early when the subclass asks for it (a full batch), and once
+    more on ``close``. Subclasses keep the items however suits them, say whether any
+    are waiting in ``has_pending`` and write them out in ``flush``.
+    """
+
+    def __init__(self, flush_interval):
+        self.flush_interval = flush_interval
+        self._flusher = None
+        # The event loop only keeps weak references to tasks; these hold the
+        # early flushes until they finish so none is collected half way through
+        self._flushes = set()
+
+    def has_pending(self):
+        raise NotImplementedError
+
+    async def flush(self):
+        raise NotImplementedError
+
+    def _schedule(self, loop, flush_now=False):
+        """Make sure the periodic flush runs on ``loop``; with ``flush_now``, also flush right away."""
+        if self._flusher is None or self._flusher.done() or self._flusher.get_loop() is not loop:
+            self._flusher = loop.create_task(self._run())
+        if flush_now:
+            task = loop.create_task(self.flush())
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def close(self):
+        """Stop the periodic flush and write whatever is still pending. Call on shutdown."""
+        if self._flusher is not None and not self._flusher.done():
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+        self._flusher = None
+        loop = asyncio.get_running_loop()
+        early = [task for task in self._flushes if task.get_loop() is loop]
+        if early:
+            await asyncio.gather(*early, return_exceptions=True)
+        if self.has_pending():
+            await self.flush()
+
+    async def _run(self):
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                if self.has_pending():
+                    await self.flush()
+        except asyncio.CancelledError:
+            # The loop is shutting down; write what is left before going away
+            if self.has_pending():
+                await self.flush()
+            raise
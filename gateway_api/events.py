@@ -0,0 +1,102 @@
+# gateway_api/events.py
+
+import asyncio
+import logging
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import DataError, IntegrityError, transaction
+from django.utils import timezone
+
+from .buffering import BufferedWriter
+from .models import NotificationEvent
+
+logger = logging.getLogger(__name__)
+
+
+class EventWriter(BufferedWriter):
+    """
+    Buffers notification events in memory and writes them with one bulk INSERT per
+    batch, so recording history adds no database round trip to the request path.
+
+    A batch is flushed when it reaches ``batch_size`` events or every ``flush_interval``
+    seconds, whichever comes first. Events still buffered when the process dies are
+    lost; the notification row itself is always written synchronously.
+    """
+
+    def __init__(self, batch_size=200, flush_interval=1.0, max_buffer=10000):
+        super().__init__(flush_interval)
+        self.batch_size = batch_size
+        self.max_buffer = max_buffer
+        self._buffer = []
+
+    def record(self, notification_id, organization_id, status, previous_status=None,
+               error_message=None, worker='', attempt=None, occurred_at=None):
+        """Queue one event. Must be called from the event loop thread."""
+        if len(self._buffer) >= self.max_buffer:
+            # The database is not keeping up; shed history rather than memory
+            logger.warning(f"Event buffer full, dropping event for {notification_id}")
+            return
+
+        self._buffer.append(NotificationEvent(
+            notification_id=notification_id,
+            organization_id=organization_id,
+            status=status,
+            previous_status=previous_status,
+            error_message=error_message[:500] if error_message else None,
+            worker=(worker or '')[:64],
+            attempt=attempt,
+            occurred_at=occurred_at or timezone.now(),
+        ))
+
+        self._schedule(asyncio.get_running_loop(), flush_now=len(self._buffer) >= self.batch_size)
+
+    def has_pending(self):
+        return bool(self._buffer)
+
+    async def flush(self):
+        """Write everything buffered so far. Returns the number of events written."""
+        batch, self._buffer = self._buffer, []
+        written = 0
+        for start in range(0, len(batch), self.batch_size):
+            chunk = batch[start:start + self.batch_size]
+            try:
+                await database_sync_to_async(self._insert)(chunk)
+            except (DataError, IntegrityError):
+                # One bad row fails the whole INSERT; write the chunk row by row so only it is lost
+                written += await database_sync_to_async(self._insert_each)(chunk)
+                continue
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch) - start} notification events: {e}")
+                break
+            written += len(chunk)
+        return written
+
+    def _insert(self, events):
+        # Its own transaction, so a failed INSERT never poisons an enclosing one
+        with transaction.atomic():
+            NotificationEvent.objects.bulk_create(events)
+
+    def _insert_each(self, events):
+        written = 0
+        for event in events:
+            try:
+                self._insert([event])
+            except Exception as e:
+                logger.error(f"Dropping {event.status} event for {event.notification_id}: {e}")
+                continue
+            written += 1
+        return written
+
+
+_event_writer = None
+
+
+def get_event_writer():
+    global _event_writer
+    if _event_writer is None:
+        _event_writer = EventWriter(
+            batch_size=settings.NOTIFICATION_EVENTS_BATCH_SIZE,
+            flush_interval=settings.NOTIFICATION_EVENTS_FLUSH_INTERVAL,
+        )
+    return _event_writer
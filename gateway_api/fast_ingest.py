@@ -0,0 +1,147 @@
+# gateway_api/fast_ingest.py
+
+import logging
+import uuid
+
+import orjson
+from asgiref.sync import ThreadSensitiveContext
+from django.conf import settings
+from rest_framework import exceptions
+
+from . import renderers, timing, tracing
+from .authentication import APIKeyAuthentication
+from .logging_filters import clear_correlation_id, set_correlation_id
+from .views import NotificationAPIView
+
+logger = logging.getLogger(__name__)
+
+
+class Headers:
+    """Case-insensitive view of ASGI headers, enough for the authenticators' request.headers.get()."""
+
+    def __init__(self, raw_headers):
+        self._headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in raw_headers}
+
+    def get(self, name, default=None):
+        return self._headers.get(name.lower(), default)
+
+
+class IngestRequest:
+    """The little an authenticator reads from a request."""
+
+    def __init__(self, scope):
+        self.headers = Headers(scope['headers'])
+
+
+class FastIngestMiddleware:
+    """
+    Raw ASGI route for POST FAST_INGEST_PATH with the same contract as
+    POST /api/v1/notifications/ (JSON only). It authenticates with the same
+    APIKeyAuthentication and runs the same NotificationAPIView.create_notification()
+    pipeline, but skips Django's middleware and DRF's request parsing, content
+    negotiation, Response rendering and schema machinery. Everything else is
+    passed to the wrapped application.
+    """
+
+    def __init__(self, app, path=None):
+        self.app = app
+        self.path = path or settings.FAST_INGEST_PATH
+        self.authenticator = APIKeyAuthentication()
+        self.pipeline = NotificationAPIView()
+        self.max_body_size = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] != self.path:
+            await self.app(scope, receive, send)
+            return
+
+        timings = timing.begin()
+        request = IngestRequest(scope)
+        correlation_id = request.headers.get('X-Correlation-ID') or str(uuid.uuid4())
+        headers = [(b'x-correlation-id', correlation_id.encode('latin-1'))]
+        token = set_correlation_id(correlation_id)
+        with tracing.start_request(
+            f"{scope['method']} {self.path}",
+            traceparent=request.headers.get('traceparent'),
+            correlation_id=correlation_id,
+        ) as root:
+            try:
+                if scope['method'] != 'POST':
+                    raise exceptions.MethodNotAllowed(scope['method'])
+                # Like Django's ASGI handler: this request's sync (ORM) calls get their own
+                # thread instead of queueing behind every other request's
+                async with ThreadSensitiveContext():
+                    status_code, body = await self.handle(request, receive, correlation_id)
+            except exceptions.APIException as exc:
+                status_code, body = exc.status_code, self.error_body(exc)
+                if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+                    headers.append((b'www-authenticate', self.authenticator.authenticate_header(request).encode('latin-1')))
+                elif isinstance(exc, exceptions.MethodNotAllowed):
+                    headers.append((b'allow', b'POST'))
+            except Exception:
+                logger.exception(f"Fast ingest failed [correlation_id={correlation_id}]")
+                exc = exceptions.APIException()
+                status_code, body = exc.status_code, self.error_body(exc)
+            if root is not None:
+                root.set('http.status_code', status_code)
+        clear_correlation_id(token)
+
+        if settings.SERVER_TIMING_HEADER and timings:
+            headers.append((b'server-timing', timing.server_timing(timings).encode('latin-1')))
+        await self.respond(send, status_code, body, headers)
+
+    async def handle(self, request, receive, correlation_id):
+        """Authenticate, parse and run the pipeline. Failures raise the DRF exceptions the DRF path would."""
+        user_auth = await self.authenticator.authenticate_async(request)
+        if user_auth is None:
+            # What IsAuthenticated reports on the DRF path
+            raise exceptions.NotAuthenticated()
+        user = user_auth[0]
+
+        content_type = request.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type != 'application/json':
+            raise exceptions.UnsupportedMediaType(content_type)
+        try:
+            data = orjson.loads(await self.read_body(receive))
+        except orjson.JSONDecodeError as e:
+            raise exceptions.ParseError(f'JSON parse error - {e}')
+        if not isinstance(data, dict):
+            raise exceptions.ParseError('Expected a JSON object')
+
+        return await self.pipeline.create_notification(
+            data, user, request.headers.get('X-API-Key'), correlation_id
+        )
+
+    async def read_body(self, receive):
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                raise exceptions.ParseError('Client disconnected')
+            body += message.get('body', b'')
+            if self.max_body_size is not None and len(body) > self.max_body_size:
+                raise exceptions.ParseError('Request body exceeded settings.DATA_UPLOAD_MAX_MEMORY_SIZE.')
+            if not message.get('more_body'):
+                return bytes(body)
+
+    def error_body(self, exc):
+        # Same envelope as gateway_api.exceptions.custom_exception_handler
+        return {
+            'success': False,
+            'error': str(exc),
+            'message': exc.detail,
+            'meta': {}
+        }
+
+    async def respond(self, send, status_code, body, headers):
+        content = renderers.dumps(body)
+        await send({
+            'type': 'http.response.start',
+            'status': status_code,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(content)).encode('latin-1')),
+                *headers,
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': content})
@@ -0,0 +1,163 @@
+# gateway_api/invalidation.py
+
+import asyncio
+import json
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import redis_client
+from . import key_filter
+from . import quota as quota_periods
+from . import quota_caps
+
+logger = logging.getLogger(__name__)
+
+
+CHANNEL = 'gateway:invalidate'
+
+# Organization fields copied into caches; saves touching only other fields
+# (e.g. quota_used from sync_quota_usage) publish nothing
+CACHED_FIELDS = {'name', 'plan', 'quota_limit', 'is_active', 'api_key_hash'}
+
+
+# ---------------------------------------------------------------------------
+# Publishing (any process that saves models: gateways, management commands, shells)
+# ---------------------------------------------------------------------------
+
+def publish_on_commit(kind, organization_id, delete_keys=(), **data):
+    """
+    publish() once the current transaction commits (right away outside one). Sooner,
+    other gateways would miss the cache, read the row as it was before the change,
+    and cache that again for the whole cache TTL.
+    """
+    transaction.on_commit(lambda: publish(kind, organization_id, delete_keys=delete_keys, **data))
+
+
+def publish(kind, organization_id, delete_keys=(), **data):
+    """
+    Drop shared Redis cache entries and tell every gateway to drop its in-process
+    copies, in one round trip. Failures are logged, not raised: the caches still
+    expire on their own. Returns whether the event was published.
+    """
+    if not getattr(redis_client, 'get_redis', None):
+        return False
+    try:
+        pipe = redis_client.get_redis().pipeline(transaction=False)
+        for key in delete_keys:
+            pipe.delete(key)
+        pipe.publish(CHANNEL, json.dumps({'kind': kind, 'organization_id': organization_id, **data}))
+        pipe.execute()
+    except Exception as e:
+        logger.error(f"Failed to publish {kind} invalidation for {organization_id}: {e}")
+        return False
+    return True
+
+
+def organization_loaded(sender, instance, **kwargs):
+    """post_init: remember the stored key digest, to spot key rotation on save."""
+    instance._loaded_api_key_hash = instance.__dict__.get('api_key_hash')
+
+
+def organization_changed(sender, instance, update_fields=None, **kwargs):
+    """post_save / post_delete for Organization."""
+    if update_fields is not None and not CACHED_FIELDS & set(update_fields):
+        return
+    from .authentication import api_key_cache_key
+
+    loaded_hash = getattr(instance, '_loaded_api_key_hash', None)
+    hashes = {instance.api_key_hash, loaded_hash} - {None, ''}
+    # New and rotated keys go to every gateway's key filter, which would reject them until its next refresh
+    new_key = kwargs.get('created') or instance.api_key_hash != loaded_hash
+    publish_on_commit(
+        'organization',
+        instance.id,
+        delete_keys=[api_key_cache_key(api_key_hash) for api_key_hash in hashes],
+        api_key_hash=instance.api_key_hash if new_key else None,
+    )
+    instance._loaded_api_key_hash = instance.api_key_hash
+
+
+def quota_caps_changed(sender, instance, **kwargs):
+    """post_save / post_delete for QuotaCap."""
+    publish_on_commit('quota_caps', instance.organization_id)
+
+
+# ---------------------------------------------------------------------------
+# Applying (every gateway process)
+# ---------------------------------------------------------------------------
+
+def apply(message):
+    organization_id = message.get('organization_id')
+    if message.get('kind') == 'organization':
+        quota_periods.forget_plan(organization_id)
+        quota_caps.forget_caps(organization_id)
+        if message.get('api_key_hash'):
+            key_filter.add_key(message['api_key_hash'])
+    elif message.get('kind') == 'quota_caps':
+        quota_caps.forget_caps(organization_id)
+
+
+_listener = None
+
+
+def ensure_listener():
+    """Start this process's subscriber on the running loop if it is not running yet."""
+    global _listener
+    loop = asyncio.get_running_loop()
+    if _listener is None or _listener.done() or _listener.get_loop() is not loop:
+        _listener = loop.create_task(_listen())
+
+
+async def stop_listener():
+    """Unsubscribe this process. Call on shutdown."""
+    global _listener
+    if _listener is not None and not _listener.done():
+        _listener.cancel()
+        await asyncio.gather(_listener, return_exceptions=True)
+    _listener = None
+
+
+async def _listen():
+    while True:
+        client = pubsub = None
+        try:
+            # Its own connection, without the shared pool's socket timeout
+            client = redis_client.create_pubsub_client()
+            if client is None:
+                # In-memory development client: a single process, nothing to hear
+                return
+            pubsub = client.pubsub()
+            await pubsub.subscribe(CHANNEL)
+            # Whatever was published while we were not subscribed is lost, so start clean;
+            # the key filter waits for a load that starts after this to trust its misses
+            quota_periods.forget_plan(None)
+            quota_caps.forget_caps(None)
+            key_filter.set_listening(timezone.now())
+
+            async for message in pubsub.listen():
+                if message['type'] != 'message':
+                    continue
+                try:
+                    apply(json.loads(message['data']))
+                except Exception as e:
+                    logger.warning(f"Ignoring bad invalidation message {message['data']!r}: {e}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Invalidation listener failed, resubscribing: {e}")
+            await asyncio.sleep(settings.INVALIDATION_RETRY_INTERVAL)
+        finally:
+            key_filter.set_listening(None)
+            if pubsub is not None:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+            if client is not None:
+                try:
+                    await client.aclose()
+                except Exception:
+                    pass
@@ -0,0 +1,163 @@
+# gateway_api/key_filter.py
+
+import asyncio
+import logging
+import math
+import time
+from datetime import timedelta
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from .models import hash_api_key as key_hash
+
+logger = logging.getLogger(__name__)
+
+
+class KeyFilter:
+    """
+    Bloom filter of API key hashes. ``key_hash in f`` is False only for hashes
+    that were never added, so a miss proves a key is unknown; a hit may be a
+    false positive (about ``error_rate`` of unknown keys) and is then settled
+    by the usual cache / database lookup.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def add(self, key_hash):
+        for position in self._positions(key_hash):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key_hash):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key_hash))
+
+    def _positions(self, key_hash):
+        # The input is already a SHA256, so two 64-bit slices of it are independent
+        # enough for double hashing
+        h1 = int(key_hash[:16], 16)
+        h2 = int(key_hash[16:32], 16) | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+
+_filter = None
+_loaded_until = None
+_refresher = None
+_loading = None
+# time.monotonic() of the last failed full load; requests wait for the refresher to retry
+_load_failed_at = None
+# When this process's invalidation listener subscribed (None while it is not), so
+# it has heard of every key created since
+_listening_since = None
+
+
+def might_exist(api_key_hash):
+    """
+    False only when the key is certainly unknown: the filter has not seen it, and
+    this process has been hearing about new keys since before the filter was last
+    loaded. Otherwise a key created elsewhere may be missing, so True.
+    """
+    if _filter is None or _listening_since is None or _loaded_until is None or _listening_since > _loaded_until:
+        return True
+    return api_key_hash in _filter
+
+
+def set_listening(since):
+    """Called by the invalidation listener with its subscription time, or None once it lost it."""
+    global _listening_since
+    _listening_since = since
+
+
+def add_key(api_key_hash):
+    """Make a newly created key known to this process right away."""
+    if _filter is not None and api_key_hash not in _filter:
+        _filter.add(api_key_hash)
+
+
+def organization_saved(sender, instance, **kwargs):
+    """post_save hook: keys created in this process are usable immediately."""
+    add_key(instance.api_key_hash)
+
+
+async def ensure_loaded():
+    """
+    Load the filter on first use and keep it fresh in the background. Keys
+    created by other processes arrive with the invalidation event for them, and
+    with the next refresh (API_KEY_FILTER_REFRESH seconds) in any case.
+    """
+    global _loading, _refresher
+    if not settings.API_KEY_FILTER_CAPACITY:
+        return
+
+    loop = asyncio.get_running_loop()
+    recently_failed = _load_failed_at is not None and time.monotonic() - _load_failed_at < settings.API_KEY_FILTER_REFRESH
+    if _filter is None and not recently_failed:
+        if _loading is None or _loading.done() or _loading.get_loop() is not loop:
+            _loading = loop.create_task(_load(full=True))
+        await asyncio.shield(_loading)
+
+    if _refresher is None or _refresher.done() or _refresher.get_loop() is not loop:
+        _refresher = loop.create_task(_refresh())
+
+
+async def stop():
+    """Cancel the background refresh. The filter itself stays usable."""
+    global _refresher
+    if _refresher is not None and not _refresher.done():
+        _refresher.cancel()
+        await asyncio.gather(_refresher, return_exceptions=True)
+    _refresher = None
+
+
+async def _load(full):
+    global _filter, _loaded_until, _load_failed_at
+    from .models import Organization
+
+    started = timezone.now()
+    capacity = settings.API_KEY_FILTER_CAPACITY
+    queryset = Organization.objects.all()
+    if not full:
+        # Allow for clock skew and transactions that committed late
+        queryset = queryset.filter(updated_at__gte=_loaded_until - timedelta(seconds=settings.API_KEY_FILTER_REFRESH))
+
+    try:
+        api_key_hashes = await database_sync_to_async(
+            lambda: list(queryset.values_list('api_key_hash', flat=True).iterator(chunk_size=5000))
+        )()
+    except Exception as e:
+        # Without a filter every key takes the normal lookup path
+        logger.error(f"Failed to load API key filter: {e}")
+        if full:
+            _load_failed_at = time.monotonic()
+        return
+
+    if full:
+        key_filter = KeyFilter(max(capacity, 2 * len(api_key_hashes)), settings.API_KEY_FILTER_ERROR_RATE)
+    else:
+        key_filter = _filter
+    for api_key_hash in api_key_hashes:
+        # Incremental loads overlap; only count hashes the filter has not seen
+        if full or api_key_hash not in key_filter:
+            key_filter.add(api_key_hash)
+
+    _filter = key_filter
+    _loaded_until = started
+    _load_failed_at = None
+    if full:
+        logger.info(f"Loaded API key filter: {len(api_key_hashes)} keys, {len(key_filter.bits) // 1024} KiB")
+
+
+async def _refresh():
+    while True:
+        await asyncio.sleep(settings.API_KEY_FILTER_REFRESH)
+        try:
+            # Rebuild once the filter is past its capacity, so its false positive rate stays low
+            await _load(full=_filter is None or _filter.count > _filter.capacity)
+        except Exception as e:
+            logger.error(f"API key filter refresh failed: {e}")
@@ -0,0 +1,140 @@
+# gateway_api/lifecycle.py
+
+import asyncio
+import logging
+import time
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import connection
+
+from . import events, invalidation, key_filter, quota_blocks, rabbitmq, tracing, usage
+from .redis_client import close_redis_client, get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class LifespanMiddleware:
+    """
+    Wraps the Django ASGI application with ASGI lifespan handling (Django itself
+    rejects lifespan scopes). Startup connects to Redis and RabbitMQ and loads the
+    API key filter before the server accepts traffic; shutdown waits for in-flight
+    requests, flushes buffered writes and closes connections.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await startup()
+                except Exception as e:
+                    logger.exception("Startup failed")
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+
+            elif message['type'] == 'lifespan.shutdown':
+                try:
+                    await shutdown(lambda: self.in_flight)
+                except Exception as e:
+                    logger.exception("Shutdown failed")
+                    await send({'type': 'lifespan.shutdown.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+async def _connect_redis():
+    redis_client = await get_redis_client()
+    await redis_client.ping()
+
+
+def _ensure_database_connection():
+    # Looked up here, in the worker thread: `connection` resolves per thread
+    connection.ensure_connection()
+
+
+async def _connect_database():
+    # Sync views get their own connections per thread; this only proves the
+    # database is reachable before traffic arrives
+    await database_sync_to_async(_ensure_database_connection)()
+
+
+async def startup():
+    """
+    Warm every dependency concurrently, each within LIFESPAN_STARTUP_TIMEOUT
+    seconds. A dependency that is down is logged and connected lazily later, as
+    before, so one outage does not keep the gateway from starting.
+    """
+    started = time.monotonic()
+    steps = {
+        'redis': _connect_redis(),
+        'rabbitmq': rabbitmq.get_channel(),
+        'database': _connect_database(),
+        'api_key_filter': key_filter.ensure_loaded(),
+    }
+    results = await asyncio.gather(
+        *(asyncio.wait_for(step, settings.LIFESPAN_STARTUP_TIMEOUT) for step in steps.values()),
+        return_exceptions=True,
+    )
+    for name, result in zip(steps, results):
+        if isinstance(result, BaseException):
+            logger.warning(f"Startup: {name} not ready: {result!r}")
+
+    invalidation.ensure_listener()
+    logger.info(f"Startup complete in {time.monotonic() - started:.2f}s")
+
+
+async def shutdown(in_flight=lambda: 0):
+    """
+    Drain and close everything within LIFESPAN_SHUTDOWN_TIMEOUT seconds: wait for
+    in-flight requests (and the publishes they make), flush buffered events and
+    usage, return leased quota blocks, then close RabbitMQ and Redis.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.LIFESPAN_SHUTDOWN_TIMEOUT
+
+    while in_flight() and loop.time() < deadline:
+        await asyncio.sleep(0.05)
+    if in_flight():
+        logger.warning(f"Shutdown: {in_flight()} request(s) still running at the deadline")
+
+    # Background work first, while Redis, RabbitMQ and the database are still open
+    drains = {
+        'event_writer': events.get_event_writer().close(),
+        'usage_recorder': usage.get_usage_recorder().close(),
+        'quota_blocks': quota_blocks.stop(),
+        'invalidation_listener': invalidation.stop_listener(),
+        'api_key_filter': key_filter.stop(),
+        'span_exporter': tracing.get_span_exporter().close(),
+    }
+    await _run_until(drains, deadline)
+    await _run_until({'rabbitmq': rabbitmq.close_connection(), 'redis': close_redis_client()}, deadline)
+    logger.info("Shutdown complete")
+
+
+async def _run_until(steps, deadline):
+    timeout = max(0.1, deadline - asyncio.get_running_loop().time())
+    results = await asyncio.gather(
+        *(asyncio.wait_for(step, timeout) for step in steps.values()),
+        return_exceptions=True,
+    )
+    for name, result in zip(steps, results):
+        if isinstance(result, BaseException):
+            logger.error(f"Shutdown: {name} did not finish cleanly: {result!r}")
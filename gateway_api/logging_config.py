@@ -0,0 +1,78 @@
+# gateway_api/logging_config.py
+
+import atexit
+import copy
+import logging
+import logging.config
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+import orjson
+
+from .logging_filters import CorrelationIdFilter
+
+# LogRecord attributes that are not caller-supplied `extra` fields
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def configure(config):
+    """
+    settings.LOGGING_CONFIG: apply LOGGING, then move the root logger's handlers
+    (file and console) to a background thread. Logging calls only put the record on
+    a queue, so disk and console writes never stall the event loop. The correlation
+    and trace IDs are attached before queueing, while the request's context is still
+    current.
+    """
+    logging.config.dictConfig(config)
+
+    root = logging.getLogger()
+    if not root.handlers:
+        return
+    listener = QueueListener(queue.SimpleQueue(), *root.handlers, respect_handler_level=True)
+    handler = BackgroundQueueHandler(listener.queue)
+    handler.addFilter(CorrelationIdFilter())
+    root.handlers = [handler]
+    listener.start()
+    # Writes out whatever is still queued when the process exits
+    atexit.register(listener.stop)
+
+
+class BackgroundQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the handlers behind the queue: the
+    message is rendered (args may not be safe to pass between threads) and the
+    traceback turned to text, but the record keeps its fields for JsonFormatter.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, IDs and any `extra` fields."""
+
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'correlation_id': getattr(record, 'correlation_id', None),
+            'trace_id': getattr(record, 'trace_id', None),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and key not in entry:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return orjson.dumps(entry, default=str).decode()
@@ -1,25 +1,35 @@
 
 import logging
-import threading
+from contextvars import ContextVar
 
+from . import tracing
 
-_thread_locals = threading.local()
+
+# Set per request by CorrelationIdMiddleware and the fast ingest path. A context
+# variable rather than a thread local, so it follows the request across awaits and
+# into sync_to_async / database_sync_to_async threads (asgiref copies the context).
+_correlation_id = ContextVar('correlation_id', default='unknown')
 
 class CorrelationIdFilter(logging.Filter):
     """
-    Adds the correlation ID from the request (or thread local) to log records.
+    Adds the request's correlation ID and, when traced, its trace ID to log records.
+    Values already on the record (``extra={'correlation_id': ...}``, or set before
+    the record was queued for the background writer) are kept.
     """
     def filter(self, record):
-        
-        correlation_id = getattr(_thread_locals, 'correlation_id', 'unknown')
-        record.correlation_id = correlation_id
+        if not hasattr(record, 'correlation_id'):
+            record.correlation_id = _correlation_id.get()
+        if not hasattr(record, 'trace_id'):
+            record.trace_id = tracing.current_trace_id()
         return True
 
 def set_correlation_id(correlation_id):
-    """Set the correlation ID in thread local storage."""
-    setattr(_thread_locals, 'correlation_id', correlation_id)
+    """Set the correlation ID for the current request. Returns a token for clear_correlation_id()."""
+    return _correlation_id.set(correlation_id)
 
-def clear_correlation_id():
-    """Clear the correlation ID from thread local storage."""
-    if hasattr(_thread_locals, 'correlation_id'):
-        delattr(_thread_locals, 'correlation_id')
\ No newline at end of file
+def clear_correlation_id(token=None):
+    """Restore the correlation ID in place before set_correlation_id() returned `token`."""
+    if token is not None:
+        _correlation_id.reset(token)
+    else:
+        _correlation_id.set('unknown')
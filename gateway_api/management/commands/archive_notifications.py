@@ -0,0 +1,195 @@
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from gateway_api.models import Notification
+from dateutil import parser as date_parser
+from datetime import datetime, timedelta, timezone as dt_timezone
+import gzip
+import hashlib
+import json
+import os
+import time
+
+
+ARCHIVE_FIELDS = [
+    'id', 'correlation_id', 'organization_id', 'user_id', 'notification_type',
+    'template_code', 'status', 'priority', 'request_id', 'error_message',
+    'created_at', 'updated_at', 'delivered_at',
+]
+
+
+class ArchiveJSONEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder truncates datetimes to milliseconds; archives keep full precision."""
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream notifications older than a cutoff into gzipped JSON-lines archive files with a '
+        'manifest, then delete the archived rows in bounded batches'
+    )
+
+    def add_arguments(self, parser):
+        cutoff = parser.add_mutually_exclusive_group(required=True)
+        cutoff.add_argument('--older-than-days', type=int, help='Archive notifications created more than N days ago')
+        cutoff.add_argument('--before', type=str, help='Archive notifications created before this ISO 8601 timestamp')
+        parser.add_argument('--output-dir', type=str, default=settings.NOTIFICATION_ARCHIVE_DIR, help='Directory to write the archive run into')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows fetched per server-side cursor round trip')
+        parser.add_argument('--rows-per-file', type=int, default=500000, help='Start a new archive file after this many rows')
+        parser.add_argument('--delete-batch-size', type=int, default=5000, help='Rows deleted per DELETE statement')
+        parser.add_argument('--delete-pause', type=float, default=0.0, help='Seconds to sleep between delete batches')
+        parser.add_argument('--no-delete', action='store_true', help='Write the archive but keep the rows')
+
+    def handle(self, *args, **options):
+        if options['older_than_days'] is not None:
+            cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        else:
+            try:
+                cutoff = date_parser.isoparse(options['before'])
+            except ValueError as e:
+                raise CommandError(f"Invalid --before timestamp: {e}")
+            if timezone.is_naive(cutoff):
+                cutoff = cutoff.replace(tzinfo=dt_timezone.utc)
+        if cutoff > timezone.now():
+            # Rows created while the run streams would fall under the cutoff too
+            raise CommandError(f"Cutoff {cutoff.isoformat()} is in the future")
+
+        run_dir = os.path.join(
+            options['output_dir'],
+            f"notifications-before-{cutoff.strftime('%Y%m%dT%H%M%SZ')}-{timezone.now().strftime('%Y%m%dT%H%M%S')}"
+        )
+        os.makedirs(run_dir, exist_ok=False)
+
+        manifest = self.archive(cutoff, run_dir, options)
+        self.stdout.write(
+            self.style.SUCCESS(f"Archived {manifest['total_rows']} notifications into {len(manifest['files'])} file(s) in {run_dir}")
+        )
+
+        if options['no_delete'] or not manifest['total_rows']:
+            return
+
+        deleted = self.delete_archived(manifest, options)
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} archived notifications'))
+        if deleted != manifest['total_rows']:
+            self.stdout.write(
+                self.style.WARNING(f"Deleted {deleted} rows but archived {manifest['total_rows']}; check the manifest")
+            )
+
+    def archive(self, cutoff, run_dir, options):
+        """Stream rows through a server-side cursor so memory stays flat regardless of row count."""
+        rows = (
+            Notification.objects
+            .filter(created_at__lt=cutoff)
+            .order_by('created_at', 'id')
+            .values(*ARCHIVE_FIELDS)
+            .iterator(chunk_size=options['chunk_size'])
+        )
+
+        manifest = {
+            'table': Notification._meta.db_table,
+            'cutoff': cutoff.isoformat(),
+            'started_at': timezone.now().isoformat(),
+            'fields': ARCHIVE_FIELDS,
+            'format': 'jsonl+gzip',
+            'files': [],
+            'total_rows': 0,
+            # (created_at, id) of the last row written; deletion stops there
+            'last_row': None,
+        }
+
+        current = None
+        for row in rows:
+            if current is None or current['rows'] >= options['rows_per_file']:
+                if current is not None:
+                    manifest['files'].append(self._close_file(current))
+                current = self._open_file(run_dir, len(manifest['files']) + 1)
+
+            current['handle'].write(json.dumps(row, cls=ArchiveJSONEncoder, separators=(',', ':')))
+            current['handle'].write('\n')
+            if current['rows'] == 0:
+                current['first_created_at'] = row['created_at'].isoformat()
+            current['last_created_at'] = row['created_at'].isoformat()
+            current['rows'] += 1
+            manifest['total_rows'] += 1
+
+        if current is not None:
+            manifest['files'].append(self._close_file(current))
+            manifest['last_row'] = {'created_at': row['created_at'].isoformat(), 'id': row['id']}
+
+        manifest['finished_at'] = timezone.now().isoformat()
+
+        # Write the manifest last and atomically: its presence marks the archive complete.
+        manifest_path = os.path.join(run_dir, 'manifest.json')
+        with open(f'{manifest_path}.tmp', 'w') as fh:
+            json.dump(manifest, fh, indent=2)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(f'{manifest_path}.tmp', manifest_path)
+        return manifest
+
+    def _open_file(self, run_dir, number):
+        name = f'part-{number:05d}.jsonl.gz'
+        path = os.path.join(run_dir, name)
+        return {
+            'name': name,
+            'path': path,
+            'handle': gzip.open(path, 'wt', encoding='utf-8'),
+            'rows': 0,
+            'first_created_at': None,
+            'last_created_at': None,
+        }
+
+    def _close_file(self, current):
+        current['handle'].close()
+        with open(current['path'], 'rb+') as fh:
+            os.fsync(fh.fileno())
+
+        digest = hashlib.sha256()
+        with open(current['path'], 'rb') as fh:
+            for block in iter(lambda: fh.read(1024 * 1024), b''):
+                digest.update(block)
+
+        self.stdout.write(f"Wrote {current['rows']} rows to {current['name']}")
+        return {
+            'name': current['name'],
+            'rows': current['rows'],
+            'bytes': os.path.getsize(current['path']),
+            'sha256': digest.hexdigest(),
+            'first_created_at': current['first_created_at'],
+            'last_created_at': current['last_created_at'],
+        }
+
+    def delete_archived(self, manifest, options):
+        """
+        Delete archived rows in short batches, each in its own transaction, instead of
+        one huge DELETE that holds locks and bloats the table for the whole run.
+
+        Only rows up to the last one archived, in (created_at, id) order, are deleted:
+        a row committed under the cutoff after the stream passed its position is kept
+        for the next run rather than deleted unarchived.
+        """
+        deleted = 0
+        last_created_at = date_parser.isoparse(manifest['last_row']['created_at'])
+        last_id = manifest['last_row']['id']
+        archived = Notification.objects.filter(
+            Q(created_at__lt=last_created_at) | Q(created_at=last_created_at, id__lte=last_id)
+        )
+        while True:
+            batch = list(
+                archived.order_by('created_at', 'id')
+                .values_list('id', flat=True)[:options['delete_batch_size']]
+            )
+            if not batch:
+                return deleted
+
+            count, _ = archived.filter(id__in=batch).delete()
+            deleted += count
+            if options['delete_pause']:
+                time.sleep(options['delete_pause'])
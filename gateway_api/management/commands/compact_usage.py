@@ -0,0 +1,66 @@
+
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from gateway_api import redis_client
+from gateway_api import usage
+from datetime import datetime, timedelta, timezone as dt_timezone
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Fold old per-org usage buckets into coarser ones: minutes into hours, hours into days'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, default=0, help='Run forever, sleeping this many seconds between passes')
+
+    def handle(self, *args, **options):
+        if not getattr(redis_client, 'get_redis', None):
+            raise CommandError('REDIS_URL is not configured')
+
+        while True:
+            try:
+                self.compact()
+            except Exception as e:
+                if not options['interval']:
+                    raise
+                logger.error(f"Usage compaction failed: {e}", exc_info=True)
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def compact(self):
+        redis = redis_client.get_redis()
+        compact_bucket = redis.register_script(usage.COMPACT_BUCKET)
+        now = datetime.now(dt_timezone.utc)
+
+        passes = [
+            ('minute', 'hour', now - timedelta(seconds=settings.USAGE_MINUTE_RETENTION), settings.USAGE_HOUR_TTL),
+            ('hour', 'day', now - timedelta(seconds=settings.USAGE_HOUR_RETENTION), settings.USAGE_DAY_TTL),
+        ]
+        for source, target, cutoff, target_ttl in passes:
+            folded = 0
+            for index in redis.scan_iter(match=usage.index_key('*', source), count=1000):
+                organization_id = index[len('usage:'):-len(f':index:{source}')]
+                for stamp in redis.zrangebyscore(index, '-inf', f'({cutoff.timestamp()}'):
+                    # Only whole buckets strictly before the cutoff are folded
+                    bucket = usage.parse_stamp(source, stamp)
+                    parent = usage.bucket_start(target, bucket)
+                    compact_bucket(
+                        keys=[
+                            usage.bucket_key(organization_id, source, stamp),
+                            usage.bucket_key(organization_id, target, usage.bucket_stamp(target, parent)),
+                            index,
+                            usage.index_key(organization_id, target),
+                        ],
+                        args=[stamp, usage.bucket_stamp(target, parent), parent.timestamp(), target_ttl]
+                    )
+                    folded += 1
+            self.stdout.write(self.style.SUCCESS(f'Compacted {folded} {source} bucket(s) into {target} buckets'))
+
+        # Day buckets expire on their own; drop their index entries with them
+        expired = (now - timedelta(seconds=settings.USAGE_DAY_TTL)).timestamp()
+        for index in redis.scan_iter(match=usage.index_key('*', 'day'), count=1000):
+            redis.zremrangebyscore(index, '-inf', f'({expired}')
@@ -1,6 +1,7 @@
 
 from django.core.management.base import BaseCommand
 from gateway_api.models import Organization
+from gateway_api.authentication import APIKeyAuthentication
 import secrets
 import uuid
 import requests
@@ -21,14 +22,16 @@ class Command(BaseCommand):
         api_key = f"org_{secrets.token_urlsafe(32)}"
 
         
-        org = Organization.objects.create(
+        org = Organization(
             id=org_id,
             name=options['name'],
-            api_key=api_key,
             plan=options['plan'],
             quota_limit=options['quota'],
             is_active=True,
         )
+        # Only the digest is stored: this output is the one chance to copy the key
+        org.set_api_key(api_key)
+        org.save()
 
         self.stdout.write(
             self.style.SUCCESS(
@@ -41,14 +44,26 @@ class Command(BaseCommand):
             )
         )
 
+        self.warm_api_key_cache(org)
         
         #if not options.get('skip_user_service', False):
-        #    self.sync_to_user_service(org)
+        #    self.sync_to_user_service(org, api_key)
 
         
-        self.sync_org_to_template_service_via_gateway(org)
+        self.sync_org_to_template_service_via_gateway(org, api_key)
 
-    def sync_to_user_service(self, org):
+    def warm_api_key_cache(self, org):
+        """Cache the new key in Redis so gateways accept it without a database lookup"""
+        try:
+            APIKeyAuthentication().warm_cache(org)
+        except Exception as e:
+            self.stdout.write(self.style.WARNING(f'Failed to cache the API key: {str(e)}'))
+        self.stdout.write(
+            'Running gateways accept the new key once they receive the invalidation event '
+            f'(at most {settings.API_KEY_FILTER_REFRESH} seconds)'
+        )
+
+    def sync_to_user_service(self, org, api_key):
         """Sync organization data to user service"""
         try:
             org_data = {
@@ -56,7 +71,7 @@ class Command(BaseCommand):
                 'name': org.name,
                 'plan': org.plan,
                 'quota_limit': org.quota_limit,
-                'api_key': org.api_key,
+                'api_key': api_key,
                 'is_active': org.is_active,
                 'created_at': org.created_at.isoformat()
             }
@@ -68,7 +83,7 @@ class Command(BaseCommand):
                 headers={
                     'X-Internal-Secret': settings.INTERNAL_API_SECRET,
                     'Content-Type': 'application/json',
-                    'X-API-Key': org.api_key,
+                    'X-API-Key': api_key,
                 },
                 timeout=5
             )
@@ -120,7 +135,7 @@ class Command(BaseCommand):
             )
 
     
-    def sync_org_to_template_service_via_gateway(self, org):
+    def sync_org_to_template_service_via_gateway(self, org, api_key):
         """Sync organization data to template service via the gateway's internal endpoint."""
         try:
             org_data = {
@@ -128,7 +143,7 @@ class Command(BaseCommand):
                 'name': org.name,
                 'plan': org.plan,
                 'quota_limit': org.quota_limit,
-                'api_key': org.api_key,
+                'api_key': api_key,
                 'is_active': org.is_active,
                 'created_at': org.created_at.isoformat()
             }
@@ -0,0 +1,62 @@
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.conf import settings
+import time
+
+from gateway_api import partitions
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming notifications partitions and detach or drop expired ones (PostgreSQL only)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=settings.NOTIFICATION_PARTITIONS_AHEAD, help='Number of future partitions to keep ready')
+        parser.add_argument('--retention-days', type=int, default=settings.NOTIFICATION_RETENTION_DAYS, help='Partitions entirely older than this are expired (0 keeps everything)')
+        parser.add_argument('--drop', action='store_true', help='Drop expired partitions instead of detaching them')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be done')
+        parser.add_argument('--interval', type=int, default=0, help='Run forever, sleeping this many seconds between passes')
+
+    def handle(self, *args, **options):
+        if not partitions.is_partitioned(connection):
+            raise CommandError(
+                'The notifications table is not partitioned. Partitioning requires PostgreSQL '
+                'and migration 0004_partition_notifications.'
+            )
+
+        while True:
+            self.run_once(options)
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def run_once(self, options):
+        if options['dry_run']:
+            for partition in partitions.list_partitions(connection):
+                self.stdout.write(f"{partition['name']}: {partition['start']} -> {partition['end']}")
+        else:
+            with transaction.atomic():
+                created = partitions.ensure_future_partitions(connection, options['ahead'])
+            for name in created:
+                self.stdout.write(self.style.SUCCESS(f'Created partition {name}'))
+
+        if options['retention_days'] > 0:
+            for partition in partitions.expired_partitions(connection, options['retention_days']):
+                name = partition['name']
+                if options['dry_run']:
+                    self.stdout.write(f"Would {'drop' if options['drop'] else 'detach'} {name}")
+                    continue
+                with transaction.atomic():
+                    partitions.detach_partition(connection, name)
+                    if options['drop']:
+                        partitions.drop_partition(connection, name)
+                self.stdout.write(self.style.SUCCESS(f"{'Dropped' if options['drop'] else 'Detached'} partition {name}"))
+
+        stray = partitions.default_partition_rows(connection)
+        if stray:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'{stray} rows are in {partitions.DEFAULT_PARTITION}; create partitions further ahead '
+                    f'and move those rows before their range can be partitioned'
+                )
+            )
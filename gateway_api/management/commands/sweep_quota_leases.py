@@ -0,0 +1,64 @@
+
+from django.core.management.base import BaseCommand, CommandError
+from gateway_api import redis_client
+from gateway_api import quota as quota_periods
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# Pops up to ARGV[2] leases whose deadline is at or before ARGV[1]. Done in Lua so
+# the range read and the removal are atomic: a lease settled in between can never
+# shift a live lease into the removed range.
+RELEASE_EXPIRED = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+if #ids > 0 then
+    redis.call('ZREM', KEYS[1], unpack(ids))
+end
+return #ids
+"""
+
+
+class Command(BaseCommand):
+    help = 'Release pending-quota leases whose worker never reported back before the lease deadline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Leases released per Redis call')
+        parser.add_argument('--interval', type=int, default=0, help='Run forever, sleeping this many seconds between sweeps')
+
+    def handle(self, *args, **options):
+        if not getattr(redis_client, 'get_redis', None):
+            raise CommandError('REDIS_URL is not configured')
+
+        while True:
+            try:
+                self.sweep(options['batch_size'])
+            except Exception as e:
+                if not options['interval']:
+                    raise
+                logger.error(f"Lease sweep failed: {e}", exc_info=True)
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def sweep(self, batch_size):
+        redis = redis_client.get_redis()
+        release = redis.register_script(RELEASE_EXPIRED)
+        now = time.time()
+
+        released = 0
+        for key in redis.scan_iter(match=quota_periods.lease_key('*'), count=1000):
+            # Bounded batches keep each call short even for orgs with millions of leases
+            expired = 0
+            while True:
+                count = release(keys=[key], args=[now, batch_size])
+                expired += count
+                if count < batch_size:
+                    break
+            if expired:
+                logger.warning(f"Released {expired} expired pending-quota lease(s) in {key}")
+            released += expired
+
+        self.stdout.write(self.style.SUCCESS(f'Released {released} expired lease(s)'))
+        return released
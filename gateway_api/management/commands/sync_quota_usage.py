@@ -0,0 +1,151 @@
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from gateway_api.models import Organization
+from gateway_api import redis_client
+from gateway_api import quota as quota_periods
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# Set once Redis holds counters the database already knows about. Redis losing its
+# data (restart without persistence, failover to an empty replica) also loses this
+# key, which is how the reconciler tells a Redis loss apart from an ordinary cycle.
+# It is only a hint: under an allkeys-* eviction policy it can go while the counters
+# stay, so the restore below has to be safe on live counters too.
+SYNC_MARKER_KEY = 'quota:sync:marker'
+
+
+# Adds the last synced usage to a counter that is below it. Within a period a
+# counter only grows, so a live counter is never below its last synced value: one
+# that is has lost its data and holds only the deliveries counted since. Counters
+# at or above the synced value are left alone.
+#
+# KEYS: quota counter
+# ARGV: synced usage, counter expiry (unix time)
+RESTORE_COUNTER = """
+local synced = tonumber(ARGV[1])
+if tonumber(redis.call('GET', KEYS[1]) or '0') >= synced then
+    return 0
+end
+redis.call('INCRBY', KEYS[1], synced)
+redis.call('EXPIREAT', KEYS[1], ARGV[2])
+return 1
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the current-period Redis quota counters of active organizations into '
+        'Organization.quota_used / quota_reset_at, and restore them from the database after a Redis loss'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Organizations read per Redis pipeline')
+        parser.add_argument('--interval', type=int, default=0, help='Run forever, sleeping this many seconds between cycles')
+
+    def handle(self, *args, **options):
+        if not getattr(redis_client, 'get_redis', None):
+            raise CommandError('REDIS_URL is not configured')
+
+        while True:
+            try:
+                self.run_once(options)
+            except Exception as e:
+                if not options['interval']:
+                    raise
+                logger.error(f"Quota sync cycle failed: {e}", exc_info=True)
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def run_once(self, options):
+        redis = redis_client.get_redis()
+
+        if not redis.exists(SYNC_MARKER_KEY):
+            restored = self.restore_counters(redis, options['batch_size'])
+            redis.set(SYNC_MARKER_KEY, timezone.now().isoformat())
+            if restored:
+                self.stdout.write(self.style.WARNING(f'Redis quota counters were missing; restored {restored} from the database'))
+
+        changed = self.collect_usage(redis, options['batch_size'])
+        if changed:
+            Organization.objects.bulk_update(changed, ['quota_used', 'quota_reset_at'])
+        self.stdout.write(self.style.SUCCESS(f'Synced quota usage for {len(changed)} organization(s)'))
+
+    def collect_usage(self, redis, batch_size):
+        """Read the current period's counter for every active org, one pipeline round trip per batch."""
+        now = timezone.now()
+        changed = []
+        organizations = (
+            Organization.objects
+            .filter(is_active=True)
+            .only('id', 'plan', 'quota_used', 'quota_reset_at')
+            .order_by('id')
+            .iterator(chunk_size=batch_size)
+        )
+
+        batch = []
+        for org in organizations:
+            batch.append(org)
+            if len(batch) >= batch_size:
+                changed.extend(self._read_batch(redis, batch, now))
+                batch = []
+        if batch:
+            changed.extend(self._read_batch(redis, batch, now))
+        return changed
+
+    def _read_batch(self, redis, batch, now):
+        periods = [quota_periods.period_for_plan(org.plan) for org in batch]
+        pipe = redis.pipeline(transaction=False)
+        for org, period in zip(batch, periods):
+            pipe.get(quota_periods.quota_key(org.id, period, now))
+        results = pipe.execute()
+
+        changed = []
+        for org, period, value in zip(batch, periods, results):
+            used = int(value or 0)
+            reset_at = quota_periods.period_bounds(period, now)[1]
+            if used != org.quota_used or reset_at != org.quota_reset_at:
+                org.quota_used = used
+                org.quota_reset_at = reset_at
+                changed.append(org)
+        return changed
+
+    def restore_counters(self, redis, batch_size):
+        """
+        Put the last synced usage back into Redis for organizations whose synced period
+        is still the current one.
+
+        Added to the counter rather than SET, so deliveries counted since Redis came
+        back are kept; counters that still hold at least the synced usage were not lost
+        and are skipped (see RESTORE_COUNTER). Usage recorded after the last sync cycle
+        before the loss cannot be recovered.
+        """
+        now = timezone.now()
+        organizations = (
+            Organization.objects
+            .filter(is_active=True, quota_used__gt=0, quota_reset_at__gt=now)
+            .only('id', 'plan', 'quota_used', 'quota_reset_at')
+            .iterator(chunk_size=batch_size)
+        )
+
+        restore_counter = redis.register_script(RESTORE_COUNTER)
+        restored = queued = 0
+        pipe = redis.pipeline(transaction=False)
+        for org in organizations:
+            period = quota_periods.period_for_plan(org.plan)
+            if quota_periods.period_bounds(period, now)[1] != org.quota_reset_at:
+                continue
+            restore_counter(
+                keys=[quota_periods.quota_key(org.id, period, now)],
+                args=[org.quota_used, int(quota_periods.key_expires_at(period, now).timestamp())],
+                client=pipe
+            )
+            queued += 1
+            if queued % batch_size == 0:
+                restored += sum(pipe.execute())
+        restored += sum(pipe.execute())
+        return restored
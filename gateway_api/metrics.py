@@ -0,0 +1,57 @@
+# gateway_api/metrics.py
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Every gateway metric is defined here, once. Under gunicorn (gunicorn.conf.py)
+# PROMETHEUS_MULTIPROC_DIR is set before any worker imports prometheus_client, so
+# each worker writes its values to files in that directory and /metrics
+# (django_prometheus' ExportToDjangoView) sums them. Gauges therefore need a
+# multiprocess_mode; scrape-time collectors would only ever see the worker that
+# happens to serve the scrape.
+
+
+NOTIFICATIONS_ACCEPTED = Counter(
+    'gateway_notifications_accepted_total',
+    'Total notifications accepted',
+    ['notification_type', 'org_id_prefix']
+)
+NOTIFICATIONS_REJECTED = Counter(
+    'gateway_notifications_rejected_total',
+    'Total notifications rejected',
+    ['reason', 'org_id_prefix']
+)
+REQUEST_LATENCY = Histogram(
+    'gateway_request_duration_seconds',
+    'Request latency in seconds',
+    ['endpoint']
+)
+
+# Waiting for a free connection plus (re)connecting it; a rising tail with all
+# connections in use means the pool is saturated
+REDIS_POOL_ACQUIRE = Histogram(
+    'gateway_redis_pool_acquire_seconds',
+    'Time taken to get a connection from the shared async Redis pool',
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5),
+)
+REDIS_POOL_CONNECTIONS = Gauge(
+    'gateway_redis_pool_connections',
+    'Connections of the shared async Redis pool',
+    ['state'],
+    multiprocess_mode='livesum',
+)
+REDIS_POOL_MAX_CONNECTIONS = Gauge(
+    'gateway_redis_pool_max_connections',
+    'Connection limit of the shared async Redis pool',
+    multiprocess_mode='livesum',
+)
+
+
+# Time spent in each step of accepting a notification (gateway_api/timing.py):
+# auth, idempotency_check, user_fetch, template_fetch, quota, db_insert, publish,
+# idempotency_store. user_fetch and template_fetch overlap.
+INGEST_STAGE_SECONDS = Histogram(
+    'gateway_ingest_stage_seconds',
+    'Time spent in each stage of the notification ingest pipeline',
+    ['stage'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
@@ -1,27 +1,116 @@
+import types
 import uuid
 import logging
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.middleware.security import SecurityMiddleware as DjangoSecurityMiddleware
+from django_prometheus import middleware as prometheus_middleware
+
+from . import tracing
+from .logging_filters import clear_correlation_id, set_correlation_id
+
 logger = logging.getLogger(__name__)
 
 class CorrelationIdMiddleware:
-    """Add correlation ID to every request for distributed tracing"""
+    """
+    Add correlation ID to every request for distributed tracing.
+    Works in both modes, so async views are not bounced through a thread for it.
+    """
+    sync_capable = True
+    async_capable = True
     
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
     
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        correlation_id, token = self.process_request(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            clear_correlation_id(token)
+        response['X-Correlation-ID'] = correlation_id
+        return response
+
+    async def __acall__(self, request):
+        correlation_id, token = self.process_request(request)
+        try:
+            # Root span of the request's trace (async mode only, i.e. under ASGI)
+            with tracing.start_request(
+                f'{request.method} {request.path}',
+                traceparent=request.headers.get('traceparent'),
+                correlation_id=correlation_id,
+            ) as root:
+                response = await self.get_response(request)
+                if root is not None:
+                    root.set('http.status_code', response.status_code)
+        finally:
+            clear_correlation_id(token)
+        response['X-Correlation-ID'] = correlation_id
+        return response
+
+    def process_request(self, request):
         # Get or generate correlation ID
         correlation_id = request.headers.get(
             'X-Correlation-ID', 
             str(uuid.uuid4())
         )
         request.correlation_id = correlation_id
+        # Picked up by CorrelationIdFilter for every log line of this request
+        token = set_correlation_id(correlation_id)
         
         # Log the request with correlation ID
         logger.info(
             f"Request received: {request.method} {request.path} [correlation_id={correlation_id}]"
         )
-        
-        response = self.get_response(request)
-        response['X-Correlation-ID'] = correlation_id
-        return response
\ No newline at end of file
+        return correlation_id, token
+
+
+class InlineHooksMixin:
+    """
+    For MiddlewareMixin middleware whose hooks do no I/O. In async mode Django 4.2
+    runs every hook of such middleware through sync_to_async, a thread hop per hook
+    per request; this runs them inline on the event loop instead. Sync mode is
+    unchanged. (process_exception is always called synchronously by Django.)
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(self):
+            # Django adapts these to the handler's mode when loading middleware,
+            # so the async versions must be in place before that
+            for name in ('process_view', 'process_template_response'):
+                hook = getattr(self, name, None)
+                if hook is not None:
+                    # Bound, since Django names the middleware from hook.__self__
+                    setattr(self, name, types.MethodType(self._inline(hook), self))
+
+    @staticmethod
+    def _inline(hook):
+        async def inline_hook(self, *args, **kwargs):
+            return hook(*args, **kwargs)
+        return inline_hook
+
+    async def __acall__(self, request):
+        response = None
+        if hasattr(self, 'process_request'):
+            response = self.process_request(request)
+        response = response or await self.get_response(request)
+        if hasattr(self, 'process_response'):
+            response = self.process_response(request, response)
+        return response
+
+
+class PrometheusBeforeMiddleware(InlineHooksMixin, prometheus_middleware.PrometheusBeforeMiddleware):
+    pass
+
+
+class PrometheusAfterMiddleware(InlineHooksMixin, prometheus_middleware.PrometheusAfterMiddleware):
+    pass
+
+
+class SecurityMiddleware(InlineHooksMixin, DjangoSecurityMiddleware):
+    pass
@@ -0,0 +1,25 @@
+# Converts the notifications table to Postgres declarative range partitioning on created_at.
+
+from django.db import migrations
+
+
+def partition_notifications(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    from gateway_api.partitions import convert_to_partitioned, is_partitioned
+
+    if not is_partitioned(connection):
+        convert_to_partitioned(connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gateway_api', '0003_organization_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_notifications, migrations.RunPython.noop),
+    ]
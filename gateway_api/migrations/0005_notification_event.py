@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:41
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gateway_api', '0004_partition_notifications'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('notification_id', models.CharField(max_length=22)),
+                ('organization_id', models.CharField(max_length=36)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('processing', 'Processing'), ('delivered', 'Delivered'), ('failed', 'Failed'), ('bounced', 'Bounced'), ('rejected', 'Rejected')], max_length=20)),
+                ('previous_status', models.CharField(blank=True, choices=[('queued', 'Queued'), ('processing', 'Processing'), ('delivered', 'Delivered'), ('failed', 'Failed'), ('bounced', 'Bounced'), ('rejected', 'Rejected')], max_length=20, null=True)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('worker', models.CharField(blank=True, default='', max_length=64)),
+                ('attempt', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('occurred_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'notification_events',
+                'indexes': [models.Index(fields=['notification_id', 'occurred_at'], name='notificatio_notific_b677e4_idx')],
+            },
+        ),
+    ]
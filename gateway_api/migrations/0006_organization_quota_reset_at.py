@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gateway_api', '0005_notification_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organization',
+            name='quota_reset_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
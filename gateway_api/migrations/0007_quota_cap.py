@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gateway_api', '0006_organization_quota_reset_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuotaCap',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('user', 'Per recipient'), ('template', 'Per template')], max_length=20)),
+                ('template_code', models.CharField(blank=True, default='', max_length=255)),
+                ('notification_type', models.CharField(blank=True, choices=[('email', 'Email'), ('push', 'Push')], default='', max_length=20)),
+                ('limit', models.PositiveIntegerField()),
+                ('period', models.CharField(choices=[('day', 'Day'), ('month', 'Month')], default='day', max_length=10)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quota_caps', to='gateway_api.organization')),
+            ],
+            options={
+                'db_table': 'quota_caps',
+                'indexes': [models.Index(fields=['organization', 'is_active'], name='quota_caps_organiz_95ac75_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:20
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def hash_existing_keys(apps, schema_editor):
+    Organization = apps.get_model('gateway_api', 'Organization')
+    batch = []
+    for org in Organization.objects.only('id', 'api_key').iterator(chunk_size=1000):
+        org.api_key_hash = hashlib.sha256(org.api_key.encode()).hexdigest()
+        org.api_key_prefix = org.api_key[:12]
+        batch.append(org)
+        if len(batch) >= 1000:
+            Organization.objects.bulk_update(batch, ['api_key_hash', 'api_key_prefix'])
+            batch = []
+    if batch:
+        Organization.objects.bulk_update(batch, ['api_key_hash', 'api_key_prefix'])
+
+
+class Migration(migrations.Migration):
+    """
+    Step 1 of 2: add the digest columns and fill them from the plaintext keys.
+    The plaintext column stays until 0009, so this step can be applied (and
+    rolled back) on its own.
+    """
+
+    dependencies = [
+        ('gateway_api', '0007_quota_cap'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organization',
+            name='api_key_hash',
+            field=models.CharField(max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='api_key_prefix',
+            field=models.CharField(blank=True, default='', max_length=12),
+        ),
+        migrations.RunPython(hash_existing_keys, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='organization',
+            name='api_key_hash',
+            field=models.CharField(max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name='organization',
+            constraint=models.UniqueConstraint(fields=('api_key_hash',), name='organizations_api_key_hash_uniq'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:20
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """Step 2 of 2: drop the plaintext keys and both of their indexes. Irreversible by design."""
+
+    dependencies = [
+        ('gateway_api', '0008_organization_api_key_hash'),
+    ]
+
+    operations = [
+        # No reverse_code: refuse to unapply instead of failing halfway on a NOT NULL api_key
+        migrations.RunPython(migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='organization',
+            name='organizatio_api_key_7e525b_idx',
+        ),
+        migrations.RemoveField(
+            model_name='organization',
+            name='api_key',
+        ),
+    ]
@@ -1,7 +1,17 @@
 from django.db import models
+import hashlib
 import uuid
 from django.utils import timezone
 
+
+API_KEY_PREFIX_LENGTH = 12
+
+
+def hash_api_key(api_key):
+    """SHA256 hex digest of an API key: the only form in which keys are stored, indexed and cached"""
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
 class Organization(models.Model):
     PLAN_CHOICES = [
         ('pro', 'Pro'),
@@ -13,19 +23,28 @@ class Organization(models.Model):
     
     id = models.CharField(max_length=36, primary_key=True)
     name = models.CharField(max_length=255)
-    api_key = models.CharField(max_length=255, unique=True, db_index=True)
+    api_key_hash = models.CharField(max_length=64)
+    api_key_prefix = models.CharField(max_length=API_KEY_PREFIX_LENGTH, blank=True, default='')
     plan = models.CharField(max_length=50, choices=PLAN_CHOICES)
     quota_limit = models.IntegerField(default=10000)
     quota_used = models.IntegerField(default=0)
+    quota_reset_at = models.DateTimeField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'organizations'
-        indexes = [
-            models.Index(fields=['api_key', 'is_active']),
+        # A constraint rather than unique=True: on PostgreSQL that would add a
+        # second, varchar_pattern_ops index nothing here uses
+        constraints = [
+            models.UniqueConstraint(fields=['api_key_hash'], name='organizations_api_key_hash_uniq'),
         ]
+
+    def set_api_key(self, api_key):
+        """Keep only the key's digest, plus its first characters so it can be recognised"""
+        self.api_key_hash = hash_api_key(api_key)
+        self.api_key_prefix = api_key[:API_KEY_PREFIX_LENGTH]
         
         
 
@@ -68,6 +87,58 @@ class Notification(models.Model):
         ]
         
 
+
+class NotificationEvent(models.Model):
+    """Append-only history of a notification's status transitions, written in batches by events.EventWriter"""
+    notification_id = models.CharField(max_length=22)
+    organization_id = models.CharField(max_length=36)
+    status = models.CharField(max_length=20, choices=Notification.STATUS_CHOICES)
+    previous_status = models.CharField(max_length=20, choices=Notification.STATUS_CHOICES, null=True, blank=True)
+    error_message = models.TextField(null=True, blank=True)
+    worker = models.CharField(max_length=64, blank=True, default='')
+    attempt = models.PositiveSmallIntegerField(null=True, blank=True)
+    occurred_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'notification_events'
+        indexes = [
+            models.Index(fields=['notification_id', 'occurred_at']),
+        ]
+
+
+class QuotaCap(models.Model):
+    """
+    Optional cap on top of an organization's quota, counted per recipient or per
+    template, e.g. at most 5 pushes of the 'marketing' template per user per day.
+    Blank template_code / notification_type match every template / type.
+    """
+    SCOPE_CHOICES = [
+        ('user', 'Per recipient'),
+        ('template', 'Per template'),
+    ]
+
+    PERIOD_CHOICES = [
+        ('day', 'Day'),
+        ('month', 'Month'),
+    ]
+
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='quota_caps')
+    scope = models.CharField(max_length=20, choices=SCOPE_CHOICES)
+    template_code = models.CharField(max_length=255, blank=True, default='')
+    notification_type = models.CharField(max_length=20, choices=Notification.TYPE_CHOICES, blank=True, default='')
+    limit = models.PositiveIntegerField()
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES, default='day')
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'quota_caps'
+        indexes = [
+            models.Index(fields=['organization', 'is_active']),
+        ]
+        
+
 class User(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     email = models.EmailField(unique=True) # Email should be unique across the system
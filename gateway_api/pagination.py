@@ -0,0 +1,55 @@
+# gateway_api/pagination.py
+
+import base64
+import json
+from datetime import datetime
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(created_at, notification_id):
+    """Encode the (created_at, id) position of the last row on a page as an opaque token."""
+    payload = json.dumps([created_at.isoformat(), notification_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a token produced by encode_cursor back into (created_at, id)."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, notification_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), str(notification_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f'Invalid cursor: {e}') from e
+
+
+def keyset_page(queryset, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Return one page of notifications, newest first, plus the cursor of the next page.
+
+    Seeks past the previous page's last (created_at, id) instead of using OFFSET,
+    so every page is the same short range scan on the (organization_id, -created_at)
+    index no matter how deep the client pages.
+    """
+    queryset = queryset.order_by('-created_at', '-id')
+
+    if cursor:
+        created_at, notification_id = decode_cursor(cursor)
+        # Written as a range on created_at plus a tie-break exclusion (rather than an OR)
+        # so the planner can use created_at as an index condition.
+        queryset = queryset.filter(created_at__lte=created_at).exclude(
+            created_at=created_at, id__gte=notification_id
+        )
+
+    rows = list(queryset[:limit + 1])
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id) if has_next else None
+    return rows, next_cursor
@@ -0,0 +1,324 @@
+# gateway_api/partitions.py
+
+import base64
+import logging
+import re
+import secrets
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from dateutil import parser
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+TABLE = 'notifications'
+LEGACY_PARTITION = 'notifications_legacy'
+DEFAULT_PARTITION = 'notifications_default'
+
+# Notification ids are minted a moment before the row is inserted, so created_at
+# always lands within this window of the time encoded in the id.
+ID_TIME_SLACK = timedelta(minutes=5)
+ID_TIME_FLOOR = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+_BOUND_RE = re.compile(r"FROM \((?P<start>[^)]*)\) TO \((?P<end>[^)]*)\)")
+
+
+# ---------------------------------------------------------------------------
+# Time-prefixed notification ids
+# ---------------------------------------------------------------------------
+
+def new_notification_id(now=None):
+    """
+    Mint a 22 character notification id: 8 chars of millisecond timestamp followed
+    by 14 random chars. The timestamp lets lookups by id be pruned to one partition.
+    """
+    now = now or datetime.now(dt_timezone.utc)
+    millis = int(now.timestamp() * 1000)
+    prefix = base64.urlsafe_b64encode(millis.to_bytes(6, 'big')).decode()
+    return prefix + secrets.token_urlsafe(10)
+
+
+def created_at_bounds(notification_id):
+    """
+    Return a (start, end) created_at range for a notification id, or None for ids
+    that do not carry a plausible timestamp (e.g. ids minted before time-prefixing).
+    """
+    if not notification_id or len(notification_id) != 22:
+        return None
+    try:
+        millis = int.from_bytes(base64.urlsafe_b64decode(notification_id[:8]), 'big')
+        minted_at = datetime.fromtimestamp(millis / 1000, tz=dt_timezone.utc)
+    except (ValueError, OverflowError, OSError):
+        return None
+    if minted_at < ID_TIME_FLOOR or minted_at > datetime.now(dt_timezone.utc) + ID_TIME_SLACK:
+        return None
+    return minted_at - ID_TIME_SLACK, minted_at + ID_TIME_SLACK
+
+
+def get_notification(notification_id, **filters):
+    """
+    Fetch a notification by id, restricted to the created_at window encoded in the id
+    so Postgres only probes the partition(s) covering that window. Falls back to an
+    unrestricted lookup for legacy ids.
+    """
+    from .models import Notification
+
+    bounds = created_at_bounds(notification_id)
+    if bounds is not None:
+        try:
+            return Notification.objects.get(
+                id=notification_id,
+                created_at__gte=bounds[0],
+                created_at__lt=bounds[1],
+                **filters
+            )
+        except Notification.DoesNotExist:
+            pass
+    return Notification.objects.get(id=notification_id, **filters)
+
+
+# ---------------------------------------------------------------------------
+# Partition layout
+# ---------------------------------------------------------------------------
+
+def _interval():
+    interval = getattr(settings, 'NOTIFICATION_PARTITION_INTERVAL', 'month')
+    if interval not in ('day', 'month'):
+        raise ValueError(f"NOTIFICATION_PARTITION_INTERVAL must be 'day' or 'month', got {interval!r}")
+    return interval
+
+
+def period_start(moment, interval=None):
+    """Start (UTC) of the partition period containing ``moment``."""
+    interval = interval or _interval()
+    moment = moment.astimezone(dt_timezone.utc)
+    if interval == 'day':
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_period(start, interval=None):
+    interval = interval or _interval()
+    if interval == 'day':
+        return start + timedelta(days=1)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+def partition_name(start, interval=None):
+    interval = interval or _interval()
+    fmt = '%Y%m%d' if interval == 'day' else '%Y%m'
+    return f"{TABLE}_p{start.strftime(fmt)}"
+
+
+def is_partitioned(connection):
+    """True when the notifications table is a Postgres partitioned table."""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [TABLE])
+        return cursor.fetchone() is not None
+
+
+def list_partitions(connection):
+    """
+    Return the attached partitions as dicts with name, start and end (None for
+    MINVALUE/MAXVALUE) and is_default, ordered by start.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass
+            """,
+            [TABLE]
+        )
+        rows = cursor.fetchall()
+
+    partitions = []
+    for name, bound in rows:
+        if bound == 'DEFAULT':
+            partitions.append({'name': name, 'start': None, 'end': None, 'is_default': True})
+            continue
+        match = _BOUND_RE.search(bound)
+        if not match:
+            logger.warning(f"Unrecognised partition bound for {name}: {bound}")
+            continue
+        partitions.append({
+            'name': name,
+            'start': _parse_bound(match.group('start')),
+            'end': _parse_bound(match.group('end')),
+            'is_default': False,
+        })
+
+    epoch = datetime.min.replace(tzinfo=dt_timezone.utc)
+    partitions.sort(key=lambda p: (p['is_default'], p['start'] or epoch))
+    return partitions
+
+
+def _parse_bound(value):
+    value = value.strip().strip("'")
+    if value in ('MINVALUE', 'MAXVALUE'):
+        return None
+    return parser.parse(value).astimezone(dt_timezone.utc)
+
+
+def create_partition(connection, start, interval=None):
+    """Create the partition covering [start, next period). Returns its name, or None if it exists."""
+    interval = interval or _interval()
+    name = partition_name(start, interval)
+    end = next_period(start, interval)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", [name])
+        if cursor.fetchone()[0] is not None:
+            return None
+        cursor.execute(
+            f'CREATE TABLE "{name}" PARTITION OF "{TABLE}" FOR VALUES FROM (%s) TO (%s)',
+            [start, end]
+        )
+    logger.info(f"Created partition {name} [{start.isoformat()}, {end.isoformat()})")
+    return name
+
+
+def ensure_future_partitions(connection, ahead, now=None, interval=None):
+    """Make sure partitions exist for the current period and ``ahead`` periods after it."""
+    interval = interval or _interval()
+    now = now or datetime.now(dt_timezone.utc)
+    start = period_start(now, interval)
+
+    covered_until = None
+    for partition in list_partitions(connection):
+        if partition['end'] is not None and not partition['is_default']:
+            covered_until = max(covered_until or partition['end'], partition['end'])
+
+    created = []
+    for _ in range(ahead + 1):
+        if covered_until is None or start >= covered_until:
+            name = create_partition(connection, start, interval)
+            if name:
+                created.append(name)
+        start = next_period(start, interval)
+    return created
+
+
+def expired_partitions(connection, retention_days, now=None):
+    """Partitions whose whole range is older than the retention window."""
+    now = now or datetime.now(dt_timezone.utc)
+    cutoff = now - timedelta(days=retention_days)
+    return [
+        p for p in list_partitions(connection)
+        if not p['is_default'] and p['end'] is not None and p['end'] <= cutoff
+    ]
+
+
+def detach_partition(connection, name):
+    """Detach a partition, leaving it as a standalone table for archival."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"')
+    logger.info(f"Detached partition {name}")
+
+
+def drop_partition(connection, name):
+    """Drop a partition and its rows. O(1) compared to DELETE."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE "{name}"')
+    logger.info(f"Dropped partition {name}")
+
+
+def default_partition_rows(connection):
+    """Number of rows that fell through to the default partition (0 if there is none)."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", [DEFAULT_PARTITION])
+        if cursor.fetchone()[0] is None:
+            return 0
+        cursor.execute(f'SELECT count(*) FROM "{DEFAULT_PARTITION}"')
+        return cursor.fetchone()[0]
+
+
+# ---------------------------------------------------------------------------
+# One-off conversion (used by migration 0004)
+# ---------------------------------------------------------------------------
+
+def convert_to_partitioned(connection, ahead=2, now=None):
+    """
+    Turn the plain notifications table into a table range-partitioned on created_at.
+
+    The existing table is kept as-is and attached as the first partition (covering
+    everything up to the end of the current period), so no rows are copied. Postgres
+    requires unique constraints to include the partition key, so the primary key
+    becomes (id, created_at) and request_id uniqueness becomes (request_id, created_at);
+    duplicate request_ids are still rejected by the Redis idempotency check.
+    """
+    interval = _interval()
+    now = now or datetime.now(dt_timezone.utc)
+    boundary = next_period(period_start(now, interval), interval)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT i.relname, pg_get_indexdef(i.oid), ix.indisunique
+            FROM pg_index ix
+            JOIN pg_class i ON i.oid = ix.indexrelid
+            WHERE ix.indrelid = %s::regclass
+            """,
+            [TABLE]
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            """
+            SELECT conname FROM pg_constraint
+            WHERE conrelid = %s::regclass AND contype IN ('p', 'u')
+            """,
+            [TABLE]
+        )
+        constraints = {row[0] for row in cursor.fetchall()}
+
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{LEGACY_PARTITION}"')
+
+        # Free up index names so the partitioned parent can reuse Django's names. The old
+        # single-column primary key has to go: a partition can only carry the parent's
+        # (id, created_at) primary key.
+        secondary = []
+        for name, definition, unique in indexes:
+            legacy_name = f"{name[:56]}_legacy"
+            if name == f'{TABLE}_pkey':
+                cursor.execute(f'ALTER TABLE "{LEGACY_PARTITION}" DROP CONSTRAINT "{name}"')
+            elif name in constraints:
+                cursor.execute(f'ALTER TABLE "{LEGACY_PARTITION}" RENAME CONSTRAINT "{name}" TO "{legacy_name}"')
+            else:
+                cursor.execute(f'ALTER INDEX "{name}" RENAME TO "{legacy_name}"')
+            if not unique:
+                secondary.append((name, definition))
+
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" (LIKE "{LEGACY_PARTITION}" INCLUDING DEFAULTS) '
+            f'PARTITION BY RANGE (created_at)'
+        )
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY (id, created_at)')
+        cursor.execute(
+            f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_request_id_created_at_uniq" '
+            f'UNIQUE (request_id, created_at)'
+        )
+
+        # Recreate the secondary indexes on the parent with their original definitions
+        # (captured before the rename, so they already name the new parent table). The
+        # renamed copies on the legacy table are equivalent, so ATTACH adopts them
+        # instead of rebuilding.
+        for name, definition in secondary:
+            cursor.execute(definition)
+
+        cursor.execute(
+            f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{LEGACY_PARTITION}" '
+            f'FOR VALUES FROM (MINVALUE) TO (%s)',
+            [boundary]
+        )
+        cursor.execute(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{TABLE}" DEFAULT')
+
+    start = boundary
+    for _ in range(ahead):
+        create_partition(connection, start, interval)
+        start = next_period(start, interval)
@@ -0,0 +1,313 @@
+# gateway_api/quota.py
+
+import logging
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+
+PERIODS = ('day', 'month')
+
+# Period keys outlive their period by this much so the reconciler can still read the
+# final count after a reset; Redis then drops them on its own.
+KEY_GRACE = timedelta(days=2)
+
+
+# ---------------------------------------------------------------------------
+# Lua scripts
+# ---------------------------------------------------------------------------
+
+# Script source -> redis-py Script, registered on first use. Registering encodes and
+# hashes the whole script, which is not worth repeating for every notification.
+_scripts = {}
+
+
+async def run_script(redis_client, source, keys, args):
+    """EVALSHA ``source`` on ``redis_client`` (loading it on the server the first time)."""
+    script = _scripts.get(source)
+    if script is None:
+        script = _scripts[source] = redis_client.register_script(source)
+    return await script(keys=keys, args=args, client=redis_client)
+
+
+# ---------------------------------------------------------------------------
+# Quota periods
+# ---------------------------------------------------------------------------
+
+def check_period_settings():
+    """Fail at startup, rather than on the first request, when a configured quota period is not valid."""
+    configured = {'QUOTA_DEFAULT_PERIOD': settings.QUOTA_DEFAULT_PERIOD}
+    configured.update({f'QUOTA_PERIODS[{plan}]': period for plan, period in settings.QUOTA_PERIODS.items()})
+    invalid = [f"{name}={period!r}" for name, period in configured.items() if period not in PERIODS]
+    if invalid:
+        raise ImproperlyConfigured(f"Quota periods must be one of {PERIODS}, got {', '.join(invalid)}")
+
+
+def period_for_plan(plan):
+    """Quota period ('day' or 'month') for an organization plan."""
+    return settings.QUOTA_PERIODS.get(plan, settings.QUOTA_DEFAULT_PERIOD)
+
+
+def period_bounds(period, now=None):
+    """UTC-aligned [start, end) of the quota period containing ``now``."""
+    now = (now or datetime.now(dt_timezone.utc)).astimezone(dt_timezone.utc)
+    if period == 'day':
+        start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        return start, start + timedelta(days=1)
+    if period == 'month':
+        start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        if start.month == 12:
+            return start, start.replace(year=start.year + 1, month=1)
+        return start, start.replace(month=start.month + 1)
+    raise ValueError(f"Quota period must be one of {PERIODS}, got {period!r}")
+
+
+def quota_key(organization_id, period, now=None):
+    """
+    Counter key for the current period, e.g. ``quota:{org_id}:d20250101`` or
+    ``quota:{org_id}:m202501``. A new period is simply a new key, so resets need
+    no DEL or EXPIRE at the period boundary.
+    """
+    return f"quota:{organization_id}:{_period_stamp(period, now)}"
+
+
+def cap_key(organization_id, cap_id, subject, period, now=None):
+    """
+    Counter of one quota cap for one subject (a recipient's user_id or a
+    template_code) in the current period, e.g. ``quota:cap:{org_id}:12:{user_id}:d20250101``.
+    """
+    return f"quota:cap:{organization_id}:{cap_id}:{subject}:{_period_stamp(period, now)}"
+
+
+def _period_stamp(period, now=None):
+    start, _ = period_bounds(period, now)
+    return start.strftime('d%Y%m%d' if period == 'day' else 'm%Y%m')
+
+
+def key_expires_at(period, now=None):
+    """Absolute expiry for the current period's counter key (for EXPIREAT)."""
+    _, end = period_bounds(period, now)
+    return end + KEY_GRACE
+
+
+# ---------------------------------------------------------------------------
+# Pending-quota leases
+# ---------------------------------------------------------------------------
+
+def lease_key(organization_id):
+    """
+    Sorted set of the organization's in-flight notifications: member is the
+    notification id, score the unix time at which its reservation lapses.
+    """
+    return f"pending:leases:{organization_id}"
+
+
+def lease_deadline(now=None):
+    return (now or time.time()) + settings.QUOTA_LEASE_TTL
+
+
+def settled_key(organization_id):
+    """
+    Notifications settled before they had a lease. Units spent from a local quota
+    block only become leases when the block is next renewed, and a fast worker can
+    report back before that; the renewal then skips them instead of leaking a lease.
+
+    A sorted set: member the notification id, score the unix time at which the
+    tombstone lapses. Each settle trims the lapsed ones, so orgs that never hold a
+    block (and never read the set) only keep the last ``SETTLED_TTL`` seconds' worth.
+    """
+    return f"pending:tombstones:{organization_id}"
+
+
+SETTLED_TTL = 300
+
+# Settles one notification: drops its lease (or leaves a tombstone if it has none yet)
+# and, for deliveries, counts it against the current period in the same atomic step.
+# KEYS: leases, settled tombstones, quota counter
+# ARGV: notification id, count as delivered (1/0), counter EXPIREAT, tombstone TTL, now
+SETTLE_LEASE = """
+if redis.call('ZREM', KEYS[1], ARGV[1]) == 0 then
+    redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', ARGV[5])
+    redis.call('ZADD', KEYS[2], tonumber(ARGV[5]) + tonumber(ARGV[4]), ARGV[1])
+    redis.call('EXPIRE', KEYS[2], ARGV[4])
+end
+if ARGV[2] == '1' then
+    redis.call('INCR', KEYS[3])
+    redis.call('EXPIREAT', KEYS[3], ARGV[3])
+end
+"""
+
+
+# ---------------------------------------------------------------------------
+# Reservation
+# ---------------------------------------------------------------------------
+
+RESERVED, RATE_LIMITED, QUOTA_EXCEEDED, CAP_EXCEEDED = 0, 1, 2, 3
+
+# Checks the rate window, the org quota and every matching cap, and only if all of
+# them pass reserves the notification against each: a pending lease for the org
+# and one unit per cap counter. A request refused by one level never consumes
+# another level's capacity. Returns {outcome, index of the exhausted cap (1-based)}.
+# KEYS: rate counter, org quota counter, org leases, cap counters...
+# ARGV: rate limit, rate window, org limit (-1 when a local quota block already
+#       covers the org), now, notification id, lease deadline, then limit and
+#       EXPIREAT per cap counter
+RESERVE = """
+local rate = redis.call('INCR', KEYS[1])
+if rate == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+if rate > tonumber(ARGV[1]) then
+    return {1, 0}
+end
+
+local org_limit = tonumber(ARGV[3])
+if org_limit >= 0 then
+    local used = tonumber(redis.call('GET', KEYS[2]) or '0') + redis.call('ZCOUNT', KEYS[3], ARGV[4], '+inf')
+    if used >= org_limit then
+        return {2, 0}
+    end
+end
+
+for i = 4, #KEYS do
+    if tonumber(redis.call('GET', KEYS[i]) or '0') >= tonumber(ARGV[2 * i - 1]) then
+        return {3, i - 3}
+    end
+end
+
+if org_limit >= 0 then
+    redis.call('ZADD', KEYS[3], ARGV[6], ARGV[5])
+end
+for i = 4, #KEYS do
+    redis.call('INCR', KEYS[i])
+    redis.call('EXPIREAT', KEYS[i], ARGV[2 * i])
+end
+return {0, 0}
+"""
+
+
+async def reserve(redis_client, organization_id, period, notification_id, org_limit, caps=(), rate_limit=100, rate_window=60):
+    """
+    Run RESERVE for one notification in a single round trip.
+
+    ``org_limit`` is None when the org spends from a local quota block, ``caps`` a
+    list of ``(counter key, limit, counter expiry)``. Returns ``(outcome, cap)``
+    where ``cap`` is the index into ``caps`` of the exhausted cap, or None.
+    """
+    now = time.time()
+    keys = [
+        f"rate:{organization_id}",
+        quota_key(organization_id, period),
+        lease_key(organization_id),
+        *(key for key, _, _ in caps),
+    ]
+    args = [rate_limit, rate_window, -1 if org_limit is None else org_limit, now, notification_id, lease_deadline(now)]
+    for _, limit, expires_at in caps:
+        args += [limit, int(expires_at.timestamp())]
+
+    if not hasattr(redis_client, 'register_script'):
+        # The in-memory development client cannot run Lua. It lives in one process
+        # and never yields while running commands, so the plain commands are atomic.
+        outcome, cap = await _reserve_without_lua(redis_client, keys, args)
+    else:
+        outcome, cap = await run_script(redis_client, RESERVE, keys, args)
+    return int(outcome), int(cap) - 1 if int(cap) else None
+
+
+async def _reserve_without_lua(redis_client, keys, args):
+    await redis_client.set(keys[0], 0, ex=args[1], nx=True)
+    if await redis_client.incr(keys[0]) > args[0]:
+        return RATE_LIMITED, 0
+    if args[2] >= 0:
+        used = int(await redis_client.get(keys[1]) or 0) + await redis_client.zcount(keys[2], args[3], '+inf')
+        if used >= args[2]:
+            return QUOTA_EXCEEDED, 0
+    for i, key in enumerate(keys[3:]):
+        if int(await redis_client.get(key) or 0) >= args[6 + 2 * i]:
+            return CAP_EXCEEDED, i + 1
+    if args[2] >= 0:
+        await redis_client.zadd(keys[2], {args[4]: args[5]})
+    for key in keys[3:]:
+        await redis_client.incr(key)
+    return RESERVED, 0
+
+
+async def settle(redis_client, organization_id, period, notification_id, delivered):
+    """
+    Run SETTLE_LEASE for a notification whose worker reported a final status.
+
+    Settling is keyed by notification id, so repeating it, or settling a lease the
+    sweeper already expired, never frees another notification's lease.
+    """
+    keys = [lease_key(organization_id), settled_key(organization_id), quota_key(organization_id, period)]
+    args = [notification_id, 1 if delivered else 0, int(key_expires_at(period).timestamp()), SETTLED_TTL, time.time()]
+
+    if not hasattr(redis_client, 'register_script'):
+        # See reserve(): the in-memory client cannot run Lua
+        await _settle_without_lua(redis_client, keys, args)
+    else:
+        await run_script(redis_client, SETTLE_LEASE, keys, args)
+
+
+async def _settle_without_lua(redis_client, keys, args):
+    if not await redis_client.zrem(keys[0], args[0]):
+        await redis_client.zremrangebyscore(keys[1], '-inf', args[4])
+        await redis_client.zadd(keys[1], {args[0]: args[4] + args[3]})
+        await redis_client.expire(keys[1], args[3])
+    if args[1]:
+        await redis_client.incr(keys[2])
+        await redis_client.expireat(keys[2], args[2])
+
+
+async def release(redis_client, organization_id, notification_id, cap_keys=(), org_lease=True):
+    """Hand back a reservation whose notification never reached a worker."""
+    pipe = redis_client.pipeline(transaction=False)
+    if org_lease:
+        pipe.zrem(lease_key(organization_id), notification_id)
+    for key in cap_keys:
+        pipe.decr(key)
+    await pipe.execute()
+
+
+# ---------------------------------------------------------------------------
+# Plan lookup for callers that only know the organization id
+# ---------------------------------------------------------------------------
+
+_plan_cache = {}
+
+
+def remember_plan(organization_id, plan):
+    """Cache an organization's plan in-process (called on every authentication)."""
+    _plan_cache[organization_id] = (plan, time.monotonic() + settings.QUOTA_PLAN_CACHE_TTL)
+
+
+def forget_plan(organization_id):
+    """Drop one organization's cached plan, or every plan when organization_id is None."""
+    if organization_id is None:
+        _plan_cache.clear()
+    else:
+        _plan_cache.pop(organization_id, None)
+
+
+async def get_org_period(organization_id):
+    """Quota period of an organization, from the in-process cache or the database."""
+    cached = _plan_cache.get(organization_id)
+    if cached and cached[1] > time.monotonic():
+        return period_for_plan(cached[0])
+
+    from .models import Organization
+
+    plan = await database_sync_to_async(
+        lambda: Organization.objects.filter(id=organization_id).values_list('plan', flat=True).first()
+    )()
+    if plan is None:
+        logger.warning(f"Unknown organization {organization_id}, using the default quota period")
+        return settings.QUOTA_DEFAULT_PERIOD
+
+    remember_plan(organization_id, plan)
+    return period_for_plan(plan)
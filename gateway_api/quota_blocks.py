@@ -0,0 +1,253 @@
+# gateway_api/quota_blocks.py
+
+import asyncio
+import logging
+import os
+import secrets
+import socket
+import time
+
+from django.conf import settings
+
+from .redis_client import get_redis_client
+from . import quota as quota_periods
+
+logger = logging.getLogger(__name__)
+
+
+# One id per gateway process; blocks are held per process, not per host.
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(3)}"
+
+
+def blocks_key(organization_id):
+    """Hash of instance id -> quota units that instance currently holds."""
+    return f"quota:blocks:{organization_id}"
+
+
+def block_deadlines_key(organization_id):
+    """Sorted set of instance id -> unix time its block lapses unless renewed."""
+    return f"quota:blocks:deadlines:{organization_id}"
+
+
+# Renews (or first acquires, or returns) this instance's block in one atomic step:
+#   1. reclaim blocks of instances that stopped renewing (crashed or stalled),
+#   2. turn units spent locally since the last call into per-notification pending
+#      leases, skipping notifications a worker already settled (see quota.SETTLE_LEASE),
+#   3. top the block back up to the target size, never letting
+#      used + live leases + all held blocks exceed the org limit.
+# Returns the number of units this instance now holds.
+#
+# KEYS: quota counter, leases, blocks, block deadlines, settled tombstones
+# ARGV: instance, now, block deadline, lease deadline, target units (0 returns the block), limit, spent ids...
+LEASE_BLOCK = """
+local instance = ARGV[1]
+local now = tonumber(ARGV[2])
+
+for _, other in ipairs(redis.call('ZRANGEBYSCORE', KEYS[4], '-inf', now)) do
+    redis.call('HDEL', KEYS[3], other)
+    redis.call('ZREM', KEYS[4], other)
+end
+
+local spent = #ARGV - 6
+for i = 7, #ARGV do
+    if redis.call('ZREM', KEYS[5], ARGV[i]) == 0 then
+        redis.call('ZADD', KEYS[2], ARGV[4], ARGV[i])
+    end
+end
+
+local target = tonumber(ARGV[5])
+local held = math.max(0, tonumber(redis.call('HGET', KEYS[3], instance) or '0') - spent)
+if target == 0 then
+    held = 0
+end
+redis.call('HSET', KEYS[3], instance, held)
+
+local committed = tonumber(redis.call('GET', KEYS[1]) or '0') + redis.call('ZCOUNT', KEYS[2], now, '+inf')
+for _, units in ipairs(redis.call('HVALS', KEYS[3])) do
+    committed = committed + tonumber(units)
+end
+held = held + math.max(0, math.min(target - held, tonumber(ARGV[6]) - committed))
+
+if held > 0 then
+    redis.call('HSET', KEYS[3], instance, held)
+    redis.call('ZADD', KEYS[4], ARGV[3], instance)
+else
+    redis.call('HDEL', KEYS[3], instance)
+    redis.call('ZREM', KEYS[4], instance)
+end
+return held
+"""
+
+
+class QuotaBlock:
+    """
+    A block of one organization's quota leased by this process.
+
+    Units are spent with plain in-memory decrements. Spent notification ids are
+    handed to Redis in bulk on the next renewal, which happens in the background
+    once the block runs low, every flush interval, and before the block lapses.
+    If the process dies, its block lapses after QUOTA_LOCAL_BLOCK_TTL seconds and
+    other instances reclaim it. The org can then overshoot its limit by at most
+    the units this process had spent but not yet reported: one block.
+    """
+
+    def __init__(self, organization_id, quota_limit, period):
+        self.organization_id = organization_id
+        self.quota_limit = quota_limit
+        self.period = period
+        self.size = settings.QUOTA_LOCAL_BLOCK_SIZE
+        self.low_watermark = max(1, self.size // 5)
+        self.available = 0
+        self.spent = []
+        self.deadline = 0.0
+        self._renewal = None
+
+    async def spend(self, notification_id):
+        """Take one unit for ``notification_id``. Returns False when the org's quota is exhausted."""
+        if time.time() >= self.deadline:
+            # Past the deadline other instances may already have reclaimed the block
+            self.available = 0
+        while self.available <= 0:
+            # Every spender that found the block empty waits for the same renewal, which
+            # may not cover all of them; the rest renew again until Redis has nothing left
+            if not await self.renew():
+                return False
+
+        self.available -= 1
+        self.spent.append(notification_id)
+        if self.available <= self.low_watermark:
+            self.renew_soon()
+        return True
+
+    async def refund(self, notification_id):
+        """Give back a unit whose notification was never handed to a worker."""
+        if self._renewal is not None and not self._renewal.done() and self._renewal.get_loop() is asyncio.get_running_loop():
+            # A renewal may be reporting the id right now; let it finish so the lease exists
+            await asyncio.shield(self._renewal)
+        try:
+            self.spent.remove(notification_id)
+        except ValueError:
+            pass
+        else:
+            self.available += 1
+            return
+
+        # A renewal already reported it as a pending lease: drop that instead
+        try:
+            redis_client = await get_redis_client()
+            await redis_client.zrem(quota_periods.lease_key(self.organization_id), notification_id)
+        except Exception as e:
+            logger.error(f"Failed to refund quota lease {notification_id} for {self.organization_id}: {e}")
+
+    def renew_soon(self):
+        if self._renewal is None or self._renewal.done() or self._renewal.get_loop() is not asyncio.get_running_loop():
+            self._renewal = asyncio.get_running_loop().create_task(self._lease(self.size))
+
+    async def renew(self):
+        """Renew now; returns the units this process holds afterwards (0 when the org has none left)."""
+        self.renew_soon()
+        return await asyncio.shield(self._renewal)
+
+    async def release(self):
+        """Report spent units and return the unspent ones to the org."""
+        if self._renewal is not None and not self._renewal.done() and self._renewal.get_loop() is asyncio.get_running_loop():
+            await asyncio.shield(self._renewal)
+        await self._lease(0)
+
+    async def _lease(self, target):
+        spent, self.spent = self.spent, []
+        now = time.time()
+        block_deadline = now + settings.QUOTA_LOCAL_BLOCK_TTL
+        try:
+            redis_client = await get_redis_client()
+            held = await quota_periods.run_script(
+                redis_client,
+                LEASE_BLOCK,
+                keys=[
+                    quota_periods.quota_key(self.organization_id, self.period),
+                    quota_periods.lease_key(self.organization_id),
+                    blocks_key(self.organization_id),
+                    block_deadlines_key(self.organization_id),
+                    quota_periods.settled_key(self.organization_id),
+                ],
+                args=[INSTANCE_ID, now, block_deadline, quota_periods.lease_deadline(now), target, self.quota_limit, *spent]
+            )
+        except Exception as e:
+            # Keep the spent ids for the next attempt; the block lapses on its own if Redis stays away
+            self.spent = spent + self.spent
+            logger.error(f"Failed to renew quota block for {self.organization_id}: {e}")
+            return 0
+
+        self.available = int(held) - len(self.spent)
+        self.deadline = block_deadline
+        return int(held)
+
+
+_blocks = {}
+_flusher = None
+# Releases of blocks from a past quota period, held until they finish (the loop
+# only keeps weak references to tasks)
+_releases = set()
+
+
+def get_block(organization_id, quota_limit, period):
+    """
+    The local quota block for an organization, or None when the org is too small
+    for block leasing (its requests keep checking Redis directly).
+    """
+    if not settings.QUOTA_LOCAL_BLOCK_SIZE or quota_limit < settings.QUOTA_LOCAL_BLOCK_MIN_LIMIT:
+        return None
+
+    block = _blocks.get(organization_id)
+    if block is None or block.period != period:
+        if block is not None:
+            # New quota period: the old block's units belong to the old counter
+            task = asyncio.get_running_loop().create_task(block.release())
+            _releases.add(task)
+            task.add_done_callback(_releases.discard)
+        block = _blocks[organization_id] = QuotaBlock(organization_id, quota_limit, period)
+    block.quota_limit = quota_limit
+    _ensure_flusher()
+    return block
+
+
+def _ensure_flusher():
+    global _flusher
+    loop = asyncio.get_running_loop()
+    if _flusher is None or _flusher.done() or _flusher.get_loop() is not loop:
+        _flusher = loop.create_task(_flush_blocks())
+
+
+async def _flush_blocks():
+    """Report spent units regularly and renew blocks well before they lapse."""
+    try:
+        while True:
+            await asyncio.sleep(settings.QUOTA_LOCAL_BLOCK_FLUSH_INTERVAL)
+            renew_before = time.time() + settings.QUOTA_LOCAL_BLOCK_TTL / 2
+            for block in list(_blocks.values()):
+                if block.spent or (block.available and block.deadline < renew_before):
+                    block.renew_soon()
+    except asyncio.CancelledError:
+        # The loop is shutting down; hand back what this process still holds
+        await release_all()
+        raise
+
+
+async def release_all():
+    """Return every block this process holds. Call on shutdown."""
+    blocks = list(_blocks.values())
+    _blocks.clear()
+    loop = asyncio.get_running_loop()
+    pending = [task for task in _releases if task.get_loop() is loop]
+    await asyncio.gather(*(block.release() for block in blocks), *pending, return_exceptions=True)
+
+
+async def stop():
+    """Stop the flusher and return every block. Call on shutdown."""
+    global _flusher
+    if _flusher is not None and not _flusher.done():
+        # The flusher releases the blocks as it exits
+        _flusher.cancel()
+        await asyncio.gather(_flusher, return_exceptions=True)
+    _flusher = None
+    await release_all()
@@ -0,0 +1,78 @@
+# gateway_api/quota_caps.py
+
+import logging
+import time
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+
+from . import quota as quota_periods
+
+logger = logging.getLogger(__name__)
+
+
+CAP_FIELDS = ('id', 'scope', 'template_code', 'notification_type', 'limit', 'period')
+
+# organization id -> (list of active caps as dicts, monotonic expiry)
+_cap_cache = {}
+
+
+async def get_caps(organization_id):
+    """
+    Active quota caps of an organization. Served from an in-process cache for
+    QUOTA_CAP_CACHE_TTL seconds, so most requests never touch the database; orgs
+    without caps are cached too.
+    """
+    cached = _cap_cache.get(organization_id)
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+
+    from .models import QuotaCap
+
+    try:
+        caps = await database_sync_to_async(
+            lambda: list(QuotaCap.objects.filter(organization_id=organization_id, is_active=True).values(*CAP_FIELDS))
+        )()
+    except Exception as e:
+        # Caps narrow the org quota; failing open keeps the org quota as the only limit
+        logger.error(f"Failed to load quota caps for {organization_id}: {e}")
+        return cached[0] if cached else []
+
+    _cap_cache[organization_id] = (caps, time.monotonic() + settings.QUOTA_CAP_CACHE_TTL)
+    return caps
+
+
+def forget_caps(organization_id):
+    """Drop one organization's cached caps, or every organization's when organization_id is None."""
+    if organization_id is None:
+        _cap_cache.clear()
+    else:
+        _cap_cache.pop(organization_id, None)
+
+
+def matching_caps(caps, organization_id, user_id, template_code, notification_type):
+    """
+    The caps that apply to one notification, as ``(cap, counter key, limit, counter expiry)``.
+    """
+    matched = []
+    for cap in caps:
+        if cap['template_code'] and cap['template_code'] != template_code:
+            continue
+        if cap['notification_type'] and cap['notification_type'] != notification_type:
+            continue
+        subject = user_id if cap['scope'] == 'user' else template_code
+        matched.append((
+            cap,
+            quota_periods.cap_key(organization_id, cap['id'], subject, cap['period']),
+            cap['limit'],
+            quota_periods.key_expires_at(cap['period']),
+        ))
+    return matched
+
+
+def describe(cap):
+    """Human readable form of a cap for error messages, e.g. '5 push notifications per recipient per day'."""
+    kind = f"{cap['notification_type']} notifications" if cap['notification_type'] else 'notifications'
+    template = f" of template '{cap['template_code']}'" if cap['template_code'] else ''
+    per = 'recipient' if cap['scope'] == 'user' else 'template'
+    return f"{cap['limit']} {kind}{template} per {per} per {cap['period']}"
@@ -1,7 +1,11 @@
 
+import asyncio
 import logging
+import time
 from django.conf import settings
-from redis.asyncio import Redis
+from redis.asyncio import BlockingConnectionPool, Redis
+
+from .metrics import REDIS_POOL_ACQUIRE, REDIS_POOL_CONNECTIONS, REDIS_POOL_MAX_CONNECTIONS
 
 logger = logging.getLogger(__name__)
 
@@ -9,21 +13,103 @@ logger = logging.getLogger(__name__)
 REDIS_URL = settings.REDIS_URL
 
 if REDIS_URL:
-    
+
+    # event loop -> shared async client. One per loop, because asyncio connections
+    # cannot be used from another loop (tests and async_to_sync run their own).
+    _clients = {}
+
+
+    class MeteredConnectionPool(BlockingConnectionPool):
+        """
+        Waits up to REDIS_POOL_TIMEOUT seconds for a free connection instead of
+        failing with 'Too many connections', and records how long that took and
+        how many connections are in use.
+        """
+
+        async def get_connection(self):
+            started = time.perf_counter()
+            try:
+                return await super().get_connection()
+            finally:
+                REDIS_POOL_ACQUIRE.observe(time.perf_counter() - started)
+                update_pool_gauges()
+
+        async def release(self, connection):
+            await super().release(connection)
+            update_pool_gauges()
+
+
+    def update_pool_gauges():
+        """
+        Publish connections in use / idle / allowed across this process's shared
+        pools. Set as they change rather than read at scrape time, so that under
+        gunicorn /metrics can sum every worker's values, not just its own.
+        """
+        pools = [client.connection_pool for client in list(_clients.values())]
+        REDIS_POOL_CONNECTIONS.labels('in_use').set(sum(len(pool._in_use_connections) for pool in pools))
+        REDIS_POOL_CONNECTIONS.labels('idle').set(sum(
+            sum(1 for connection in pool._available_connections if connection.is_connected)
+            for pool in pools
+        ))
+        REDIS_POOL_MAX_CONNECTIONS.set(sum(pool.max_connections for pool in pools))
+
+
     async def get_redis_client():
-        """Get async Redis client"""
-        return await Redis.from_url(
+        """Shared async Redis client of the running event loop, created on first use"""
+        loop = asyncio.get_running_loop()
+        client = _clients.get(loop)
+        if client is None:
+            for other_loop in [other for other in _clients if other.is_closed()]:
+                # Nothing to close on a dead loop; just let its pool be collected
+                del _clients[other_loop]
+            pool = MeteredConnectionPool.from_url(
+                REDIS_URL,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                timeout=settings.REDIS_POOL_TIMEOUT,
+                health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+                socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                socket_keepalive=True,
+                retry_on_timeout=True,
+                encoding="utf-8",
+                decode_responses=True,
+            )
+            client = _clients[loop] = Redis(connection_pool=pool)
+            update_pool_gauges()
+        return client
+
+
+    async def close_redis_client():
+        """Close the running loop's shared client and disconnect its pool. Call on shutdown."""
+        client = _clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose(close_connection_pool=True)
+            update_pool_gauges()
+
+
+    def create_pubsub_client():
+        """
+        Separate client for a long-lived subscription (invalidation._listen). It has
+        no socket timeout: on the shared pool's REDIS_SOCKET_TIMEOUT, a channel that
+        stays quiet that long makes redis-py drop and resubscribe the connection, and
+        messages published meanwhile are lost. Dead connections are still found by
+        the health checks and TCP keepalive.
+        """
+        return Redis.from_url(
             REDIS_URL,
+            health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+            socket_timeout=None,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_keepalive=True,
             encoding="utf-8",
             decode_responses=True,
-            max_connections=50
         )
 
 
     import redis
     _redis_pool = redis.ConnectionPool.from_url(
         REDIS_URL,
-        max_connections=50,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
         retry_on_timeout=True,
         socket_keepalive=True,
         decode_responses=True
@@ -45,7 +131,9 @@ else:
             self.data[key] = value
             return True
         
-        async def set(self, key, value, ex=None):
+        async def set(self, key, value, ex=None, nx=False):
+            if nx and key in self.data:
+                return None
             self.data[key] = value
             if ex:
                 
@@ -53,16 +141,43 @@ else:
             return True
         
         async def incr(self, key):
-            self.data[key] = self.data.get(key, 0) + 1
+            self.data[key] = int(self.data.get(key, 0)) + 1
             return self.data[key]
         
         async def expire(self, key, seconds):
             return True
+
+        async def expireat(self, key, when):
+            return True
             
         async def decr(self, key):
-            self.data[key] = self.data.get(key, 0) - 1
+            self.data[key] = int(self.data.get(key, 0)) - 1
             return self.data[key]
         
+        async def zadd(self, key, mapping):
+            members = self.data.setdefault(key, {})
+            added = len(set(mapping) - set(members))
+            members.update(mapping)
+            return added
+
+        async def zrem(self, key, *members):
+            zset = self.data.get(key, {})
+            return sum(1 for member in members if zset.pop(member, None) is not None)
+
+        async def zcount(self, key, min, max):
+            low = float('-inf') if min == '-inf' else float(min)
+            high = float('inf') if max == '+inf' else float(max)
+            return sum(1 for score in self.data.get(key, {}).values() if low <= score <= high)
+        
+        async def zremrangebyscore(self, key, min, max):
+            zset = self.data.get(key, {})
+            low = float('-inf') if min == '-inf' else float(min)
+            high = float('inf') if max == '+inf' else float(max)
+            lapsed = [member for member, score in zset.items() if low <= score <= high]
+            for member in lapsed:
+                del zset[member]
+            return len(lapsed)
+
         async def exists(self, key):
             return key in self.data
             
@@ -74,10 +189,37 @@ else:
             
         async def close(self):
             self.data.clear()
+
+        def pipeline(self, transaction=True):
+            return MockAsyncPipeline(self)
+
+
+    class MockAsyncPipeline:
+        """Queues commands and runs them in order on execute(), like redis.asyncio pipelines"""
+        def __init__(self, client):
+            self.client = client
+            self.commands = []
+
+        def __getattr__(self, name):
+            def queue(*args, **kwargs):
+                self.commands.append((getattr(self.client, name), args, kwargs))
+                return self
+            return queue
+
+        async def execute(self):
+            commands, self.commands = self.commands, []
+            return [await command(*args, **kwargs) for command, args, kwargs in commands]
     
     
     _mock_redis = MockAsyncRedis()
     
     async def get_redis_client():
         """Get async mock Redis client"""
-        return _mock_redis
\ No newline at end of file
+        return _mock_redis
+
+    async def close_redis_client():
+        """Nothing to close for the in-memory client"""
+
+    def create_pubsub_client():
+        """The in-memory client serves a single process: there is nobody to subscribe to"""
+        return None
@@ -0,0 +1,69 @@
+# gateway_api/renderers.py
+
+import codecs
+
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Datetimes, Decimals, UUIDs, lazy strings etc. are handed to DRF's encoder, so the
+# output matches the stock JSONRenderer byte for byte (e.g. '...Z' timestamps)
+_encoder = JSONEncoder()
+_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+class StaticBody(dict):
+    """
+    A response body that never changes, such as a standard rejection. It is
+    serialized once; ORJSONRenderer and the fast ingest path send the cached bytes.
+    Read-only, so the bytes cannot go stale.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rendered = dumps(dict(self))
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('StaticBody is read-only')
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _read_only
+
+
+def dumps(data):
+    """Serialize to compact UTF-8 JSON bytes, as DRF's JSONRenderer does."""
+    if type(data) is StaticBody:
+        return data.rendered
+    return orjson.dumps(data, default=_encoder.default, option=_OPTIONS)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Drop-in replacement for rest_framework.renderers.JSONRenderer backed by orjson.
+    Requests for indented output (``Accept: application/json; indent=4``) are
+    rare and left to the stock renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class ORJSONParser(JSONParser):
+    """Drop-in replacement for rest_framework.parsers.JSONParser backed by orjson."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if codecs.lookup(encoding).name != 'utf-8':
+            # orjson only reads UTF-8
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read() if stream is not None else b'')
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
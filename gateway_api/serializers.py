@@ -1,5 +1,8 @@
 # gateway_api/serializers.py
 
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
 
 
@@ -70,6 +73,87 @@ class NotificationStatusResponseSerializer(serializers.Serializer):
     error_message = serializers.CharField(allow_null=True)
 
 
+class NotificationListQuerySerializer(serializers.Serializer):
+    """Query parameters for listing an organization's notifications"""
+    status = serializers.ChoiceField(
+        choices=['queued', 'processing', 'delivered', 'failed', 'bounced', 'rejected'],
+        required=False,
+        help_text="Only return notifications in this status"
+    )
+    notification_type = serializers.ChoiceField(
+        choices=['email', 'push'],
+        required=False,
+        help_text="Only return notifications of this type"
+    )
+    template_code = serializers.CharField(
+        required=False,
+        help_text="Only return notifications sent with this template"
+    )
+    user_id = serializers.CharField(
+        required=False,
+        help_text="Only return notifications sent to this user"
+    )
+    created_after = serializers.DateTimeField(
+        required=False,
+        help_text="Only return notifications created at or after this time (ISO 8601)"
+    )
+    created_before = serializers.DateTimeField(
+        required=False,
+        help_text="Only return notifications created before this time (ISO 8601)"
+    )
+    limit = serializers.IntegerField(
+        required=False,
+        default=50,
+        min_value=1,
+        max_value=200,
+        help_text="Page size (1-200)"
+    )
+    cursor = serializers.CharField(
+        required=False,
+        help_text="Opaque cursor from meta.next_cursor of the previous page"
+    )
+
+
+class UsageQuerySerializer(serializers.Serializer):
+    """Query parameters for an organization's usage counters"""
+    MAX_BUCKETS = 1500
+    DEFAULT_RANGES = {
+        'minute': timedelta(hours=1),
+        'hour': timedelta(hours=24),
+        'day': timedelta(days=30),
+    }
+    STEPS = {
+        'minute': timedelta(minutes=1),
+        'hour': timedelta(hours=1),
+        'day': timedelta(days=1),
+    }
+
+    granularity = serializers.ChoiceField(
+        choices=['minute', 'hour', 'day'],
+        required=False,
+        default='hour',
+        help_text="Bucket size. Minute buckets are kept for a few hours, hour buckets for a week"
+    )
+    start = serializers.DateTimeField(
+        required=False,
+        help_text="Start of the range, inclusive (ISO 8601). Defaults to 1 hour, 24 hours or 30 days before end"
+    )
+    end = serializers.DateTimeField(
+        required=False,
+        help_text="End of the range, exclusive (ISO 8601). Defaults to now"
+    )
+
+    def validate(self, attrs):
+        granularity = attrs['granularity']
+        attrs['end'] = attrs.get('end') or timezone.now()
+        attrs['start'] = attrs.get('start') or attrs['end'] - self.DEFAULT_RANGES[granularity]
+        if attrs['start'] >= attrs['end']:
+            raise serializers.ValidationError("start must be before end")
+        if (attrs['end'] - attrs['start']) / self.STEPS[granularity] > self.MAX_BUCKETS:
+            raise serializers.ValidationError(f"Range too long: at most {self.MAX_BUCKETS} {granularity} buckets per request")
+        return attrs
+
+
 class InternalStatusUpdateSerializer(serializers.Serializer):
     """Serializer for internal status updates from workers"""
     notification_id = serializers.CharField(required=True)
@@ -79,7 +163,10 @@ class InternalStatusUpdateSerializer(serializers.Serializer):
         required=True
     )
     timestamp = serializers.DateTimeField(required=False)
-    error = serializers.CharField(required=False, allow_null=True)
+    error = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+    worker = serializers.CharField(required=False, max_length=64, help_text='Worker instance reporting the update')
+    # NotificationEvent.attempt is a PositiveSmallIntegerField
+    attempt = serializers.IntegerField(required=False, allow_null=True, min_value=0, max_value=32767, help_text='Delivery attempt number')
 
 
 class StandardResponseSerializer(serializers.Serializer):
@@ -3,20 +3,26 @@ from django.test import TestCase
 from django.urls import reverse
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from django.utils import timezone
 from django.conf import settings
 import json
+import os
 import secrets
+import shutil
+import tempfile
+import unittest
 
-from .models import Organization, Notification # Import your models
+from .models import Organization, Notification, hash_api_key # Import your models
 from .views import NotificationAPIView # Import the view class being tested
 
 # Mock data for tests
+MOCK_API_KEY = 'org_TestApiKey123...'
+
 MOCK_ORGANIZATION_DATA = {
     'id': 'test_org_id_123',
     'name': 'Test Org',
-    'api_key': 'org_TestApiKey123...',
+    'api_key_hash': hash_api_key(MOCK_API_KEY),
     'plan': 'pro',
     'quota_limit': 10000,
     'is_active': True,
@@ -117,7 +123,7 @@ class NotificationAPIViewTestCase(APITestCase):
         mock_redis.setex.return_value = None # Mock setting the idempotency key
 
         # Act: Send the POST request
-        response = self.client.post(self.url, self.valid_payload, format='json', HTTP_X_API_KEY=MOCK_ORGANIZATION_DATA['api_key'])
+        response = self.client.post(self.url, self.valid_payload, format='json', HTTP_X_API_KEY=MOCK_API_KEY)
 
         # Assert: Check the response
         self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
@@ -141,7 +147,7 @@ class NotificationAPIViewTestCase(APITestCase):
         mock_get_user_data.return_value = {'success': False, 'message': 'User not found'}
 
         # Act: Send the POST request
-        response = self.client.post(self.url, self.valid_payload, format='json', HTTP_X_API_KEY=MOCK_ORGANIZATION_DATA['api_key'])
+        response = self.client.post(self.url, self.valid_payload, format='json', HTTP_X_API_KEY=MOCK_API_KEY)
 
         # Assert: Check the response
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -159,7 +165,7 @@ class NotificationAPIViewTestCase(APITestCase):
         mock_get_template.return_value = {'success': False, 'message': 'Template not found'}
 
         # Act: Send the POST request
-        response = self.client.post(self.url, self.valid_payload, format='json', HTTP_X_API_KEY=MOCK_ORGANIZATION_DATA['api_key'])
+        response = self.client.post(self.url, self.valid_payload, format='json', HTTP_X_API_KEY=MOCK_API_KEY)
 
         # Assert: Check the response
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -179,7 +185,7 @@ class NotificationAPIViewTestCase(APITestCase):
         mock_validate_vars.return_value = {'valid': False, 'missing': ['name'], 'extra': []}
 
         # Act: Send the POST request
-        response = self.client.post(self.url, self.valid_payload, format='json', HTTP_X_API_KEY=MOCK_ORGANIZATION_DATA['api_key'])
+        response = self.client.post(self.url, self.valid_payload, format='json', HTTP_X_API_KEY=MOCK_API_KEY)
 
         # Assert: Check the response
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -200,7 +206,7 @@ class NotificationAPIViewTestCase(APITestCase):
         mock_redis_get.return_value = json.dumps(existing_response_data).encode('utf-8')
 
         # Act: Send the POST request with the same request_id as the cached one
-        response = self.client.post(self.url, self.valid_payload, format='json', HTTP_X_API_KEY=MOCK_ORGANIZATION_DATA['api_key'])
+        response = self.client.post(self.url, self.valid_payload, format='json', HTTP_X_API_KEY=MOCK_API_KEY)
 
         # Assert: Check the response
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -252,7 +258,7 @@ class NotificationAPIViewTestCase(APITestCase):
         push_payload['notification_type'] = 'push'
 
         # Act: Send the POST request for a push notification
-        response = self.client.post(self.url, push_payload, format='json', HTTP_X_API_KEY=MOCK_ORGANIZATION_DATA['api_key'])
+        response = self.client.post(self.url, push_payload, format='json', HTTP_X_API_KEY=MOCK_API_KEY)
 
         # Assert: Check the response
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -260,6 +266,82 @@ class NotificationAPIViewTestCase(APITestCase):
         self.assertEqual(response.data['error'], 'No push token')
 
 
+class NotificationListViewTestCase(APITestCase):
+    """
+    Tests for GET /api/v1/notifications/ (keyset pagination).
+    Authentication is patched so the tests do not need Redis.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('create_notification')
+        self.organization = Organization.objects.create(**MOCK_ORGANIZATION_DATA)
+
+        base = timezone.now()
+        for i in range(5):
+            notification = Notification.objects.create(
+                id=f'notif_{i}',
+                correlation_id=f'corr_{i}',
+                organization_id=self.organization.id,
+                user_id='test_user_id_456',
+                notification_type='email' if i % 2 == 0 else 'push',
+                template_code='welcome_email',
+                status='delivered' if i < 3 else 'failed',
+                request_id=f'req_list_{i}',
+            )
+            # auto_now_add ignores explicit values, so spread created_at afterwards
+            Notification.objects.filter(id=notification.id).update(created_at=base - timezone.timedelta(minutes=i))
+
+        Notification.objects.create(
+            id='notif_other_org',
+            correlation_id='corr_other',
+            organization_id='another_org',
+            user_id='someone_else',
+            notification_type='email',
+            template_code='welcome_email',
+            request_id='req_list_other',
+        )
+
+        from .authentication import OrganizationUser
+        patcher = patch(
+            'gateway_api.authentication.APIKeyAuthentication.authenticate_async',
+            new=AsyncMock(return_value=(OrganizationUser(self.organization.id, self.organization.name, self.organization.quota_limit), None))
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_pages_follow_cursor_newest_first(self):
+        first = self.client.get(self.url, {'limit': 2}, HTTP_X_API_KEY=MOCK_API_KEY)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual([n['notification_id'] for n in first.data['data']], ['notif_0', 'notif_1'])
+        self.assertTrue(first.data['meta']['has_next'])
+        self.assertFalse(first.data['meta']['has_previous'])
+        self.assertEqual(first.data['meta']['limit'], 2)
+
+        seen = [n['notification_id'] for n in first.data['data']]
+        cursor = first.data['meta']['next_cursor']
+        while cursor:
+            page = self.client.get(self.url, {'limit': 2, 'cursor': cursor}, HTTP_X_API_KEY=MOCK_API_KEY)
+            self.assertTrue(page.data['meta']['has_previous'])
+            seen.extend(n['notification_id'] for n in page.data['data'])
+            cursor = page.data['meta']['next_cursor']
+
+        self.assertEqual(seen, ['notif_0', 'notif_1', 'notif_2', 'notif_3', 'notif_4'])
+
+    def test_filters_are_applied(self):
+        response = self.client.get(self.url, {'status': 'failed'}, HTTP_X_API_KEY=MOCK_API_KEY)
+        self.assertEqual([n['notification_id'] for n in response.data['data']], ['notif_3', 'notif_4'])
+        self.assertFalse(response.data['meta']['has_next'])
+
+        response = self.client.get(self.url, {'notification_type': 'push'}, HTTP_X_API_KEY=MOCK_API_KEY)
+        self.assertEqual([n['notification_id'] for n in response.data['data']], ['notif_1', 'notif_3'])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'}, HTTP_X_API_KEY=MOCK_API_KEY)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], 'Invalid cursor')
+
+
 # Example of a test for an internal sync view (if InternalOrganizationSyncView is in gateway_api)
 # from .views import InternalOrganizationSyncView
 # class InternalOrganizationSyncViewTestCase(APITestCase):
@@ -320,4 +402,1532 @@ class NotificationAPIViewTestCase(APITestCase):
 #     # Add more tests for HealthCheckView (unhealthy scenarios)
 
 # Remember to run tests using: python manage.py test gateway_api
-# Or for specific test class: python manage.py test gateway_api.tests.NotificationAPIViewTestCase
\ No newline at end of file
+# Or for specific test class: python manage.py test gateway_api.tests.NotificationAPIViewTestCase
+
+class NotificationEventsTestCase(APITestCase):
+    """
+    Tests for the append-only event log: the batching writer, event recording on
+    status updates and GET /api/v1/notifications/<id>/events/.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.organization = Organization.objects.create(**MOCK_ORGANIZATION_DATA)
+        self.notification = Notification.objects.create(
+            id='notif_events_1',
+            correlation_id='corr_events_1',
+            organization_id=self.organization.id,
+            user_id='test_user_id_456',
+            notification_type='email',
+            template_code='welcome_email',
+            request_id='req_events_1',
+        )
+
+        from .authentication import OrganizationUser
+        patcher = patch(
+            'gateway_api.authentication.APIKeyAuthentication.authenticate_async',
+            new=AsyncMock(return_value=(OrganizationUser(self.organization.id, self.organization.name, self.organization.quota_limit), None))
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_writer_buffers_until_flushed(self):
+        from asgiref.sync import async_to_sync
+        from .events import EventWriter
+        from .models import NotificationEvent
+
+        writer = EventWriter(batch_size=10, flush_interval=60)
+
+        async def record_and_count():
+            writer.record(self.notification.id, self.organization.id, 'queued', worker='gateway')
+            writer.record(self.notification.id, self.organization.id, 'processing', previous_status='queued', worker='email')
+            buffered = await NotificationEvent.objects.acount()
+            with patch.object(NotificationEvent.objects, 'bulk_create', wraps=NotificationEvent.objects.bulk_create) as bulk_create:
+                written = await writer.flush()
+            return buffered, written, bulk_create.call_count
+
+        buffered, written, inserts = async_to_sync(record_and_count)()
+        self.assertEqual(buffered, 0)
+        self.assertEqual(written, 2)
+        self.assertEqual(inserts, 1)
+        self.assertEqual(NotificationEvent.objects.filter(notification_id=self.notification.id).count(), 2)
+
+    def test_full_batch_flush_is_held_until_done(self):
+        from asgiref.sync import async_to_sync
+        from .events import EventWriter
+
+        writer = EventWriter(batch_size=2, flush_interval=60)
+
+        async def write(*args):
+            batch, writer._buffer = writer._buffer, []
+            return len(batch)
+
+        async def fill_batch_and_close():
+            with patch.object(writer, 'flush', new=AsyncMock(side_effect=write)) as flush:
+                writer.record(self.notification.id, self.organization.id, 'queued')
+                writer.record(self.notification.id, self.organization.id, 'processing')
+                held = len(writer._flushes)
+                await writer.close()
+            return held, flush.await_count, len(writer._flushes)
+
+        held, flushes, left = async_to_sync(fill_batch_and_close)()
+        # The full batch's flush is referenced until close has waited for it
+        self.assertEqual(held, 1)
+        self.assertEqual(flushes, 1)
+        self.assertEqual(left, 0)
+
+    @patch('gateway_api.views.update_quota')
+    def test_status_updates_are_recorded_in_order(self, mock_update_quota):
+        url = reverse('internal_email_status')
+        headers = {'HTTP_X_INTERNAL_SECRET': settings.INTERNAL_API_SECRET}
+        for new_status, extra in [('failed', {'error': 'SMTP timeout', 'attempt': 1}), ('delivered', {'attempt': 2})]:
+            response = self.client.post(url, {
+                'notification_id': self.notification.id,
+                'organization_id': self.organization.id,
+                'status': new_status,
+                'worker': 'email-worker-1',
+                **extra
+            }, format='json', **headers)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(
+            reverse('notification_events', args=[self.notification.id]),
+            HTTP_X_API_KEY=MOCK_API_KEY
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data']['status'], 'delivered')
+        events = response.data['data']['events']
+        self.assertEqual([e['status'] for e in events], ['failed', 'delivered'])
+        self.assertEqual([e['previous_status'] for e in events], ['queued', 'failed'])
+        self.assertEqual(events[0]['error_message'], 'SMTP timeout')
+        self.assertEqual([e['attempt'] for e in events], [1, 2])
+        self.assertEqual(events[1]['worker'], 'email-worker-1')
+
+    @patch('gateway_api.views.handle_status_update')
+    def test_status_update_with_out_of_range_attempt_is_rejected(self, mock_handle_status_update):
+        url = reverse('internal_email_status')
+        headers = {'HTTP_X_INTERNAL_SECRET': settings.INTERNAL_API_SECRET}
+        for attempt in (-1, 40000, 'second'):
+            response = self.client.post(url, {
+                'notification_id': self.notification.id,
+                'organization_id': self.organization.id,
+                'status': 'failed',
+                'attempt': attempt,
+            }, format='json', **headers)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('attempt', response.data['message'])
+        mock_handle_status_update.assert_not_called()
+
+    def test_writer_drops_only_the_rows_the_database_refuses(self):
+        from asgiref.sync import async_to_sync
+        from .events import EventWriter
+        from .models import NotificationEvent
+
+        writer = EventWriter(batch_size=3, flush_interval=60)
+
+        async def record_and_flush():
+            for attempt in (1, -1, 2, 3):
+                writer.record(self.notification.id, self.organization.id, 'failed', attempt=attempt)
+            with self.assertLogs('gateway_api.events', 'ERROR'):
+                return await writer.flush()
+
+        # The bad row fails the first chunk's INSERT; the rest of it and the next chunk are kept
+        self.assertEqual(async_to_sync(record_and_flush)(), 3)
+        self.assertEqual(
+            sorted(NotificationEvent.objects.filter(notification_id=self.notification.id).values_list('attempt', flat=True)),
+            [1, 2, 3],
+        )
+
+    def test_events_of_other_organization_are_not_found(self):
+        Notification.objects.filter(id=self.notification.id).update(organization_id='another_org')
+        response = self.client.get(
+            reverse('notification_events', args=[self.notification.id]),
+            HTTP_X_API_KEY=MOCK_API_KEY
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ArchiveNotificationsTestCase(TestCase):
+    """Tests for the archive_notifications management command"""
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir)
+        self.now = timezone.now()
+        for i in range(3):
+            self._notification(f'archive_{i}', self.now - timezone.timedelta(hours=3 + i))
+        self._notification('archive_recent', self.now)
+
+    def _notification(self, notification_id, created_at):
+        Notification.objects.create(
+            id=notification_id,
+            correlation_id=f'corr_{notification_id}',
+            organization_id='archive_org',
+            user_id='user',
+            notification_type='email',
+            template_code='welcome_email',
+            request_id=f'req_{notification_id}',
+        )
+        # auto_now_add ignores explicit values
+        Notification.objects.filter(id=notification_id).update(created_at=created_at)
+
+    def _archive(self, *args, command=None):
+        from io import StringIO
+        from django.core.management import call_command
+
+        call_command(command or 'archive_notifications', *args, output_dir=self.output_dir, stdout=StringIO())
+        run_dir, = os.listdir(self.output_dir)
+        with open(os.path.join(self.output_dir, run_dir, 'manifest.json')) as fh:
+            return json.load(fh)
+
+    def _remaining(self):
+        return set(Notification.objects.values_list('id', flat=True))
+
+    def test_archive_then_delete_keeps_rows_committed_during_the_run(self):
+        from .management.commands.archive_notifications import Command
+
+        test = self
+
+        class LateCommit(Command):
+            def archive(self, *args, **kwargs):
+                manifest = super().archive(*args, **kwargs)
+                # Committed under the cutoff after the stream had passed its position
+                test._notification('archive_late', test.now - timezone.timedelta(hours=2, minutes=30))
+                return manifest
+
+        before = (self.now - timezone.timedelta(hours=2)).isoformat()
+        manifest = self._archive('--before', before, command=LateCommit())
+
+        self.assertEqual(manifest['total_rows'], 3)
+        self.assertEqual(manifest['last_row']['id'], 'archive_0')
+        self.assertEqual(self._remaining(), {'archive_late', 'archive_recent'})
+
+    def test_future_cutoff_is_rejected(self):
+        from django.core.management.base import CommandError
+
+        with self.assertRaises(CommandError):
+            self._archive('--before', (self.now + timezone.timedelta(hours=1)).isoformat())
+        self.assertEqual(os.listdir(self.output_dir), [])
+        self.assertEqual(len(self._remaining()), 4)
+
+    def test_no_delete_keeps_archived_rows(self):
+        manifest = self._archive('--older-than-days', '0', '--no-delete')
+
+        self.assertEqual(manifest['total_rows'], 4)
+        self.assertEqual(len(self._remaining()), 4)
+
+
+class QuotaPeriodTestCase(TestCase):
+    """Tests for the UTC-aligned quota periods in gateway_api/quota.py"""
+
+    def test_invalid_period_settings_are_rejected(self):
+        from django.core.exceptions import ImproperlyConfigured
+        from django.test import override_settings
+        from .quota import check_period_settings
+
+        check_period_settings()
+        for overrides, reported in [
+            ({'QUOTA_DEFAULT_PERIOD': 'daily'}, "QUOTA_DEFAULT_PERIOD='daily'"),
+            ({'QUOTA_PERIODS': {'enterprise': 'month', 'pro': 'week'}}, "QUOTA_PERIODS[pro]='week'"),
+        ]:
+            with self.subTest(reported), override_settings(**overrides):
+                with self.assertRaisesMessage(ImproperlyConfigured, reported):
+                    check_period_settings()
+
+    def test_daily_period_is_utc_midnight_aligned(self):
+        from datetime import datetime, timedelta, timezone as dt_timezone
+        from .quota import period_bounds, quota_key
+
+        # 23:30 at UTC-5 is already the next day in UTC
+        now = datetime(2025, 3, 9, 23, 30, tzinfo=dt_timezone(timedelta(hours=-5)))
+        start, end = period_bounds('day', now)
+        self.assertEqual(start, datetime(2025, 3, 10, tzinfo=dt_timezone.utc))
+        self.assertEqual(end, datetime(2025, 3, 11, tzinfo=dt_timezone.utc))
+        self.assertEqual(quota_key('org1', 'day', now), 'quota:org1:d20250310')
+
+    def test_monthly_period_rolls_over_year_end(self):
+        from datetime import datetime, timezone as dt_timezone
+        from .quota import period_bounds, quota_key, key_expires_at
+
+        now = datetime(2025, 12, 31, 23, 59, tzinfo=dt_timezone.utc)
+        start, end = period_bounds('month', now)
+        self.assertEqual(start, datetime(2025, 12, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(end, datetime(2026, 1, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(quota_key('org1', 'month', now), 'quota:org1:m202512')
+        self.assertGreater(key_expires_at('month', now), end)
+
+    def test_plan_period_overrides(self):
+        from django.test import override_settings
+        from .quota import period_for_plan
+
+        with override_settings(QUOTA_DEFAULT_PERIOD='day', QUOTA_PERIODS={'enterprise': 'month'}):
+            self.assertEqual(period_for_plan('enterprise'), 'month')
+            self.assertEqual(period_for_plan('pro'), 'day')
+            self.assertEqual(period_for_plan(None), 'day')
+
+    def test_org_period_falls_back_to_database_plan(self):
+        from asgiref.sync import async_to_sync
+        from django.test import override_settings
+        from .quota import get_org_period, forget_plan
+
+        Organization.objects.create(**{**MOCK_ORGANIZATION_DATA, 'plan': 'enterprise'})
+        forget_plan(MOCK_ORGANIZATION_DATA['id'])
+        with override_settings(QUOTA_PERIODS={'enterprise': 'month'}):
+            self.assertEqual(async_to_sync(get_org_period)(MOCK_ORGANIZATION_DATA['id']), 'month')
+            self.assertEqual(async_to_sync(get_org_period)('missing_org'), settings.QUOTA_DEFAULT_PERIOD)
+
+    def test_quota_caps_match_recipient_and_template(self):
+        from datetime import datetime, timezone as dt_timezone
+        from .quota import cap_key
+        from .quota_caps import matching_caps
+
+        caps = [
+            {'id': 1, 'scope': 'user', 'template_code': 'marketing', 'notification_type': 'push', 'limit': 5, 'period': 'day'},
+            {'id': 2, 'scope': 'template', 'template_code': '', 'notification_type': '', 'limit': 1000, 'period': 'month'},
+        ]
+
+        matched = matching_caps(caps, 'org1', 'user1', 'marketing', 'push')
+        self.assertEqual([cap['id'] for cap, _, _, _ in matched], [1, 2])
+        self.assertIn(':1:user1:', matched[0][1])
+        self.assertIn(':2:marketing:', matched[1][1])
+
+        # An email of the same template only counts against the per-template cap
+        matched = matching_caps(caps, 'org1', 'user1', 'marketing', 'email')
+        self.assertEqual([cap['id'] for cap, _, _, _ in matched], [2])
+
+        now = datetime(2025, 1, 1, 12, tzinfo=dt_timezone.utc)
+        self.assertEqual(cap_key('org1', 1, 'user1', 'day', now), 'quota:cap:org1:1:user1:d20250101')
+
+
+class PartitionsTestCase(TestCase):
+    """Tests for the time-prefixed ids and partition layout in gateway_api/partitions.py"""
+
+    def test_id_carries_its_minting_time(self):
+        from datetime import datetime, timedelta, timezone as dt_timezone
+        from .partitions import ID_TIME_SLACK, created_at_bounds, new_notification_id
+
+        minted_at = datetime(2025, 6, 1, 12, 30, 15, 123000, tzinfo=dt_timezone.utc)
+        notification_id = new_notification_id(minted_at)
+
+        self.assertEqual(len(notification_id), 22)
+        self.assertRegex(notification_id, r'^[A-Za-z0-9_-]{22}$')
+        self.assertNotEqual(notification_id, new_notification_id(minted_at))
+        self.assertEqual(created_at_bounds(notification_id), (minted_at - ID_TIME_SLACK, minted_at + ID_TIME_SLACK))
+        # Milliseconds survive the round trip
+        later = created_at_bounds(new_notification_id(minted_at + timedelta(milliseconds=1)))
+        self.assertEqual(later[0] - created_at_bounds(notification_id)[0], timedelta(milliseconds=1))
+
+    def test_ids_without_a_plausible_time_have_no_bounds(self):
+        from datetime import datetime, timedelta, timezone as dt_timezone
+        from .partitions import ID_TIME_FLOOR, created_at_bounds, new_notification_id
+
+        now = datetime.now(dt_timezone.utc)
+        for notification_id in [
+            None,
+            'notif_1',                                            # legacy id, wrong length
+            'c9bf9e57-1685-4c89-bafb-ff5af830be8a'[:22],          # legacy uuid prefix
+            '!!!!!!!!' + 'a' * 14,                                # not base64
+            new_notification_id(ID_TIME_FLOOR - timedelta(days=1)),
+            new_notification_id(now + timedelta(hours=1)),
+        ]:
+            with self.subTest(notification_id=notification_id):
+                self.assertIsNone(created_at_bounds(notification_id))
+        self.assertIsNotNone(created_at_bounds(new_notification_id(now + timedelta(minutes=1))))
+
+    def test_period_start_is_utc_aligned(self):
+        from datetime import datetime, timedelta, timezone as dt_timezone
+        from .partitions import period_start
+
+        # 01:00 at UTC+2 on Jan 1st is still December 31st in UTC
+        moment = datetime(2025, 1, 1, 1, 0, tzinfo=dt_timezone(timedelta(hours=2)))
+        self.assertEqual(period_start(moment, 'day'), datetime(2024, 12, 31, tzinfo=dt_timezone.utc))
+        self.assertEqual(period_start(moment, 'month'), datetime(2024, 12, 1, tzinfo=dt_timezone.utc))
+
+    def test_next_period_rolls_over_months_and_years(self):
+        from datetime import datetime, timezone as dt_timezone
+        from .partitions import next_period
+
+        def at(year, month, day=1):
+            return datetime(year, month, day, tzinfo=dt_timezone.utc)
+
+        self.assertEqual(next_period(at(2024, 12), 'month'), at(2025, 1))
+        self.assertEqual(next_period(at(2025, 1), 'month'), at(2025, 2))
+        self.assertEqual(next_period(at(2024, 12, 31), 'day'), at(2025, 1, 1))
+        self.assertEqual(next_period(at(2024, 2, 28), 'day'), at(2024, 2, 29))
+
+    def test_partition_names(self):
+        from datetime import datetime, timezone as dt_timezone
+        from django.test import override_settings
+        from .partitions import partition_name
+
+        start = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+        self.assertEqual(partition_name(start, 'month'), 'notifications_p202501')
+        self.assertEqual(partition_name(start, 'day'), 'notifications_p20250101')
+        with override_settings(NOTIFICATION_PARTITION_INTERVAL='week'):
+            with self.assertRaises(ValueError):
+                partition_name(start)
+
+    def test_partition_bounds_are_parsed(self):
+        from datetime import datetime, timezone as dt_timezone
+        from .partitions import _parse_bound
+
+        self.assertEqual(_parse_bound("'2025-01-01 00:00:00+00'"), datetime(2025, 1, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(_parse_bound("'2025-01-01 02:00:00+02'"), datetime(2025, 1, 1, tzinfo=dt_timezone.utc))
+        self.assertIsNone(_parse_bound('MINVALUE'))
+
+    def test_future_partitions_continue_across_the_year_end(self):
+        from datetime import datetime, timezone as dt_timezone
+        from . import partitions
+
+        def at(year, month):
+            return datetime(year, month, 1, tzinfo=dt_timezone.utc)
+
+        existing = [
+            {'name': 'notifications_legacy', 'start': None, 'end': at(2024, 12), 'is_default': False},
+            {'name': 'notifications_p202412', 'start': at(2024, 12), 'end': at(2025, 1), 'is_default': False},
+            {'name': 'notifications_default', 'start': None, 'end': None, 'is_default': True},
+        ]
+        with patch.object(partitions, 'list_partitions', return_value=existing), \
+                patch.object(partitions, 'create_partition', side_effect=lambda connection, start, interval: partitions.partition_name(start, interval)) as create:
+            created = partitions.ensure_future_partitions(None, ahead=2, now=datetime(2024, 12, 15, tzinfo=dt_timezone.utc), interval='month')
+
+        self.assertEqual(created, ['notifications_p202501', 'notifications_p202502'])
+        self.assertEqual([call.args[1] for call in create.call_args_list], [at(2025, 1), at(2025, 2)])
+
+    def test_get_notification_prunes_by_id_time_and_falls_back(self):
+        from .partitions import get_notification, new_notification_id
+
+        def create(notification_id):
+            return Notification.objects.create(
+                id=notification_id,
+                correlation_id=f'corr_{notification_id}',
+                organization_id='partition_org',
+                user_id='user',
+                notification_type='email',
+                template_code='welcome_email',
+                request_id=f'req_{notification_id}',
+            )
+
+        fresh = create(new_notification_id())
+        legacy = create('notif_legacy')
+        # Created well outside the window its id claims (e.g. a restored row)
+        moved = create(new_notification_id())
+        Notification.objects.filter(id=moved.id).update(created_at=timezone.now() - timezone.timedelta(days=30))
+
+        for notification in (fresh, legacy, moved):
+            self.assertEqual(get_notification(notification.id).id, notification.id)
+        with self.assertRaises(Notification.DoesNotExist):
+            get_notification(fresh.id, organization_id='another_org')
+
+
+def clear_redis_keys(pattern):
+    """Delete the Redis keys a test created (tests that need Redis use their own key names)"""
+    from .redis_client import get_redis
+
+    client = get_redis()
+    keys = list(client.scan_iter(pattern))
+    if keys:
+        client.delete(*keys)
+
+
+class WithoutLua:
+    """Redis client wrapper without register_script, so quota.reserve takes its plain-command path"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name):
+        if name == 'register_script':
+            raise AttributeError(name)
+        return getattr(self._client, name)
+
+
+@unittest.skipUnless(settings.REDIS_URL, 'needs Redis')
+class QuotaLeaseTestCase(TestCase):
+    """Tests for quota.reserve and quota.settle, each through its Lua script and through the plain-command fallback"""
+
+    def setUp(self):
+        self.prefix = f'test-reserve-{secrets.token_hex(4)}'
+        self.addCleanup(clear_redis_keys, f'*{self.prefix}*')
+
+    def run_both(self, scenario):
+        """Run ``scenario(client, organization_id)`` once with Lua and once without, on separate orgs"""
+        from asgiref.sync import async_to_sync
+        from .redis_client import get_redis_client
+
+        async def run(wrap, organization_id):
+            return await scenario(wrap(await get_redis_client()), organization_id)
+
+        for label, wrap in (('lua', lambda client: client), ('without lua', WithoutLua)):
+            with self.subTest(label):
+                async_to_sync(run)(wrap, f'{self.prefix}-{label.replace(" ", "-")}')
+
+    def _caps(self, organization_id, *limits):
+        from datetime import datetime, timedelta, timezone as dt_timezone
+
+        expires_at = datetime.now(dt_timezone.utc) + timedelta(hours=1)
+        return [(f'quota:cap:{organization_id}:{i}', limit, expires_at) for i, limit in enumerate(limits)]
+
+    def test_reserved_takes_a_lease_and_a_unit_of_every_cap(self):
+        from .quota import RESERVED, lease_key, reserve
+
+        async def scenario(client, organization_id):
+            caps = self._caps(organization_id, 5, 5)
+            outcome = await reserve(client, organization_id, 'day', 'n1', 10, caps)
+            self.assertEqual(outcome, (RESERVED, None))
+            self.assertEqual(await client.zrange(lease_key(organization_id), 0, -1), ['n1'])
+            self.assertEqual([await client.get(key) for key, _, _ in caps], ['1', '1'])
+
+        self.run_both(scenario)
+
+    def test_block_covered_org_takes_no_lease(self):
+        from .quota import RESERVED, lease_key, reserve
+
+        async def scenario(client, organization_id):
+            caps = self._caps(organization_id, 5)
+            self.assertEqual(await reserve(client, organization_id, 'day', 'n1', None, caps), (RESERVED, None))
+            self.assertEqual(await client.zcard(lease_key(organization_id)), 0)
+            self.assertEqual(await client.get(caps[0][0]), '1')
+
+        self.run_both(scenario)
+
+    def test_rate_limited_after_rate_limit_requests(self):
+        from .quota import RATE_LIMITED, RESERVED, lease_key, reserve
+
+        async def scenario(client, organization_id):
+            outcomes = [
+                await reserve(client, organization_id, 'day', f'n{i}', 10, rate_limit=2)
+                for i in range(3)
+            ]
+            self.assertEqual(outcomes, [(RESERVED, None), (RESERVED, None), (RATE_LIMITED, None)])
+            self.assertEqual(await client.zcard(lease_key(organization_id)), 2)
+            self.assertGreater(await client.ttl(f'rate:{organization_id}'), 0)
+
+        self.run_both(scenario)
+
+    def test_quota_exceeded_counts_delivered_and_pending(self):
+        from .quota import QUOTA_EXCEEDED, RESERVED, lease_key, quota_key, reserve
+
+        async def scenario(client, organization_id):
+            await client.set(quota_key(organization_id, 'day'), 1)
+            self.assertEqual(await reserve(client, organization_id, 'day', 'n1', 2), (RESERVED, None))
+            self.assertEqual(await reserve(client, organization_id, 'day', 'n2', 2), (QUOTA_EXCEEDED, None))
+            self.assertEqual(await client.zrange(lease_key(organization_id), 0, -1), ['n1'])
+
+        self.run_both(scenario)
+
+    def test_exhausted_cap_reserves_nothing(self):
+        from .quota import CAP_EXCEEDED, lease_key, reserve
+
+        async def scenario(client, organization_id):
+            caps = self._caps(organization_id, 5, 1)
+            await client.set(caps[1][0], 1)
+            self.assertEqual(await reserve(client, organization_id, 'day', 'n1', 10, caps), (CAP_EXCEEDED, 1))
+            # Refused by the second cap: neither the first cap nor the org quota is consumed
+            self.assertIsNone(await client.get(caps[0][0]))
+            self.assertEqual(await client.zcard(lease_key(organization_id)), 0)
+
+        self.run_both(scenario)
+
+    def test_repeated_settle_only_releases_its_own_lease(self):
+        from .quota import lease_key, quota_key, reserve, settle
+
+        async def scenario(client, organization_id):
+            for notification_id in ('n1', 'n2'):
+                await reserve(client, organization_id, 'day', notification_id, 10)
+            for _ in range(3):
+                await settle(client, organization_id, 'day', 'n1', delivered=False)
+            self.assertEqual(await client.zrange(lease_key(organization_id), 0, -1), ['n2'])
+            self.assertIsNone(await client.get(quota_key(organization_id, 'day')))
+
+            await settle(client, organization_id, 'day', 'n2', delivered=True)
+            self.assertEqual(await client.zcard(lease_key(organization_id)), 0)
+            self.assertEqual(await client.get(quota_key(organization_id, 'day')), '1')
+
+        self.run_both(scenario)
+
+    def test_settle_without_lease_leaves_a_tombstone(self):
+        from .quota import SETTLED_TTL, settle, settled_key
+
+        async def scenario(client, organization_id):
+            await settle(client, organization_id, 'day', 'early', delivered=True)
+            self.assertEqual(await client.zrange(settled_key(organization_id), 0, -1), ['early'])
+            self.assertLessEqual(await client.ttl(settled_key(organization_id)), SETTLED_TTL)
+
+        self.run_both(scenario)
+
+    def test_settle_trims_lapsed_tombstones(self):
+        import time
+        from .quota import SETTLED_TTL, settle, settled_key
+
+        async def scenario(client, organization_id):
+            # A tombstone written well over SETTLED_TTL ago, refreshed ever since by a busy org
+            await client.zadd(settled_key(organization_id), {'old': time.time() - 1})
+            await settle(client, organization_id, 'day', 'new', delivered=False)
+            self.assertEqual(await client.zrange(settled_key(organization_id), 0, -1), ['new'])
+            deadline = await client.zscore(settled_key(organization_id), 'new')
+            self.assertAlmostEqual(deadline, time.time() + SETTLED_TTL, delta=5)
+
+        self.run_both(scenario)
+
+
+@unittest.skipUnless(settings.REDIS_URL, 'needs Redis (Lua scripts)')
+class SweepQuotaLeasesTestCase(TestCase):
+    """Tests for the sweep_quota_leases management command"""
+
+    def setUp(self):
+        self.organization_id = f'test-sweep-{secrets.token_hex(4)}'
+        self.addCleanup(clear_redis_keys, f'*{self.organization_id}*')
+
+    def test_sweep_releases_only_expired_leases_in_batches(self):
+        import io
+        import time
+        from django.core.management import call_command
+        from .quota import lease_key
+        from .redis_client import get_redis
+
+        client = get_redis()
+        key = lease_key(self.organization_id)
+        now = time.time()
+        client.zadd(key, {f'expired{i}': now - 60 for i in range(5)})
+        client.zadd(key, {'live': now + 600})
+
+        with self.assertLogs('gateway_api.management.commands.sweep_quota_leases', 'WARNING') as logs:
+            call_command('sweep_quota_leases', batch_size=2, stdout=io.StringIO())
+
+        self.assertEqual(client.zrange(key, 0, -1), ['live'])
+        # Three batches for this key, reported as one total
+        self.assertIn(f'Released 5 expired pending-quota lease(s) in {key}', '\n'.join(logs.output))
+
+
+@unittest.skipUnless(settings.REDIS_URL, 'needs Redis (Lua scripts)')
+class QuotaBlockTestCase(TestCase):
+    """Tests for the per-process quota blocks in gateway_api/quota_blocks.py"""
+
+    def setUp(self):
+        self.organization_id = f'test-blocks-{secrets.token_hex(4)}'
+        self.addCleanup(clear_redis_keys, f'*{self.organization_id}*')
+
+    def _block(self, quota_limit=100):
+        from django.test import override_settings
+        from .quota_blocks import QuotaBlock
+
+        with override_settings(QUOTA_LOCAL_BLOCK_SIZE=10):
+            return QuotaBlock(self.organization_id, quota_limit, 'day')
+
+    def _redis_state(self):
+        from .quota import lease_key
+        from .quota_blocks import INSTANCE_ID, blocks_key
+        from .redis_client import get_redis
+
+        client = get_redis()
+        held = client.hget(blocks_key(self.organization_id), INSTANCE_ID)
+        return int(held or 0), set(client.zrange(lease_key(self.organization_id), 0, -1))
+
+    def test_spend_renews_and_reports_spent_ids_as_leases(self):
+        from asgiref.sync import async_to_sync
+
+        block = self._block()
+
+        async def spend_and_renew():
+            self.assertTrue(all([await block.spend(f'n{i}') for i in range(3)]))
+            self.assertEqual(block.available, 7)
+            await block.renew()
+
+        async_to_sync(spend_and_renew)()
+        # Topped back up to the block size; the spent units are now pending leases
+        self.assertEqual(block.available, 10)
+        self.assertEqual(self._redis_state(), (10, {'n0', 'n1', 'n2'}))
+
+    def test_block_never_exceeds_org_limit(self):
+        from asgiref.sync import async_to_sync
+
+        block = self._block(quota_limit=4)
+
+        async def spend_all():
+            return [await block.spend(f'n{i}') for i in range(6)]
+
+        self.assertEqual(async_to_sync(spend_all)(), [True] * 4 + [False] * 2)
+
+    def test_more_concurrent_spenders_than_one_block(self):
+        import asyncio
+        from asgiref.sync import async_to_sync
+
+        block = self._block(quota_limit=25)
+
+        async def spend_concurrently():
+            # All of them find the block empty and wait for the same renewal of 10 units
+            return await asyncio.gather(*(block.spend(f'n{i}') for i in range(30)))
+
+        spent = async_to_sync(spend_concurrently)()
+        self.assertEqual(spent.count(True), 25)
+
+    def test_refund_before_and_after_renewal(self):
+        from asgiref.sync import async_to_sync
+
+        block = self._block()
+
+        async def spend_refund_renew():
+            await block.spend('kept')
+            await block.spend('local')
+            await block.spend('reported')
+            await block.refund('local')
+            self.assertEqual(block.available, 8)
+            await block.renew()
+            # Already a lease in Redis: the refund has to remove it there
+            await block.refund('reported')
+
+        async_to_sync(spend_refund_renew)()
+        self.assertEqual(self._redis_state(), (10, {'kept'}))
+
+    def test_release_returns_unspent_units(self):
+        from asgiref.sync import async_to_sync
+
+        block = self._block()
+
+        async def spend_and_release():
+            await block.spend('n0')
+            await block.release()
+
+        async_to_sync(spend_and_release)()
+        self.assertEqual(self._redis_state(), (0, {'n0'}))
+
+
+@unittest.skipUnless(settings.REDIS_URL, 'needs Redis')
+class SyncQuotaUsageTestCase(TestCase):
+    """Tests for the sync_quota_usage management command"""
+
+    def test_restore_after_marker_loss_only_tops_up_lost_counters(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from .management.commands.sync_quota_usage import SYNC_MARKER_KEY
+        from .quota import period_bounds, period_for_plan, quota_key
+        from .redis_client import get_redis
+
+        prefix = f'test-sync-{secrets.token_hex(4)}'
+        self.addCleanup(clear_redis_keys, f'*{prefix}*')
+        period = period_for_plan('pro')
+        counters = {}
+        # org -> counter before the cycle (None: missing) and the expected result; 5 was synced
+        for name, before, expected in [('missing', None, 5), ('lost', 2, 7), ('live', 9, 9)]:
+            org = Organization.objects.create(
+                **{**MOCK_ORGANIZATION_DATA, 'id': f'{prefix}-{name}', 'api_key_hash': hash_api_key(f'{prefix}-{name}')},
+                quota_used=5, quota_reset_at=period_bounds(period)[1],
+            )
+            counters[quota_key(org.id, period)] = (before, expected)
+
+        redis = get_redis()
+        for key, (before, _) in counters.items():
+            if before is not None:
+                redis.set(key, before)
+        # Evicted marker, live counters: the 'live' org must not be counted twice
+        redis.delete(SYNC_MARKER_KEY)
+
+        call_command('sync_quota_usage', stdout=StringIO())
+
+        self.assertEqual({key: int(redis.get(key)) for key in counters}, {key: expected for key, (_, expected) in counters.items()})
+        self.assertTrue(redis.exists(SYNC_MARKER_KEY))
+        self.assertEqual(Organization.objects.get(id=f'{prefix}-lost').quota_used, 7)
+
+
+@unittest.skipUnless(settings.REDIS_URL, 'needs Redis (Lua scripts)')
+class UsageTestCase(TestCase):
+    """Tests for the usage buckets in gateway_api/usage.py and the compact_usage command"""
+
+    def setUp(self):
+        self.organization_id = f'test-usage-{secrets.token_hex(4)}'
+        self.addCleanup(clear_redis_keys, f'*{self.organization_id}*')
+
+    def _write_bucket(self, granularity, start, **counts):
+        from .redis_client import get_redis
+        from .usage import bucket_key, bucket_stamp, index_key
+
+        client = get_redis()
+        stamp = bucket_stamp(granularity, start)
+        if counts:
+            client.hset(bucket_key(self.organization_id, granularity, stamp), mapping=counts)
+        client.zadd(index_key(self.organization_id, granularity), {stamp: start.timestamp()})
+
+    def _read(self, granularity, start, end):
+        from asgiref.sync import async_to_sync
+        from .usage import read_usage
+
+        rows = async_to_sync(read_usage)(self.organization_id, granularity, start, end)
+        return [(row['start'], row['granularity'], row['counts']) for row in rows]
+
+    def test_recorder_writes_one_bucket_per_org_and_minute(self):
+        from asgiref.sync import async_to_sync
+        from .redis_client import get_redis
+        from .usage import UsageRecorder, bucket_key, index_key
+
+        recorder = UsageRecorder(flush_interval=60)
+
+        async def record_and_flush():
+            for _ in range(3):
+                recorder.record(self.organization_id, 'accepted')
+            recorder.record(self.organization_id, 'rejected:quota_exceeded', 2)
+            recorder.record(None, 'accepted')
+            flushed = await recorder.flush()
+            await recorder.close()
+            return flushed
+
+        self.assertEqual(async_to_sync(record_and_flush)(), 1)
+        client = get_redis()
+        stamps = client.zrange(index_key(self.organization_id, 'minute'), 0, -1)
+        self.assertEqual(len(stamps), 1)
+        self.assertEqual(
+            client.hgetall(bucket_key(self.organization_id, 'minute', stamps[0])),
+            {'accepted': '3', 'rejected:quota_exceeded': '2'},
+        )
+        self.assertGreater(client.ttl(bucket_key(self.organization_id, 'minute', stamps[0])), 0)
+
+    def test_read_usage_merges_every_resolution(self):
+        from datetime import datetime, timezone as dt_timezone
+
+        def at(day, hour=0, minute=0):
+            return datetime(2025, 1, day, hour, minute, tzinfo=dt_timezone.utc)
+
+        # Jan 1 already compacted into a day, 09:00 into an hour, 10:xx still in minutes
+        self._write_bucket('day', at(1), accepted=50)
+        self._write_bucket('hour', at(2, 9), accepted=5, failed=1)
+        self._write_bucket('minute', at(2, 10, 1), accepted=2)
+        self._write_bucket('minute', at(2, 10, 2), accepted=3, delivered=1)
+        start, end = at(1), at(2, 11)
+
+        self.assertEqual(self._read('minute', start, end), [
+            (at(1).isoformat(), 'day', {'accepted': 50}),
+            (at(2, 9).isoformat(), 'hour', {'accepted': 5, 'failed': 1}),
+            (at(2, 10, 1).isoformat(), 'minute', {'accepted': 2}),
+            (at(2, 10, 2).isoformat(), 'minute', {'accepted': 3, 'delivered': 1}),
+        ])
+        self.assertEqual(self._read('hour', start, end), [
+            (at(1).isoformat(), 'day', {'accepted': 50}),
+            (at(2, 9).isoformat(), 'hour', {'accepted': 5, 'failed': 1}),
+            (at(2, 10).isoformat(), 'hour', {'accepted': 5, 'delivered': 1}),
+        ])
+        self.assertEqual(self._read('day', start, end), [
+            (at(1).isoformat(), 'day', {'accepted': 50}),
+            (at(2).isoformat(), 'day', {'accepted': 10, 'failed': 1, 'delivered': 1}),
+        ])
+        # Buckets ending before the range start are left out
+        self.assertEqual(self._read('minute', at(2, 10, 2), end), [
+            (at(2, 10, 2).isoformat(), 'minute', {'accepted': 3, 'delivered': 1}),
+        ])
+
+    def test_compact_folds_old_minutes_without_changing_totals(self):
+        from datetime import datetime, timedelta, timezone as dt_timezone
+        from io import StringIO
+        from django.core.management import call_command
+        from .redis_client import get_redis
+        from .usage import bucket_key, bucket_stamp, bucket_start, index_key
+
+        now = datetime.now(dt_timezone.utc)
+        old_hour = bucket_start('hour', now - timedelta(seconds=settings.USAGE_MINUTE_RETENTION + 3600))
+        recent = bucket_start('minute', now)
+        self._write_bucket('minute', old_hour + timedelta(minutes=1), accepted=2)
+        self._write_bucket('minute', old_hour + timedelta(minutes=2), accepted=3, failed=1)
+        # Index entry whose bucket already expired: folds into nothing
+        self._write_bucket('minute', old_hour - timedelta(hours=1))
+        self._write_bucket('minute', recent, accepted=1)
+        start, end = bucket_start('day', old_hour), now + timedelta(minutes=1)
+        before = self._read('day', start, end)
+
+        call_command('compact_usage', stdout=StringIO())
+
+        client = get_redis()
+        self.assertEqual(client.zrange(index_key(self.organization_id, 'minute'), 0, -1), [bucket_stamp('minute', recent)])
+        self.assertFalse(client.exists(bucket_key(self.organization_id, 'minute', bucket_stamp('minute', old_hour + timedelta(minutes=1)))))
+        self.assertEqual(client.zrange(index_key(self.organization_id, 'hour'), 0, -1), [bucket_stamp('hour', old_hour)])
+        self.assertEqual(
+            client.hgetall(bucket_key(self.organization_id, 'hour', bucket_stamp('hour', old_hour))),
+            {'accepted': '5', 'failed': '1'},
+        )
+        self.assertEqual(self._read('day', start, end), before)
+
+
+class APIKeyFilterTestCase(TestCase):
+    """Tests for the in-memory API key filter in gateway_api/key_filter.py"""
+
+    def setUp(self):
+        from . import key_filter
+        self.key_filter = key_filter
+        for name in ('_filter', '_loaded_until', '_load_failed_at', '_listening_since'):
+            setattr(key_filter, name, None)
+            self.addCleanup(setattr, key_filter, name, None)
+        self.organization = Organization.objects.create(**MOCK_ORGANIZATION_DATA)
+
+    def test_filter_has_no_false_negatives(self):
+        key_filter = self.key_filter.KeyFilter(1000, 0.01)
+        hashes = [self.key_filter.key_hash(f'org_{i}') for i in range(1000)]
+        for key_hash in hashes:
+            key_filter.add(key_hash)
+        self.assertTrue(all(key_hash in key_filter for key_hash in hashes))
+        false_positives = sum(self.key_filter.key_hash(f'other_{i}') in key_filter for i in range(1000))
+        self.assertLess(false_positives, 50)
+
+    def test_unknown_key_rejected_without_redis(self):
+        from asgiref.sync import async_to_sync
+        from rest_framework.exceptions import AuthenticationFailed
+        from .authentication import APIKeyAuthentication
+
+        # Subscribed to invalidations before the load: a miss is final
+        self.key_filter.set_listening(timezone.now())
+        async_to_sync(self.key_filter.ensure_loaded)()
+        self.assertTrue(self.key_filter.might_exist(self.key_filter.key_hash(MOCK_API_KEY)))
+
+        request = MagicMock(headers={'X-API-Key': 'org_not_a_real_key'})
+        with patch('gateway_api.authentication.get_redis_client') as get_redis_client:
+            with self.assertRaises(AuthenticationFailed):
+                async_to_sync(APIKeyAuthentication().authenticate_async)(request)
+        get_redis_client.assert_not_called()
+
+    def test_keys_created_after_loading_are_known(self):
+        from asgiref.sync import async_to_sync
+
+        async_to_sync(self.key_filter.ensure_loaded)()
+        Organization.objects.create(**{**MOCK_ORGANIZATION_DATA, 'id': 'org_new', 'api_key_hash': hash_api_key('org_new_key')})
+        self.assertTrue(self.key_filter.might_exist(self.key_filter.key_hash('org_new_key')))
+
+    def test_miss_is_trusted_only_after_a_load_since_subscribing(self):
+        from asgiref.sync import async_to_sync
+
+        unknown = self.key_filter.key_hash('org_not_a_real_key')
+        async_to_sync(self.key_filter._load)(full=True)
+        self.assertTrue(self.key_filter.might_exist(unknown))
+        # Keys created between the load and the subscription were heard by nobody
+        self.key_filter.set_listening(timezone.now())
+        self.assertTrue(self.key_filter.might_exist(unknown))
+        async_to_sync(self.key_filter._load)(full=False)
+        self.assertFalse(self.key_filter.might_exist(unknown))
+        self.key_filter.set_listening(None)
+        self.assertTrue(self.key_filter.might_exist(unknown))
+
+    def test_key_created_elsewhere_is_looked_up_and_added(self):
+        from asgiref.sync import async_to_sync
+        from .authentication import APIKeyAuthentication
+
+        async_to_sync(self.key_filter.ensure_loaded)()
+        # Saved by another process: no signal reaches this one
+        Organization.objects.bulk_create([Organization(**{**MOCK_ORGANIZATION_DATA, 'id': 'org_elsewhere', 'api_key_hash': hash_api_key('org_elsewhere_key')})])
+        redis_client = MagicMock(get=AsyncMock(return_value=None), setex=AsyncMock())
+
+        request = MagicMock(headers={'X-API-Key': 'org_elsewhere_key'})
+        with patch('gateway_api.authentication.get_redis_client', new=AsyncMock(return_value=redis_client)):
+            user, _ = async_to_sync(APIKeyAuthentication().authenticate_async)(request)
+
+        self.assertEqual(user.organization_id, 'org_elsewhere')
+        self.assertIn(hash_api_key('org_elsewhere_key'), self.key_filter._filter)
+
+    def test_failed_load_is_not_retried_by_every_request(self):
+        from asgiref.sync import async_to_sync
+
+        async def ensure_loaded_twice():
+            await self.key_filter.ensure_loaded()
+            await self.key_filter.ensure_loaded()
+            await self.key_filter.stop()
+
+        with patch.object(self.key_filter, 'database_sync_to_async', side_effect=RuntimeError('database down')) as load, \
+                self.assertLogs('gateway_api.key_filter', 'ERROR'):
+            async_to_sync(ensure_loaded_twice)()
+        self.assertEqual(load.call_count, 1)
+        self.assertIsNone(self.key_filter._filter)
+        self.assertTrue(self.key_filter.might_exist(hash_api_key(MOCK_API_KEY)))
+
+
+class AuthenticateAsyncTestCase(TestCase):
+    """Tests for APIKeyAuthentication.authenticate_async: Redis cache, negative cache and database fallback"""
+
+    def setUp(self):
+        from django.test import override_settings
+
+        self.organization = Organization.objects.create(**MOCK_ORGANIZATION_DATA)
+        self.redis = MagicMock(get=AsyncMock(return_value=None), setex=AsyncMock(), delete=AsyncMock())
+        for patcher in [
+            patch('gateway_api.authentication.get_redis_client', new=AsyncMock(return_value=self.redis)),
+            patch('gateway_api.authentication.invalidation.ensure_listener'),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # Without the key filter every key reaches the cache
+        no_filter = override_settings(API_KEY_FILTER_CAPACITY=0)
+        no_filter.enable()
+        self.addCleanup(no_filter.disable)
+
+    def _authenticate(self, api_key=MOCK_API_KEY):
+        from asgiref.sync import async_to_sync
+        from .authentication import APIKeyAuthentication
+
+        request = MagicMock(headers={'X-API-Key': api_key})
+        return async_to_sync(APIKeyAuthentication().authenticate_async)(request)
+
+    def _cache_key(self, api_key=MOCK_API_KEY):
+        from .authentication import api_key_cache_key
+        return api_key_cache_key(hash_api_key(api_key))
+
+    def test_cache_hit_needs_no_database(self):
+        cached = {'organization_id': 'cached_org', 'name': 'Cached', 'quota_limit': 5, 'plan': 'free'}
+        self.redis.get.return_value = json.dumps(cached)
+
+        user, _ = self._authenticate()
+
+        # cached_org is not in the database: the answer came from Redis alone
+        self.assertEqual((user.organization_id, user.plan, user.quota_limit), ('cached_org', 'free', 5))
+        self.redis.get.assert_awaited_once_with(self._cache_key())
+        self.redis.setex.assert_not_awaited()
+
+    def test_cache_miss_reads_the_database_and_caches_it(self):
+        from .authentication import API_KEY_CACHE_TTL
+
+        user, _ = self._authenticate()
+
+        self.assertEqual(user.organization_id, self.organization.id)
+        key, ttl, value = self.redis.setex.await_args.args
+        self.assertEqual((key, ttl), (self._cache_key(), API_KEY_CACHE_TTL))
+        self.assertEqual(json.loads(value)['organization_id'], self.organization.id)
+
+    def test_unknown_key_is_remembered_as_invalid(self):
+        from rest_framework.exceptions import AuthenticationFailed
+        from .authentication import INVALID_KEY_MARKER
+
+        with self.assertRaises(AuthenticationFailed):
+            self._authenticate('org_not_a_real_key')
+        self.redis.setex.assert_awaited_once_with(
+            self._cache_key('org_not_a_real_key'), settings.API_KEY_NEGATIVE_TTL, INVALID_KEY_MARKER
+        )
+
+    def test_invalid_key_marker_is_rejected_without_the_database(self):
+        from rest_framework.exceptions import AuthenticationFailed
+        from .authentication import INVALID_KEY_MARKER
+
+        self.redis.get.return_value = INVALID_KEY_MARKER
+        with patch.object(Organization.objects, 'aget') as aget:
+            with self.assertRaises(AuthenticationFailed):
+                self._authenticate()
+        aget.assert_not_called()
+        self.redis.setex.assert_not_awaited()
+
+    def test_redis_error_falls_back_to_the_database(self):
+        self.redis.get.side_effect = ConnectionError('redis down')
+        self.redis.setex.side_effect = ConnectionError('redis down')
+
+        with self.assertLogs('gateway_api.authentication', 'WARNING'):
+            user, _ = self._authenticate()
+        self.assertEqual(user.organization_id, self.organization.id)
+
+    def test_database_error_fails_authentication(self):
+        from rest_framework.exceptions import AuthenticationFailed
+
+        with patch.object(Organization.objects, 'aget', new=AsyncMock(side_effect=RuntimeError('database down'))), \
+                self.assertLogs('gateway_api.authentication', 'ERROR'):
+            with self.assertRaisesMessage(AuthenticationFailed, 'Database error during authentication'):
+                self._authenticate()
+        self.redis.setex.assert_not_awaited()
+
+
+class AsyncDispatchTestCase(TestCase):
+    """Tests for the async request pipeline of AsyncAPIView"""
+
+    def _view(self):
+        import threading
+        from rest_framework.permissions import IsAuthenticated
+        from rest_framework.response import Response
+        from django.views.decorators.csrf import csrf_exempt
+        from .authentication import APIKeyAuthentication
+        from .views import AsyncAPIView
+
+        threads = []
+
+        class AsyncProbeView(AsyncAPIView):
+            authentication_classes = [APIKeyAuthentication]
+            permission_classes = [IsAuthenticated]
+
+            @csrf_exempt
+            async def get(self, request):
+                threads.append(threading.get_ident())
+                return Response({'ok': True})
+
+        class SyncProbeView(AsyncAPIView):
+            authentication_classes = [APIKeyAuthentication]
+            permission_classes = [IsAuthenticated]
+
+            def get(self, request):
+                threads.append(threading.get_ident())
+                return Response({'ok': True})
+
+        return AsyncProbeView.as_view(), SyncProbeView.as_view(), threads
+
+    def _call(self, view):
+        import threading
+        from asgiref.sync import async_to_sync
+        from django.test import AsyncRequestFactory
+
+        async def call():
+            loop_thread = threading.get_ident()
+            request = AsyncRequestFactory().get('/probe/', HTTP_X_API_KEY=MOCK_API_KEY)
+            return loop_thread, await view(request)
+
+        return async_to_sync(call)()
+
+    def test_async_handler_has_no_thread_hops(self):
+        import asyncio
+        from .authentication import OrganizationUser
+
+        view, _, threads = self._view()
+        user = OrganizationUser(MOCK_ORGANIZATION_DATA['id'], MOCK_ORGANIZATION_DATA['name'], MOCK_ORGANIZATION_DATA['quota_limit'])
+        with patch('gateway_api.authentication.APIKeyAuthentication.authenticate_async', new=AsyncMock(return_value=(user, None))), \
+                patch('gateway_api.views.sync_to_async', side_effect=AssertionError('thread hop')):
+            loop_thread, response = self._call(view)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(threads, [loop_thread])
+        # Rendered on the loop; Django's async handler awaits render() instead of using a thread
+        self.assertTrue(response.is_rendered)
+        self.assertTrue(asyncio.iscoroutinefunction(response.render))
+
+    def test_sync_handler_runs_off_the_loop(self):
+        from .authentication import OrganizationUser
+
+        _, view, threads = self._view()
+        user = OrganizationUser(MOCK_ORGANIZATION_DATA['id'], MOCK_ORGANIZATION_DATA['name'], MOCK_ORGANIZATION_DATA['quota_limit'])
+        with patch('gateway_api.authentication.APIKeyAuthentication.authenticate_async', new=AsyncMock(return_value=(user, None))):
+            loop_thread, response = self._call(view)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], loop_thread)
+
+
+    def test_middleware_stack_has_no_thread_hops(self):
+        import asgiref.sync
+        from asgiref.sync import async_to_sync
+        from django.test import AsyncClient
+        from .authentication import OrganizationUser
+
+        hops = []
+        sync_to_async_call = asgiref.sync.SyncToAsync.__call__
+
+        async def counting_call(self, *args, **kwargs):
+            hops.append(getattr(self.func, '__qualname__', repr(self.func)))
+            return await sync_to_async_call(self, *args, **kwargs)
+
+        user = OrganizationUser(MOCK_ORGANIZATION_DATA['id'], MOCK_ORGANIZATION_DATA['name'], MOCK_ORGANIZATION_DATA['quota_limit'])
+        with patch('gateway_api.authentication.APIKeyAuthentication.authenticate_async', new=AsyncMock(return_value=(user, None))), \
+                patch('gateway_api.views.read_usage', new=AsyncMock(return_value=[])), \
+                patch.object(asgiref.sync.SyncToAsync, '__call__', counting_call):
+            response = async_to_sync(AsyncClient().get)(reverse('usage'), HTTP_X_API_KEY=MOCK_API_KEY)
+
+        self.assertEqual(response.status_code, 200)
+        # Only Django's own request_started signal and response.close() remain
+        self.assertEqual(sorted(hops), ['HttpResponseBase.close', 'Signal.send'])
+
+    def test_schema_lists_async_views(self):
+        from drf_spectacular.generators import SchemaGenerator
+
+        paths = SchemaGenerator().get_schema(request=None, public=True)['paths']
+
+        self.assertIn('get', paths['/api/v1/notifications/'])
+        create = paths['/api/v1/notifications/']['post']
+        self.assertEqual(create['operationId'], 'create_notification')
+        self.assertIn('requestBody', create)
+        self.assertIn('202', create['responses'])
+        self.assertEqual(paths['/api/v1/usage/']['get']['operationId'], 'get_usage')
+        self.assertIn('get', paths['/api/v1/users/{user_id}/'])
+
+
+class FastIngestTestCase(TestCase):
+    """Tests for the raw ASGI ingest route in gateway_api/fast_ingest.py"""
+
+    def _post(self, body, headers):
+        from asgiref.sync import async_to_sync
+        from .fast_ingest import FastIngestMiddleware
+
+        app = FastIngestMiddleware(AsyncMock(), path='/fast/')
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            'type': 'http',
+            'method': 'POST',
+            'path': '/fast/',
+            'headers': [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+        }
+        async_to_sync(app)(scope, receive, send)
+        app.app.assert_not_called()
+        return sent[0]['status'], dict(sent[0]['headers']), json.loads(sent[1]['body'])
+
+    def test_runs_the_shared_pipeline(self):
+        from .authentication import OrganizationUser
+
+        user = OrganizationUser(MOCK_ORGANIZATION_DATA['id'], MOCK_ORGANIZATION_DATA['name'], MOCK_ORGANIZATION_DATA['quota_limit'])
+        accepted = {'success': True, 'data': {'notification_id': 'n1'}, 'message': 'Notification accepted for processing', 'meta': {}}
+        payload = {'notification_type': 'email', 'user_id': 'u1', 'template_code': 'welcome'}
+        with patch('gateway_api.authentication.APIKeyAuthentication.authenticate_async', new=AsyncMock(return_value=(user, None))), \
+                patch('gateway_api.views.NotificationAPIView.create_notification', new=AsyncMock(return_value=(202, accepted))) as pipeline:
+            status_code, headers, body = self._post(
+                json.dumps(payload).encode(),
+                {'Content-Type': 'application/json', 'X-API-Key': MOCK_API_KEY, 'X-Correlation-ID': 'corr-1'},
+            )
+
+        self.assertEqual(status_code, 202)
+        self.assertEqual(body, accepted)
+        self.assertEqual(headers[b'x-correlation-id'], b'corr-1')
+        pipeline.assert_awaited_once_with(payload, user, MOCK_API_KEY, 'corr-1')
+
+    def test_missing_api_key_matches_drf_response(self):
+        status_code, headers, body = self._post(b'{}', {'Content-Type': 'application/json'})
+
+        self.assertEqual(status_code, 401)
+        self.assertEqual(headers[b'www-authenticate'], b'X-API-Key')
+        self.assertEqual(body, {
+            'success': False,
+            'error': 'Authentication credentials were not provided.',
+            'message': 'Authentication credentials were not provided.',
+            'meta': {}
+        })
+
+
+class RedisClientTestCase(TestCase):
+    """Tests for the shared async Redis client in gateway_api/redis_client.py"""
+
+    @unittest.skipUnless(settings.REDIS_URL, 'in-memory client is shared by every loop')
+    def test_one_client_per_event_loop(self):
+        from asgiref.sync import async_to_sync
+        from . import redis_client
+
+        async def clients():
+            first = await redis_client.get_redis_client()
+            second = await redis_client.get_redis_client()
+            await redis_client.close_redis_client()
+            return first, second
+
+        first, second = async_to_sync(clients)()
+        self.assertIs(first, second)
+        other, _ = async_to_sync(clients)()
+        self.assertIsNot(first, other)
+
+    @unittest.skipUnless(settings.REDIS_URL, 'in-memory client has no pool')
+    def test_pool_gauges_follow_connections(self):
+        from asgiref.sync import async_to_sync
+        from . import redis_client
+        from .metrics import REDIS_POOL_CONNECTIONS, REDIS_POOL_MAX_CONNECTIONS
+
+        async def use_pool():
+            client = await redis_client.get_redis_client()
+            await client.ping()
+            in_use = REDIS_POOL_CONNECTIONS.labels('in_use')._value.get()
+            idle = REDIS_POOL_CONNECTIONS.labels('idle')._value.get()
+            limit = REDIS_POOL_MAX_CONNECTIONS._value.get()
+            await redis_client.close_redis_client()
+            return in_use, idle, limit
+
+        in_use, idle, limit = async_to_sync(use_pool)()
+        self.assertEqual((in_use, idle, limit), (0, 1, settings.REDIS_MAX_CONNECTIONS))
+        self.assertEqual(REDIS_POOL_MAX_CONNECTIONS._value.get(), 0)
+
+
+class LifespanTestCase(TestCase):
+    """Tests for the ASGI lifespan handling in gateway_api/lifecycle.py"""
+
+    def test_lifespan_runs_startup_and_shutdown(self):
+        from asgiref.sync import async_to_sync
+        from .lifecycle import LifespanMiddleware
+
+        messages = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        app = LifespanMiddleware(AsyncMock())
+        with patch('gateway_api.lifecycle.startup', new=AsyncMock()) as startup, \
+                patch('gateway_api.lifecycle.shutdown', new=AsyncMock()) as shutdown:
+            async_to_sync(app)({'type': 'lifespan'}, receive, send)
+        startup.assert_awaited_once()
+        shutdown.assert_awaited_once()
+        self.assertEqual(sent, ['lifespan.startup.complete', 'lifespan.shutdown.complete'])
+        app.app.assert_not_called()
+
+    def test_shutdown_flushes_buffered_usage(self):
+        from asgiref.sync import async_to_sync
+        from . import lifecycle, usage
+
+        self.addCleanup(usage.get_usage_recorder()._pending.clear)
+
+        async def record_and_shut_down():
+            usage.get_usage_recorder().record(self.id(), 'accepted')
+            with patch('gateway_api.lifecycle.rabbitmq.close_connection', new=AsyncMock()):
+                await lifecycle.shutdown()
+
+        with patch.object(usage.UsageRecorder, 'flush', new=AsyncMock(return_value=1)) as flush:
+            async_to_sync(record_and_shut_down)()
+        flush.assert_awaited()
+
+
+class InvalidationTestCase(TestCase):
+    """Tests for cache invalidation events in gateway_api/invalidation.py"""
+
+    def setUp(self):
+        self.organization = Organization.objects.create(**MOCK_ORGANIZATION_DATA)
+
+    def test_key_rotation_drops_old_and_new_cache_entries(self):
+        from .authentication import api_key_cache_key
+
+        organization = Organization.objects.get(id=self.organization.id)
+        old_hash = organization.api_key_hash
+        organization.set_api_key('org_RotatedKey')
+        with patch('gateway_api.invalidation.publish') as publish, self.captureOnCommitCallbacks(execute=True):
+            organization.save()
+            # Not before the transaction commits
+            publish.assert_not_called()
+        publish.assert_called_once()
+        self.assertCountEqual(
+            publish.call_args.kwargs['delete_keys'],
+            [api_key_cache_key(old_hash), api_key_cache_key(hash_api_key('org_RotatedKey'))],
+        )
+        # Other gateways' key filters learn the new key from the event
+        self.assertEqual(publish.call_args.kwargs['api_key_hash'], hash_api_key('org_RotatedKey'))
+
+        with patch('gateway_api.invalidation.publish') as publish, self.captureOnCommitCallbacks(execute=True):
+            organization.save(update_fields=['updated_at'])
+        publish.assert_not_called()
+
+        with patch('gateway_api.invalidation.publish') as publish, self.captureOnCommitCallbacks(execute=True):
+            organization.save(update_fields=['name'])
+        self.assertIsNone(publish.call_args.kwargs['api_key_hash'])
+
+    def test_rotated_key_event_adds_new_key_to_filter(self):
+        from . import invalidation, key_filter
+
+        with patch.object(key_filter, 'add_key') as add_key:
+            invalidation.apply({'kind': 'organization', 'organization_id': self.organization.id, 'api_key_hash': 'rotated'})
+        add_key.assert_called_once_with('rotated')
+
+    def test_quota_caps_command_reports_whether_gateways_were_told(self):
+        import io
+        from django.core.management import call_command
+
+        for published, expected in ((True, 'within seconds'), (False, 'Could not notify running gateways')):
+            out = io.StringIO()
+            with patch('gateway_api.invalidation.publish', return_value=published) as publish:
+                call_command('quota_caps', 'add', self.organization.id, scope='user', limit=5, stdout=out)
+            publish.assert_any_call('quota_caps', self.organization.id)
+            self.assertIn(expected, out.getvalue())
+
+    def test_apply_clears_process_caches(self):
+        from . import invalidation, quota, quota_caps
+
+        quota.remember_plan(self.organization.id, 'pro')
+        quota_caps._cap_cache[self.organization.id] = ([], float('inf'))
+        invalidation.apply({'kind': 'organization', 'organization_id': self.organization.id})
+        self.assertNotIn(self.organization.id, quota._plan_cache)
+        self.assertNotIn(self.organization.id, quota_caps._cap_cache)
+
+    @unittest.skipUnless(settings.REDIS_URL, 'needs Redis')
+    def test_listener_uses_connection_without_socket_timeout(self):
+        import asyncio
+        from asgiref.sync import async_to_sync
+        from . import invalidation, redis_client
+
+        received, clients = [], []
+        create_pubsub_client = redis_client.create_pubsub_client
+
+        def create():
+            clients.append(create_pubsub_client())
+            return clients[-1]
+
+        async def listen_and_publish():
+            with patch.object(redis_client, 'create_pubsub_client', side_effect=create):
+                listener = asyncio.create_task(invalidation._listen())
+                try:
+                    for _ in range(50):
+                        await asyncio.sleep(0.02)
+                        if redis_client.get_redis().pubsub_numsub(invalidation.CHANNEL)[0][1]:
+                            break
+                    invalidation.publish('quota_caps', self.organization.id)
+                    for _ in range(50):
+                        await asyncio.sleep(0.02)
+                        if received:
+                            break
+                finally:
+                    listener.cancel()
+                    await asyncio.gather(listener, return_exceptions=True)
+
+        with patch.object(invalidation, 'apply', side_effect=received.append):
+            async_to_sync(listen_and_publish)()
+
+        self.assertEqual(len(clients), 1)
+        self.assertIsNone(clients[0].connection_pool.connection_kwargs['socket_timeout'])
+        self.assertEqual(received, [{'kind': 'quota_caps', 'organization_id': self.organization.id}])
+
+
+class JSONRendererTestCase(TestCase):
+    """Tests for the orjson renderer and parser in gateway_api/renderers.py"""
+
+    def test_matches_drf_json_renderer(self):
+        import datetime
+        import decimal
+        import uuid
+        from rest_framework.renderers import JSONRenderer
+        from .renderers import ORJSONRenderer
+
+        data = {
+            'created_at': datetime.datetime(2025, 1, 2, 3, 4, 5, 600000, tzinfo=datetime.timezone.utc),
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'amount': decimal.Decimal('1.50'),
+            'name': 'Zoë',
+            'tags': ('a', 'b'),
+            'meta': {'has_next': False, 'next_cursor': None},
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_static_bodies_are_rendered_once(self):
+        from .renderers import ORJSONRenderer, StaticBody
+        from .views import REJECTIONS
+
+        body = REJECTIONS['missing_fields']
+        self.assertIs(ORJSONRenderer().render(body), body.rendered)
+        self.assertEqual(json.loads(body.rendered)['error'], 'Missing required fields')
+        with self.assertRaises(TypeError):
+            body['message'] = 'changed'
+        self.assertEqual(StaticBody({'a': 1}).rendered, b'{"a":1}')
+
+    def test_parser_reports_bad_json(self):
+        import io
+        from rest_framework.exceptions import ParseError
+        from .renderers import ORJSONParser
+
+        self.assertEqual(ORJSONParser().parse(io.BytesIO('{"name": "Zoë"}'.encode())), {'name': 'Zoë'})
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"name": '))
+
+
+class StageTimingTestCase(TestCase):
+    """Tests for the ingest stage timings in gateway_api/timing.py"""
+
+    def test_stages_are_observed_and_collected(self):
+        from .metrics import INGEST_STAGE_SECONDS
+        from . import timing
+
+        histogram = INGEST_STAGE_SECONDS.labels(stage='test_stage')
+        observed = histogram._sum.get()
+        timings = timing.begin()
+        with timing.stage('test_stage'):
+            pass
+
+        self.assertEqual([name for name, _ in timings], ['test_stage'])
+        self.assertGreater(histogram._sum.get(), observed)
+        self.assertEqual(timing.server_timing([('auth', 0.0004), ('publish', 0.0125)]), 'auth;dur=0.40, publish;dur=12.50')
+
+    def test_server_timing_header_is_optional(self):
+        from .authentication import OrganizationUser
+
+        user = OrganizationUser(MOCK_ORGANIZATION_DATA['id'], MOCK_ORGANIZATION_DATA['name'], MOCK_ORGANIZATION_DATA['quota_limit'])
+        url = reverse('create_notification')
+        with patch('gateway_api.authentication.APIKeyAuthentication._authenticate_async', new=AsyncMock(return_value=(user, None))):
+            with self.settings(SERVER_TIMING_HEADER=True):
+                response = self.client.post(url, {}, content_type='application/json', HTTP_X_API_KEY=MOCK_API_KEY)
+            self.assertEqual(response.status_code, 400)
+            self.assertRegex(response['Server-Timing'], r'^auth;dur=\d+\.\d\d$')
+
+            response = self.client.post(url, {}, content_type='application/json', HTTP_X_API_KEY=MOCK_API_KEY)
+            self.assertNotIn('Server-Timing', response)
+
+
+class TracingTestCase(TestCase):
+    """Tests for the span tracing in gateway_api/tracing.py"""
+
+    TRACEPARENT = '00-' + 'ab' * 16 + '-' + 'cd' * 8 + '-01'
+
+    def test_sampled_trace_nests_and_propagates(self):
+        from . import tracing
+
+        exporter = MagicMock()
+        with self.settings(TRACING_ENABLED=True), patch('gateway_api.tracing.get_span_exporter', return_value=exporter):
+            with tracing.start_request('POST /x/', traceparent=self.TRACEPARENT) as root:
+                with tracing.span('auth') as child:
+                    headers = tracing.inject({})
+
+        finished = [call.args[0] for call in exporter.record.call_args_list]
+        self.assertEqual([span.name for span in finished], ['auth', 'POST /x/'])
+        self.assertEqual(root.trace_id, 'ab' * 16)
+        self.assertEqual(root.parent_id, 'cd' * 8)
+        self.assertEqual(child.parent_id, root.span_id)
+        self.assertEqual(headers['traceparent'], f"00-{'ab' * 16}-{child.span_id}-01")
+        self.assertIsNone(tracing.current_trace_id())
+
+        payload = tracing.otlp_payload(finished)
+        spans = payload['resourceSpans'][0]['scopeSpans'][0]['spans']
+        self.assertEqual(spans[0]['parentSpanId'], root.span_id)
+        self.assertEqual(spans[1]['kind'], tracing.SERVER)
+
+    def test_unsampled_trace_records_nothing(self):
+        from . import tracing
+
+        exporter = MagicMock()
+        with self.settings(TRACING_ENABLED=True, TRACING_SAMPLE_RATE=0.0), \
+                patch('gateway_api.tracing.get_span_exporter', return_value=exporter):
+            with tracing.start_request('POST /x/') as root:
+                with tracing.span('auth') as child:
+                    headers = tracing.inject({})
+
+        self.assertIsNone(child)
+        self.assertTrue(headers['traceparent'].endswith(f'{root.span_id}-00'))
+        exporter.record.assert_not_called()
+
+
+class LoggingTestCase(TestCase):
+    """Tests for the queued, context-aware logging in gateway_api/logging_config.py"""
+
+    def _record(self, message):
+        import logging
+
+        return logging.LogRecord('probe', logging.INFO, __file__, 1, message, (), None)
+
+    def test_correlation_id_follows_the_request_into_threads(self):
+        from asgiref.sync import async_to_sync, sync_to_async
+        from .logging_filters import CorrelationIdFilter, clear_correlation_id, set_correlation_id
+
+        def in_thread():
+            record = self._record('from a worker thread')
+            CorrelationIdFilter().filter(record)
+            return record.correlation_id
+
+        async def request():
+            token = set_correlation_id('corr-42')
+            try:
+                return await sync_to_async(in_thread)()
+            finally:
+                clear_correlation_id(token)
+
+        self.assertEqual(async_to_sync(request)(), 'corr-42')
+        self.assertEqual(in_thread(), 'unknown')
+
+    def test_queued_records_format_as_json(self):
+        import logging
+        import sys
+        from .logging_config import BackgroundQueueHandler, JsonFormatter
+
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            record = logging.LogRecord('probe', logging.ERROR, __file__, 1, 'failed %s', ('n1',), sys.exc_info())
+        record.correlation_id = 'corr-42'
+        record.notification_id = 'n1'
+
+        queued = BackgroundQueueHandler(None).prepare(record)
+        entry = json.loads(JsonFormatter().format(queued))
+
+        self.assertIsNone(queued.exc_info)
+        self.assertEqual(entry['message'], 'failed n1')
+        self.assertEqual(entry['correlation_id'], 'corr-42')
+        self.assertEqual(entry['notification_id'], 'n1')
+        self.assertIn('ZeroDivisionError', entry['exception'])
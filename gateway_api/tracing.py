@@ -0,0 +1,282 @@
+# gateway_api/tracing.py
+
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import secrets
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+import httpx
+from django.conf import settings
+
+from .buffering import BufferedWriter
+
+logger = logging.getLogger(__name__)
+
+
+SERVICE_NAME = 'notification-gateway'
+
+# OTLP span kinds
+INTERNAL, SERVER, CLIENT, PRODUCER = 1, 2, 3, 4
+
+# W3C trace context: version-traceid-parentid-flags
+TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+# Innermost open span of the request being handled
+_current = ContextVar('current_span', default=None)
+
+
+class Span:
+    """
+    One timed operation. The request's root span exists even when the trace is not
+    sampled, so its ids can still be propagated; unsampled traces get no child
+    spans and nothing is exported.
+    """
+
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'kind', 'sampled',
+                 'start', 'end', 'attributes', 'error')
+
+    def __init__(self, name, trace_id, parent_id=None, sampled=True, kind=INTERNAL, attributes=None):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.sampled = sampled
+        self.start = time.time_ns()
+        self.end = None
+        self.attributes = attributes or {}
+        self.error = None
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+    @property
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def as_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'kind': self.kind,
+            'start': self.start,
+            'end': self.end,
+            'duration_ms': round((self.end - self.start) / 1e6, 3),
+            'attributes': self.attributes,
+            'error': self.error,
+        }
+
+
+@contextmanager
+def start_request(name, traceparent=None, **attributes):
+    """
+    Root span of an incoming request. Continues the caller's trace (and its sampling
+    decision) when a valid `traceparent` header is given, otherwise starts a new trace
+    sampled with probability TRACING_SAMPLE_RATE. Yields None when tracing is off.
+    """
+    if not settings.TRACING_ENABLED:
+        yield None
+        return
+
+    match = TRACEPARENT.match(traceparent or '')
+    if match:
+        trace_id, parent_id, sampled = match[1], match[2], bool(int(match[3], 16) & 1)
+    else:
+        trace_id, parent_id = secrets.token_hex(16), None
+        sampled = random.random() < settings.TRACING_SAMPLE_RATE
+
+    root = Span(name, trace_id, parent_id, sampled, SERVER, attributes)
+    token = _current.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.error = repr(e)
+        raise
+    finally:
+        _current.reset(token)
+        if sampled:
+            _finish(root)
+
+
+# Handed out for spans of untraced or unsampled requests; yields None
+_UNTRACED = nullcontext()
+
+
+def span(name, kind=INTERNAL, **attributes):
+    """
+    Context manager for a child span of the current one. Costs one context variable
+    lookup, and yields None, when the request is not traced or not sampled.
+    """
+    parent = _current.get()
+    if parent is None or not parent.sampled:
+        return _UNTRACED
+    return _child_span(parent, name, kind, attributes)
+
+
+@contextmanager
+def _child_span(parent, name, kind, attributes):
+    child = Span(name, parent.trace_id, parent.span_id, True, kind, attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = repr(e)
+        raise
+    finally:
+        _current.reset(token)
+        _finish(child)
+
+
+def inject(headers):
+    """Add the current trace context to outgoing HTTP or AMQP headers; returns them."""
+    current = _current.get()
+    if current is not None:
+        headers['traceparent'] = current.traceparent
+    return headers
+
+
+def current_trace_id():
+    current = _current.get()
+    return current.trace_id if current is not None else None
+
+
+def _finish(finished):
+    finished.end = time.time_ns()
+    get_span_exporter().record(finished)
+
+
+class SpanExporter(BufferedWriter):
+    """
+    Buffers finished spans and exports them in batches, off the request path: as
+    OTLP/HTTP JSON to TRACING_EXPORT_URL (an OpenTelemetry collector, Jaeger,
+    Tempo...) when set, else as JSON lines appended to TRACING_EXPORT_FILE.
+
+    A batch goes out when it reaches ``batch_size`` spans or every ``flush_interval``
+    seconds. When the destination cannot keep up, spans beyond ``max_buffer`` are
+    dropped rather than held in memory.
+    """
+
+    def __init__(self, url='', path='', batch_size=512, flush_interval=2.0, max_buffer=10000):
+        super().__init__(flush_interval)
+        self.url = url
+        self.path = path
+        self.batch_size = batch_size
+        self.max_buffer = max_buffer
+        self.dropped = 0
+        self._buffer = []
+
+    def record(self, finished):
+        """Queue one finished span. Spans finished outside the event loop wait for the next flush."""
+        if len(self._buffer) >= self.max_buffer:
+            self.dropped += 1
+            return
+        self._buffer.append(finished)
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._schedule(loop, flush_now=len(self._buffer) >= self.batch_size)
+
+    def has_pending(self):
+        return bool(self._buffer)
+
+    async def flush(self):
+        """Export everything buffered so far. Returns the number of spans exported."""
+        batch, self._buffer = self._buffer, []
+        if self.dropped:
+            logger.warning(f"Span buffer full, dropped {self.dropped} spans")
+            self.dropped = 0
+        exported = 0
+        for start in range(0, len(batch), self.batch_size):
+            chunk = batch[start:start + self.batch_size]
+            try:
+                if self.url:
+                    await self._post(chunk)
+                else:
+                    await asyncio.to_thread(self._append, chunk)
+            except Exception as e:
+                logger.error(f"Failed to export {len(batch) - exported} spans: {e}")
+                break
+            exported += len(chunk)
+        return exported
+
+    def _append(self, chunk):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.writelines(json.dumps(finished.as_dict(), default=str) + '\n' for finished in chunk)
+
+    async def _post(self, chunk):
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            response = await client.post(self.url, json=otlp_payload(chunk))
+            response.raise_for_status()
+
+
+def otlp_payload(spans):
+    """OTLP/HTTP JSON body (ExportTraceServiceRequest) for a batch of spans."""
+    return {
+        'resourceSpans': [{
+            'resource': {'attributes': _otlp_attributes({'service.name': SERVICE_NAME})},
+            'scopeSpans': [{
+                'scope': {'name': __name__},
+                'spans': [_otlp_span(finished) for finished in spans],
+            }],
+        }],
+    }
+
+
+def _otlp_span(finished):
+    data = {
+        'traceId': finished.trace_id,
+        'spanId': finished.span_id,
+        'name': finished.name,
+        'kind': finished.kind,
+        'startTimeUnixNano': str(finished.start),
+        'endTimeUnixNano': str(finished.end),
+        'attributes': _otlp_attributes(finished.attributes),
+        # 1 = OK, 2 = ERROR
+        'status': {'code': 2, 'message': finished.error} if finished.error else {'code': 1},
+    }
+    if finished.parent_id:
+        data['parentSpanId'] = finished.parent_id
+    return data
+
+
+def _otlp_attributes(attributes):
+    converted = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            typed = {'boolValue': value}
+        elif isinstance(value, int):
+            typed = {'intValue': str(value)}
+        elif isinstance(value, float):
+            typed = {'doubleValue': value}
+        else:
+            typed = {'stringValue': str(value)}
+        converted.append({'key': key, 'value': typed})
+    return converted
+
+
+_span_exporter = None
+
+
+def get_span_exporter():
+    global _span_exporter
+    if _span_exporter is None:
+        _span_exporter = SpanExporter(
+            url=settings.TRACING_EXPORT_URL,
+            path=settings.TRACING_EXPORT_FILE,
+            batch_size=settings.TRACING_BATCH_SIZE,
+            flush_interval=settings.TRACING_EXPORT_INTERVAL,
+        )
+    return _span_exporter
@@ -0,0 +1,190 @@
+# gateway_api/usage.py
+
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+
+from .buffering import BufferedWriter
+from .redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+# Counter fields kept per bucket: 'accepted', 'delivered', 'failed', 'bounced',
+# 'rejected' (by the provider) and 'rejected:<reason>' for requests the gateway refused.
+GRANULARITIES = ('minute', 'hour', 'day')
+
+_STEP = {
+    'minute': timedelta(minutes=1),
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+}
+_STAMP = {
+    'minute': '%Y%m%d%H%M',
+    'hour': '%Y%m%d%H',
+    'day': '%Y%m%d',
+}
+
+
+# ---------------------------------------------------------------------------
+# Buckets
+# ---------------------------------------------------------------------------
+
+def bucket_start(granularity, moment):
+    moment = moment.astimezone(dt_timezone.utc)
+    if granularity == 'minute':
+        return moment.replace(second=0, microsecond=0)
+    if granularity == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def bucket_stamp(granularity, start):
+    return start.strftime(_STAMP[granularity])
+
+
+def parse_stamp(granularity, stamp):
+    return datetime.strptime(stamp, _STAMP[granularity]).replace(tzinfo=dt_timezone.utc)
+
+
+def bucket_key(organization_id, granularity, stamp):
+    """Hash of counter field -> count for one bucket."""
+    return f"usage:{organization_id}:{granularity}:{stamp}"
+
+
+def index_key(organization_id, granularity):
+    """Sorted set of the bucket stamps present at a granularity, scored by bucket start."""
+    return f"usage:{organization_id}:index:{granularity}"
+
+
+# Folds one bucket into its parent bucket and deletes it, atomically, so a range
+# read never sees the same counts in both (or neither) of them.
+# KEYS: source hash, target hash, source index, target index
+# ARGV: source stamp, target stamp, target score, target ttl
+COMPACT_BUCKET = """
+local fields = redis.call('HGETALL', KEYS[1])
+for i = 1, #fields, 2 do
+    redis.call('HINCRBY', KEYS[2], fields[i], fields[i + 1])
+end
+if #fields > 0 then
+    redis.call('EXPIRE', KEYS[2], ARGV[4])
+    redis.call('ZADD', KEYS[4], ARGV[3], ARGV[2])
+end
+redis.call('DEL', KEYS[1])
+redis.call('ZREM', KEYS[3], ARGV[1])
+return #fields / 2
+"""
+
+
+# ---------------------------------------------------------------------------
+# Recording
+# ---------------------------------------------------------------------------
+
+class UsageRecorder(BufferedWriter):
+    """
+    Aggregates usage increments in memory and writes them to the minute buckets
+    with one pipelined round trip per flush, so a burst of 1000 accepted
+    notifications for one org costs a single HINCRBY.
+    """
+
+    def __init__(self, flush_interval=1.0):
+        super().__init__(flush_interval)
+        self._pending = defaultdict(Counter)
+
+    def record(self, organization_id, field, amount=1):
+        """Count ``amount`` against ``field`` for the current minute. Must be called from the event loop thread."""
+        if not organization_id:
+            return
+        minute = bucket_start('minute', datetime.now(dt_timezone.utc))
+        self._pending[(organization_id, minute)][field] += amount
+        self._schedule(asyncio.get_running_loop())
+
+    def has_pending(self):
+        return bool(self._pending)
+
+    async def flush(self):
+        pending, self._pending = self._pending, defaultdict(Counter)
+        if not pending:
+            return 0
+        try:
+            redis_client = await get_redis_client()
+            pipe = redis_client.pipeline(transaction=False)
+            for (organization_id, minute), counts in pending.items():
+                stamp = bucket_stamp('minute', minute)
+                key = bucket_key(organization_id, 'minute', stamp)
+                for field, amount in counts.items():
+                    pipe.hincrby(key, field, amount)
+                # Only a safety net: compact_usage normally folds the bucket long before this
+                pipe.expire(key, settings.USAGE_MINUTE_TTL)
+                pipe.zadd(index_key(organization_id, 'minute'), {stamp: minute.timestamp()})
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to flush usage counters for {len(pending)} bucket(s): {e}")
+            return 0
+        return len(pending)
+
+
+_usage_recorder = None
+
+
+def get_usage_recorder():
+    global _usage_recorder
+    if _usage_recorder is None:
+        _usage_recorder = UsageRecorder(flush_interval=settings.USAGE_FLUSH_INTERVAL)
+    return _usage_recorder
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+async def read_usage(organization_id, granularity, start, end):
+    """
+    Usage rows for [start, end) at ``granularity``, oldest first. Buckets are read at
+    every resolution that may still hold data for the range (recent minutes are not
+    compacted yet). Data only kept at a coarser resolution than requested is returned
+    as its own coarser row.
+    """
+    redis_client = await get_redis_client()
+    level = GRANULARITIES.index(granularity)
+
+    # Widen the range to whole day buckets so coarser buckets overlapping it are found
+    search_start = bucket_start('day', start).timestamp()
+    pipe = redis_client.pipeline(transaction=False)
+    for g in GRANULARITIES:
+        pipe.zrangebyscore(index_key(organization_id, g), search_start, f'({end.timestamp()}')
+    indexes = await pipe.execute()
+
+    buckets = []
+    for g, stamps in zip(GRANULARITIES, indexes):
+        for stamp in stamps:
+            bucket = parse_stamp(g, stamp)
+            if bucket + _STEP[g] > start:
+                buckets.append((g, stamp, bucket))
+
+    pipe = redis_client.pipeline(transaction=False)
+    for g, stamp, _ in buckets:
+        pipe.hgetall(bucket_key(organization_id, g, stamp))
+    contents = await pipe.execute() if buckets else []
+
+    rows = {}
+    for (g, stamp, bucket), counts in zip(buckets, contents):
+        row_granularity = GRANULARITIES[max(level, GRANULARITIES.index(g))]
+        row_start = bucket_start(row_granularity, bucket)
+        row = rows.setdefault((row_start, row_granularity), Counter())
+        for field, amount in counts.items():
+            row[field] += int(amount)
+
+    return [
+        {
+            'start': row_start.isoformat(),
+            'end': (row_start + _STEP[row_granularity]).isoformat(),
+            'granularity': row_granularity,
+            'counts': dict(counts),
+        }
+        for (row_start, row_granularity), counts in sorted(rows.items(), key=lambda item: item[0][0])
+        if counts
+    ]
@@ -2,6 +2,7 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status as http_status
+from rest_framework import exceptions
 from django.utils import timezone
 from django.db import connection
 import json
@@ -14,9 +15,10 @@ from dateutil import parser
 from django.conf import settings
 
 from gateway_api.redis_client import get_redis_client
-from gateway_api.models import Notification, User, Organization
+from gateway_api.models import Notification, NotificationEvent, User, Organization
 import asyncio
 import httpx
+from datetime import datetime
 
 from aio_pika import connect_robust, Message, DeliveryMode
 from asgiref.sync import sync_to_async
@@ -31,6 +33,15 @@ import sys
 from rest_framework.permissions import IsAuthenticated 
 
 from .rabbitmq import get_channel
+from .pagination import keyset_page, InvalidCursor
+from .partitions import new_notification_id, get_notification
+from .events import get_event_writer
+from . import quota as quota_periods
+from . import quota_blocks
+from . import quota_caps
+from .usage import get_usage_recorder, read_usage
+from .renderers import StaticBody
+from . import timing, tracing
 
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse, OpenApiExample
 from drf_spectacular.types import OpenApiTypes
@@ -39,6 +50,8 @@ from gateway_api.serializers import (
     NotificationResponseSerializer,
     NotificationStatusRequestSerializer,
     NotificationStatusResponseSerializer,
+    NotificationListQuerySerializer,
+    UsageQuerySerializer,
     InternalStatusUpdateSerializer,
     StandardResponseSerializer,
     UserSerializer,
@@ -53,71 +66,13 @@ logger = logging.getLogger(__name__)
 
 
 
-from prometheus_client import Counter, Histogram, REGISTRY, CollectorRegistry
+from .metrics import NOTIFICATIONS_ACCEPTED, NOTIFICATIONS_REJECTED, REQUEST_LATENCY
 
 
-
-
-
-_registry = REGISTRY
-
-
-NOTIF_ACCEPTED_TOTAL_NAME = 'gateway_notifications_accepted_total'
-NOTIF_ACCEPTED_CREATED_NAME = f'{NOTIF_ACCEPTED_TOTAL_NAME}_created' 
-NOTIF_ACCEPTED_NAME = NOTIF_ACCEPTED_TOTAL_NAME 
-
-NOTIF_REJECTED_TOTAL_NAME = 'gateway_notifications_rejected_total'
-NOTIF_REJECTED_CREATED_NAME = f'{NOTIF_REJECTED_TOTAL_NAME}_created'
-NOTIF_REJECTED_NAME = NOTIF_REJECTED_TOTAL_NAME
-
-REQ_LATENCY_NAME = 'gateway_request_duration_seconds'
-REQ_LATENCY_SUM_NAME = f'{REQ_LATENCY_NAME}_sum'
-REQ_LATENCY_COUNT_NAME = f'{REQ_LATENCY_NAME}_count'
-REQ_LATENCY_CREATED_NAME = f'{REQ_LATENCY_NAME}_created'
-
-
-
-
-def safe_register_metric(metric_class, name, *args, **kwargs):
-    """Safely register a metric, checking for duplicates first."""
-    
-    if name in _registry._names_to_collectors:
-        logger.warning(f"Metric '{name}' is already registered. Skipping re-registration.")
-        
-        
-        
-        return _registry._names_to_collectors[name]
-    else:
-        
-        metric_instance = metric_class(*args, **kwargs)
-        
-        
-        
-        
-        return metric_instance
-
-
-NOTIFICATIONS_ACCEPTED = safe_register_metric(
-    Counter,
-    NOTIF_ACCEPTED_TOTAL_NAME,
-    NOTIF_ACCEPTED_TOTAL_NAME, 
-    'Total notifications accepted',
-    ['notification_type', 'org_id_prefix']
-)
-NOTIFICATIONS_REJECTED = safe_register_metric(
-    Counter,
-    NOTIF_REJECTED_TOTAL_NAME,
-    NOTIF_REJECTED_TOTAL_NAME, 
-    'Total notifications rejected',
-    ['reason', 'org_id_prefix']
-)
-REQUEST_LATENCY = safe_register_metric(
-    Histogram,
-    REQ_LATENCY_NAME,
-    REQ_LATENCY_NAME, 
-    'Request latency in seconds',
-    ['endpoint']
-)
+def record_rejection(reason, org_id, org_prefix):
+    """Count a refused notification request in Prometheus and in the org's usage counters"""
+    NOTIFICATIONS_REJECTED.labels(reason=reason, org_id_prefix=org_prefix).inc()
+    get_usage_recorder().record(org_id, f'rejected:{reason}')
 
 
 USER_CACHE_TTL = 600  
@@ -269,9 +224,11 @@ class InternalOrganizationCreationView(APIView):
 
 from asgiref.sync import sync_to_async
 import asyncio
+import inspect
 from django.utils.decorators import classonlymethod
 
 from rest_framework.views import APIView  # Swap to this—ditches the fictional BaseAPIView
+from django.core.handlers.asgi import ASGIRequest
 from rest_framework.response import Response  # If needed for type hints
 from asgiref.sync import sync_to_async
 import asyncio
@@ -281,6 +238,11 @@ class AsyncAPIView(APIView):  # Inherit from APIView—empire-grade foundation
     """
     Custom APIView with async dispatch to handle async handlers (e.g., async def post).
     Awaits async methods seamlessly in ASGI environments.
+
+    The whole request pipeline stays on the event loop: content negotiation,
+    authentication, permissions, throttles, the handler and rendering. Only sync
+    handlers (proxies built on blocking HTTP clients) and DRF authenticators or
+    throttles without an async variant are moved to a worker thread.
     """
 
     @classonlymethod
@@ -289,13 +251,19 @@ class AsyncAPIView(APIView):  # Inherit from APIView—empire-grade foundation
         sync_view = super(AsyncAPIView, cls).as_view(**initkwargs)
 
         # Wrap it in an async callable that awaits the result (which will be a coroutine)
-        async def async_view(*args, **kwargs):
+        async def async_view(request, *args, **kwargs):
             # sync_view will call dispatch (async) without await, returning coroutine—await it here
-            return await sync_view(*args, **kwargs)
+            response = await sync_view(request, *args, **kwargs)
+            if isinstance(request, ASGIRequest):
+                render_on_loop(response)
+            return response
 
         # Preserve DRF's view attributes for routing/introspection
         async_view.view_class = cls
         async_view.view_initkwargs = initkwargs
+        # drf-spectacular (and DRF's own schema generators) look for APIView.as_view()'s names
+        async_view.cls = cls
+        async_view.initkwargs = initkwargs
         async_view.csrf_exempt = True  # Optional: Exempt CSRF if API-only (from our earlier fix)
 
         return async_view
@@ -308,19 +276,22 @@ class AsyncAPIView(APIView):  # Inherit from APIView—empire-grade foundation
         self.headers = self.default_response_headers
 
         try:
-            # initial() is sync (checks auth/perms/throttles)—run in thread
-            await sync_to_async(self.initial)(request, *args, **kwargs)
+            await self.initial_async(request, *args, **kwargs)
 
             if request.method.lower() in self.http_method_names:
                 handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
             else:
                 handler = self.http_method_not_allowed
 
-            if asyncio.iscoroutinefunction(handler):
+            # inspect.unwrap: Django 4.2's csrf_exempt hides async handlers behind a sync wrapper
+            if asyncio.iscoroutinefunction(inspect.unwrap(handler)):
                 response = await handler(request, *args, **kwargs)
-            else:
-                # If handler is sync, run it directly (or wrap in sync_to_async if it blocks I/O)
+            elif getattr(handler, '__func__', None) in (APIView.options, APIView.http_method_not_allowed):
+                # DRF's own sync handlers do no I/O
                 response = handler(request, *args, **kwargs)
+            else:
+                # Sync handlers may block (e.g. requests-based proxies); keep them off the loop
+                response = await sync_to_async(handler)(request, *args, **kwargs)
 
             # Safety net: If a sync handler mistakenly returns a coroutine (forgotten await inside), await it here
             if asyncio.iscoroutine(response):
@@ -336,21 +307,187 @@ class AsyncAPIView(APIView):  # Inherit from APIView—empire-grade foundation
         self.response = self.finalize_response(request, response, *args, **kwargs)
         return self.response
 
+    async def initial_async(self, request, *args, **kwargs):
+        """
+        Async counterpart of APIView.initial(). Content negotiation and versioning
+        are CPU only and run inline; authentication, permissions and throttles are
+        awaited so that classes doing I/O can provide async variants.
+        """
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+
+        neg = self.perform_content_negotiation(request)
+        request.accepted_renderer, request.accepted_media_type = neg
 
+        version, scheme = self.determine_version(request, *args, **kwargs)
+        request.version, request.versioning_scheme = version, scheme
 
-def get_standard_meta():
+        await self.perform_authentication_async(request)
+        await self.check_permissions_async(request)
+        await self.check_throttles_async(request)
+
+    async def perform_authentication_async(self, request):
+        """
+        Same contract as DRF's Request._authenticate(): the first authenticator to
+        return a (user, auth) tuple wins, a failure leaves the request anonymous and
+        propagates. Authenticators with an authenticate_async() are awaited on the
+        event loop; plain DRF ones (e.g. SessionAuthentication) still run in a thread.
+        """
+        for authenticator in request.authenticators:
+            authenticate_async = getattr(authenticator, 'authenticate_async', None)
+            try:
+                if authenticate_async is not None:
+                    user_auth_tuple = await authenticate_async(request)
+                else:
+                    user_auth_tuple = await sync_to_async(authenticator.authenticate)(request)
+            except exceptions.APIException:
+                request._not_authenticated()
+                raise
+
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth_tuple
+                return
+
+        request._not_authenticated()
+
+    async def check_permissions_async(self, request):
+        """
+        APIView.check_permissions() with has_permission_async() awaited when a
+        permission defines it. DRF's own permissions only inspect request.user and
+        run inline.
+        """
+        for permission in self.get_permissions():
+            has_permission_async = getattr(permission, 'has_permission_async', None)
+            if has_permission_async is not None:
+                allowed = await has_permission_async(request, self)
+            else:
+                allowed = permission.has_permission(request, self)
+            if not allowed:
+                self.permission_denied(
+                    request,
+                    message=getattr(permission, 'message', None),
+                    code=getattr(permission, 'code', None)
+                )
+
+    async def check_throttles_async(self, request):
+        """
+        APIView.check_throttles() with allow_request_async() awaited when a throttle
+        defines it. DRF's throttles read and write the Django cache, so those run
+        in a thread.
+        """
+        throttle_durations = []
+        for throttle in self.get_throttles():
+            allow_request_async = getattr(throttle, 'allow_request_async', None)
+            if allow_request_async is not None:
+                allowed = await allow_request_async(request, self)
+            else:
+                allowed = await sync_to_async(throttle.allow_request)(request, self)
+            if not allowed:
+                throttle_durations.append(throttle.wait())
+
+        if throttle_durations:
+            durations = [duration for duration in throttle_durations if duration is not None]
+            self.throttled(request, max(durations, default=None))
+
+
+def render_on_loop(response):
+    """
+    Render a DRF response on the event loop and mark it done for Django's async
+    handler, which otherwise calls the sync render() through a worker thread.
+    Only for requests served by the async handler: the sync one calls render() itself.
+    """
+    if not callable(getattr(response, 'render', None)):
+        return
+    response.render()
+
+    async def rendered():
+        return response
+
+    response.render = rendered
+
+
+def get_standard_meta(total=1, limit=1, page=1, total_pages=1, has_next=False, has_previous=False, **extra):
     """Get standard meta data for responses"""
+    meta = {
+        'total': total,
+        'limit': limit,
+        'page': page,
+        'total_pages': total_pages,
+        'has_next': has_next,
+        'has_previous': has_previous
+    }
+    meta.update(extra)
+    return meta
+
+
+
+def static_rejection(error, message):
+    """A rejection body that never varies, serialized to JSON once (see gateway_api.renderers.StaticBody)"""
+    return StaticBody({
+        'success': False,
+        'error': error,
+        'message': message,
+        'meta': get_standard_meta()
+    })
+
+
+# Fixed rejection bodies, by record_rejection() reason
+REJECTIONS = {
+    'unauthenticated': static_rejection('Authentication required', 'X-API-Key header is required'),
+    'missing_fields': static_rejection('Missing required fields', 'notification_type, user_id, and template_code are required'),
+    'invalid_type': static_rejection('Invalid notification type', 'notification_type must be "email" or "push"'),
+    'email_opt_out': static_rejection('User opted out', 'User has disabled email notifications'),
+    'push_opt_out': static_rejection('User opted out', 'User has disabled push notifications'),
+    'no_push_token': static_rejection('No push token', 'User does not have a push token registered'),
+    'rate_limit': static_rejection('Rate limit exceeded', 'Max 100 requests per minute'),
+    'internal_error': static_rejection('Internal server error', 'An unexpected error occurred'),
+}
+
+
+def notification_to_dict(notification):
+    """Public representation of a notification, shared by the status and list endpoints"""
+    return {
+        'notification_id': str(notification.id),
+        'status': notification.status,
+        'notification_type': notification.notification_type,
+        'template_code': notification.template_code,
+        'created_at': notification.created_at.isoformat(),
+        'updated_at': notification.updated_at.isoformat(),
+        'delivered_at': notification.delivered_at.isoformat() if notification.delivered_at else None,
+        'error_message': notification.error_message
+    }
+
+
+def build_message(notification_id, correlation_id, org_id, user_id, notification_type, template_code,
+                  template_data, user_data, variables, priority, metadata, request_id):
+    """Queue message for the email / push workers: the request plus the template and user it resolved to"""
     return {
-        'total': 1,
-        'limit': 1,
-        'page': 1,
-        'total_pages': 1,
-        'has_next': False,
-        'has_previous': False
+        'notification_id': notification_id,
+        'correlation_id': correlation_id,
+        'organization_id': org_id,
+        'user_id': user_id,
+        'notification_type': notification_type,
+        'template_code': template_code,
+        'template_content': template_data.get('content', ''),
+        'template_subject': template_data.get('subject', ''),
+        'template_variables': template_data.get('variables', []),
+        'variables': variables,
+        'priority': priority,
+        'metadata': metadata,
+        'user_email': user_data.get('email'),
+        'user_name': user_data.get('name'),
+        'push_token': user_data.get('push_token'),
+        'created_at': timezone.now().isoformat(),
+        'request_id': request_id
     }
 
 
-async def handle_status_update(notification_id, organization_id, new_status, timestamp=None, error=None):
+def encode_message(message):
+    """AMQP body for a queue message"""
+    return json.dumps(message, default=str).encode()
+
+
+async def handle_status_update(notification_id, organization_id, new_status, timestamp=None, error=None, worker='', attempt=None):
     """
     Handle notification status update from workers
     Shared function used by internal status endpoints
@@ -375,7 +512,7 @@ async def handle_status_update(notification_id, organization_id, new_status, tim
         }
     
     try:
-        notification = await database_sync_to_async(Notification.objects.get)(id=notification_id)
+        notification = await database_sync_to_async(get_notification)(notification_id)
         
         
         if notification.status in ['delivered', 'failed', 'bounced', 'rejected'] and notification.status == new_status:
@@ -388,20 +525,37 @@ async def handle_status_update(notification_id, organization_id, new_status, tim
         
         
         if new_status == 'delivered' and notification.status != 'delivered':
-            await update_quota(organization_id, successful=True)
+            await update_quota(notification.organization_id, successful=True, notification_id=notification.id)
         elif new_status in ['failed', 'bounced', 'rejected'] and notification.status not in ['delivered', 'failed', 'bounced', 'rejected']:
-            await update_quota(organization_id, successful=False)
+            await update_quota(notification.organization_id, successful=False, notification_id=notification.id)
         
         
-        notification.status = new_status
+        changes = {'status': new_status, 'updated_at': timezone.now()}
         if timestamp:
             try:
-                notification.delivered_at = parser.parse(timestamp)
+                changes['delivered_at'] = timestamp if isinstance(timestamp, datetime) else parser.parse(timestamp)
             except (ValueError, TypeError) as e:
                 logger.warning(f"Invalid timestamp format: {timestamp} - {e}")
         if error:
-            notification.error_message = error[:500]  
-        await database_sync_to_async(notification.save)() 
+            changes['error_message'] = error[:500]
+
+        # Filter on created_at too so the UPDATE touches a single partition
+        await database_sync_to_async(
+            Notification.objects.filter(id=notification.id, created_at=notification.created_at).update
+        )(**changes)
+
+        get_event_writer().record(
+            notification.id,
+            notification.organization_id,
+            new_status,
+            previous_status=notification.status,
+            error_message=error,
+            worker=worker,
+            attempt=attempt,
+            occurred_at=changes['updated_at']
+        )
+        if new_status in ['delivered', 'failed', 'bounced', 'rejected']:
+            get_usage_recorder().record(notification.organization_id, new_status)
         
         logger.info(f"Status updated: {notification_id} -> {new_status}")
         return {
@@ -427,28 +581,22 @@ async def handle_status_update(notification_id, organization_id, new_status, tim
         }
 
 
-async def update_quota(organization_id, successful):
-    """Handle quota updates based on delivery success"""
-    pending_key = f"pending:{organization_id}"
-    quota_key = f"quota:{organization_id}"
+async def update_quota(organization_id, successful, notification_id):
+    """
+    Settle a notification's pending-quota lease and, on delivery, count it
+    against the organization's quota
+    """
     redis_client = await get_redis_client() 
     
     try:
-        if successful:
-            
-            current_pending = await redis_client.decr(pending_key)
-            if current_pending < 0:
-               await redis_client.incr(pending_key)  
-            
-            
-            current_quota = await redis_client.incr(quota_key)
-            if current_quota == 1:  
-               await redis_client.expire(quota_key, 86400)  
-        else:
-            
-            current_pending = await redis_client.decr(pending_key)
-            if current_pending < 0:
-               await redis_client.incr(pending_key)
+        period = await quota_periods.get_org_period(organization_id)
+
+        # Releasing by notification id makes a repeated report, or a report for a lease
+        # the sweeper already expired, a no-op instead of freeing someone else's capacity.
+        # Deliveries count against the current UTC-aligned period; EXPIREAT only
+        # garbage-collects the key after its period (the reset itself is the switch to
+        # a new key), so it is sent unconditionally.
+        await quota_periods.settle(redis_client, organization_id, period, notification_id, successful)
     except Exception as e:
         logger.error(f"Error updating quota for {organization_id}: {e}")
 
@@ -465,6 +613,7 @@ class NotificationAPIView(AsyncAPIView):
     """
     Public API for notification management
     POST /api/v1/notifications/ - Create notification
+    GET  /api/v1/notifications/ - List notifications (cursor paginated)
     """
     
     
@@ -570,7 +719,30 @@ class NotificationAPIView(AsyncAPIView):
     @csrf_exempt
     async  def post(self, request):
         """Create a new notification request"""
-        redis_client = await get_redis_client() 
+        status_code, body = await self.create_notification(
+            request.data, request.user, request.headers.get('X-API-Key'), request.correlation_id
+        )
+        return Response(body, status=status_code)
+
+    async def initial_async(self, request, *args, **kwargs):
+        # Before authentication, so that the auth stage is part of this request's timings
+        self.stage_timings = timing.begin()
+        await super().initial_async(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if settings.SERVER_TIMING_HEADER and getattr(self, 'stage_timings', None):
+            response['Server-Timing'] = timing.server_timing(self.stage_timings)
+        return response
+
+    async def create_notification(self, data, user, api_key, correlation_id):
+        """
+        The ingest pipeline behind POST /api/v1/notifications/: validation, idempotency,
+        user and template lookups, rate limit / quota / caps, the notification row and
+        the RabbitMQ publish. Shared with the raw ASGI fast path (gateway_api/fast_ingest.py),
+        so it takes plain values and returns ``(status code, response body)``.
+        """
+        redis_client = await get_redis_client()
 
         with REQUEST_LATENCY.labels(endpoint='create_notification').time():
             org_prefix = 'unknown'
@@ -579,195 +751,178 @@ class NotificationAPIView(AsyncAPIView):
             
             try:
                 
-                notification_type = request.data.get('notification_type')
-                user_id = request.data.get('user_id')
-                template_code = request.data.get('template_code')
-                variables = request.data.get('variables', {})
-                request_id = request.data.get('request_id', secrets.token_urlsafe(16))
-                priority = request.data.get('priority', 5)
-                metadata = request.data.get('metadata', {})
-                api_key = request.headers.get('X-API-Key')
+                notification_type = data.get('notification_type')
+                user_id = data.get('user_id')
+                template_code = data.get('template_code')
+                variables = data.get('variables', {})
+                request_id = data.get('request_id', secrets.token_urlsafe(16))
+                priority = data.get('priority', 5)
+                metadata = data.get('metadata', {})
                 
                 
-                if hasattr(request, 'user') and hasattr(request.user, 'organization_id'):
-                    org_id = request.user.organization_id
+                if hasattr(user, 'organization_id'):
+                    org_id = user.organization_id
                     org_prefix = org_id[:8] if org_id else 'unknown'
                 else:
-                    NOTIFICATIONS_REJECTED.labels(reason='unauthenticated', org_id_prefix='unauthenticated').inc()
-                    return Response({
-                        'success': False,
-                        'error': 'Authentication required',
-                        'message': 'X-API-Key header is required',
-                        'meta': get_standard_meta()
-                    }, status=http_status.HTTP_401_UNAUTHORIZED)
+                    record_rejection('unauthenticated', None, 'unauthenticated')
+                    return http_status.HTTP_401_UNAUTHORIZED, REJECTIONS['unauthenticated']
 
                 
                 if not all([notification_type, user_id, template_code]):
-                    NOTIFICATIONS_REJECTED.labels(reason='missing_fields', org_id_prefix=org_prefix).inc()
-                    return Response({
-                        'success': False,
-                        'error': 'Missing required fields',
-                        'message': 'notification_type, user_id, and template_code are required',
-                        'meta': get_standard_meta()
-                    }, status=http_status.HTTP_400_BAD_REQUEST)
+                    record_rejection('missing_fields', org_id, org_prefix)
+                    return http_status.HTTP_400_BAD_REQUEST, REJECTIONS['missing_fields']
                 
                 if notification_type not in ['email', 'push']:
-                    NOTIFICATIONS_REJECTED.labels(reason='invalid_type', org_id_prefix=org_prefix).inc()
-                    return Response({
-                        'success': False,
-                        'error': 'Invalid notification type',
-                        'message': 'notification_type must be "email" or "push"',
-                        'meta': get_standard_meta()
-                    }, status=http_status.HTTP_400_BAD_REQUEST)
+                    record_rejection('invalid_type', org_id, org_prefix)
+                    return http_status.HTTP_400_BAD_REQUEST, REJECTIONS['invalid_type']
 
                 
                 idempotency_key = f"notification:request:{request_id}"
-                existing = await redis_client.get(idempotency_key)
+                with timing.stage('idempotency_check'):
+                    existing = await redis_client.get(idempotency_key)
                 if existing:
                     logger.info(f"Duplicate request detected: {request_id}")
                     existing_data = json.loads(existing)
-                    return Response({
+                    return http_status.HTTP_200_OK, {
                         'success': True,
                         'data': existing_data,
                         'message': 'Notification already accepted (duplicate request)',
                         'meta': get_standard_meta()
-                    }, status=http_status.HTTP_200_OK)
+                    }
 
 
 
-                user_task = self._get_user_data(user_id, org_id, request.correlation_id, api_key)
-                template_task = self._get_template(template_code, org_id, request.correlation_id)
+                user_task = timing.timed('user_fetch', self._get_user_data(user_id, org_id, correlation_id, api_key))
+                template_task = timing.timed('template_fetch', self._get_template(template_code, org_id, correlation_id))
 
                 user_response, template_response = await asyncio.gather(user_task, template_task)
 
 
 
                 if not user_response.get('success'):
-                    NOTIFICATIONS_REJECTED.labels(reason='user_not_found', org_id_prefix=org_prefix).inc()
-                    return Response({
+                    record_rejection('user_not_found', org_id, org_prefix)
+                    return http_status.HTTP_404_NOT_FOUND, {
                         'success': False,
                         'error': 'User not found',
                         'message': user_response.get('message', 'User does not exist'),
                         'meta': get_standard_meta()
-                    }, status=http_status.HTTP_404_NOT_FOUND)
+                    }
 
                 user_data = user_response['data']
                 user_prefs = user_data.get('preferences', {})
 
                 
                 if notification_type == 'email' and not user_prefs.get('email', True):
-                    NOTIFICATIONS_REJECTED.labels(reason='email_opt_out', org_id_prefix=org_prefix).inc()
-                    return Response({
-                        'success': False,
-                        'error': 'User opted out',
-                        'message': 'User has disabled email notifications',
-                        'meta': get_standard_meta()
-                    }, status=http_status.HTTP_403_FORBIDDEN)
+                    record_rejection('email_opt_out', org_id, org_prefix)
+                    return http_status.HTTP_403_FORBIDDEN, REJECTIONS['email_opt_out']
                 
                 if notification_type == 'push' and not user_prefs.get('push', True):
-                    NOTIFICATIONS_REJECTED.labels(reason='push_opt_out', org_id_prefix=org_prefix).inc()
-                    return Response({
-                        'success': False,
-                        'error': 'User opted out',
-                        'message': 'User has disabled push notifications',
-                        'meta': get_standard_meta()
-                    }, status=http_status.HTTP_403_FORBIDDEN)
+                    record_rejection('push_opt_out', org_id, org_prefix)
+                    return http_status.HTTP_403_FORBIDDEN, REJECTIONS['push_opt_out']
                 
                 if notification_type == 'push' and not user_data.get('push_token'):
-                    NOTIFICATIONS_REJECTED.labels(reason='no_push_token', org_id_prefix=org_prefix).inc()
-                    return Response({
-                        'success': False,
-                        'error': 'No push token',
-                        'message': 'User does not have a push token registered',
-                        'meta': get_standard_meta()
-                    }, status=http_status.HTTP_400_BAD_REQUEST)
+                    record_rejection('no_push_token', org_id, org_prefix)
+                    return http_status.HTTP_400_BAD_REQUEST, REJECTIONS['no_push_token']
 
                 
                
                 if not template_response.get('success'):
-                    NOTIFICATIONS_REJECTED.labels(reason='template_error', org_id_prefix=org_prefix).inc()
-                    return Response({
+                    record_rejection('template_error', org_id, org_prefix)
+                    return http_status.HTTP_400_BAD_REQUEST, {
                         'success': False,
                         'error': 'Template error',
                         'message': template_response.get('message', 'Template could not be retrieved'),
                         'meta': get_standard_meta()
-                    }, status=http_status.HTTP_400_BAD_REQUEST)
+                    }
                 
                 template_data = template_response['data']
 
                 
                 missing_variables = await self._validate_template_variables(template_data, variables)
                 if missing_variables:
-                    NOTIFICATIONS_REJECTED.labels(reason='missing_template_variables', org_id_prefix=org_prefix).inc()
-                    return Response({
+                    record_rejection('missing_template_variables', org_id, org_prefix)
+                    return http_status.HTTP_400_BAD_REQUEST, {
                         'success': False,
                         'error': 'Missing template variables',
                         'message': f'Missing required template variables: {", ".join(missing_variables)}',
                         'meta': get_standard_meta()
-                    }, status=http_status.HTTP_400_BAD_REQUEST)
-
-                
-                rate_key = f"rate:{org_id}"
-                current_rate = await redis_client.incr(rate_key)
-                if current_rate == 1:
-                    await redis_client.expire(rate_key, 60)
-                if current_rate > 100:
-                    NOTIFICATIONS_REJECTED.labels(reason='rate_limit', org_id_prefix=org_prefix).inc()
-                    return Response({
-                        'success': False,
-                        'error': 'Rate limit exceeded',
-                        'message': 'Max 100 requests per minute',
-                        'meta': get_standard_meta()
-                    }, status=http_status.HTTP_429_TOO_MANY_REQUESTS)
-
-                
-                quota_key = f"quota:{org_id}"
-                pending_key = f"pending:{org_id}"
-
-                quota_result, pending_result = await asyncio.gather(
-                redis_client.get(quota_key),
-                redis_client.get(pending_key)
-                )
+                    }
 
                 
+                with timing.stage('quota'):
+                    plan = getattr(user, 'plan', None)
+                    period = quota_periods.period_for_plan(plan) if plan else await quota_periods.get_org_period(org_id)
+
+                    # Large orgs spend from a quota block leased by this process instead of reading Redis
+                    quota_block = quota_blocks.get_block(org_id, user.quota_limit, period)
+                    caps = quota_caps.matching_caps(
+                        await quota_caps.get_caps(org_id), org_id, user_id, template_code, notification_type
+                    )
 
-                current_quota = int(quota_result or 0)
-                pending_quota = int(pending_result or 0)
-                
+                    notification_id = new_notification_id()
+                    if quota_block is not None and not await quota_block.spend(notification_id):
+                        outcome, exhausted_cap = quota_periods.QUOTA_EXCEEDED, None
+                    else:
+                        # Rate window, org quota and per-recipient / per-template caps are
+                        # checked and reserved together in one atomic round trip
+                        outcome, exhausted_cap = await quota_periods.reserve(
+                            redis_client,
+                            org_id,
+                            period,
+                            notification_id,
+                            org_limit=None if quota_block is not None else user.quota_limit,
+                            caps=[(key, limit, expires_at) for _, key, limit, expires_at in caps]
+                        )
+                        if outcome != quota_periods.RESERVED and quota_block is not None:
+                            await quota_block.refund(notification_id)
+
+                if outcome == quota_periods.RATE_LIMITED:
+                    record_rejection('rate_limit', org_id, org_prefix)
+                    return http_status.HTTP_429_TOO_MANY_REQUESTS, REJECTIONS['rate_limit']
+
+                if outcome == quota_periods.CAP_EXCEEDED:
+                    cap = caps[exhausted_cap][0]
+                    record_rejection('cap_exceeded', org_id, org_prefix)
+                    return http_status.HTTP_429_TOO_MANY_REQUESTS, {
+                        'success': False,
+                        'error': 'Quota cap exceeded',
+                        'message': f'At most {quota_caps.describe(cap)}',
+                        'meta': get_standard_meta(
+                            cap_scope=cap['scope'],
+                            cap_limit=cap['limit'],
+                            quota_period=cap['period'],
+                            quota_resets_at=quota_periods.period_bounds(cap['period'])[1].isoformat()
+                        )
+                    }
 
-                total_used = current_quota + pending_quota
-                
-                if total_used >= request.user.quota_limit:
-                    NOTIFICATIONS_REJECTED.labels(reason='quota_exceeded', org_id_prefix=org_prefix).inc()
-                    return Response({
+                if outcome == quota_periods.QUOTA_EXCEEDED:
+                    record_rejection('quota_exceeded', org_id, org_prefix)
+                    return http_status.HTTP_429_TOO_MANY_REQUESTS, {
                         'success': False,
                         'error': 'Quota exceeded',
                         'message': 'Your notification quota has been exhausted',
-                        'meta': get_standard_meta()
-                    }, status=http_status.HTTP_429_TOO_MANY_REQUESTS)
+                        'meta': get_standard_meta(
+                            quota_period=period,
+                            quota_resets_at=quota_periods.period_bounds(period)[1].isoformat()
+                        )
+                    }
 
-                
-                await redis_client.incr(pending_key)
-                if pending_quota == 0:
-                    await redis_client.expire(pending_key, 3600)
-
-                
-                notification_id = secrets.token_urlsafe(16)
-                correlation_id = request.correlation_id
 
                 
                 try:
-                    await database_sync_to_async(Notification.objects.create)(
-                        id=notification_id,
-                        correlation_id=correlation_id,
-                        organization_id=org_id,
-                        user_id=user_id,
-                        notification_type=notification_type,
-                        template_code=template_code,
-                        status='queued',
-                        priority=priority,
-                        request_id=request_id
-                    )
+                    with timing.stage('db_insert'):
+                        await database_sync_to_async(Notification.objects.create)(
+                            id=notification_id,
+                            correlation_id=correlation_id,
+                            organization_id=org_id,
+                            user_id=user_id,
+                            notification_type=notification_type,
+                            template_code=template_code,
+                            status='queued',
+                            priority=priority,
+                            request_id=request_id
+                        )
+                    get_event_writer().record(notification_id, org_id, 'queued', worker='gateway')
                 except Exception as e:
                     logger.error(f"Failed to create notification record: {str(e)}")
                     
@@ -780,42 +935,43 @@ class NotificationAPIView(AsyncAPIView):
                 }
 
                 
-                message = {
-                    'notification_id': notification_id,
-                    'correlation_id': correlation_id,
-                    'organization_id': org_id,
-                    'user_id': user_id,
-                    'notification_type': notification_type,
-                    'template_code': template_code,
-                    'template_content': template_data.get('content', ''),
-                    'template_subject': template_data.get('subject', ''),
-                    'template_variables': template_data.get('variables', []),
-                    'variables': variables,
-                    'priority': priority,
-                    'metadata': metadata,
-                    'user_email': user_data.get('email'),
-                    'user_name': user_data.get('name'),
-                    'push_token': user_data.get('push_token'),
-                    'created_at': timezone.now().isoformat(),
-                    'request_id': request_id
-                }
+                message = build_message(
+                    notification_id, correlation_id, org_id, user_id, notification_type, template_code,
+                    template_data, user_data, variables, priority, metadata, request_id
+                )
 
                 
-                await self._publish_to_queue(
-                    routing_key=f'{notification_type}.queue',
-                    message=message,
-                    priority=priority,
-                    correlation_id=correlation_id
-                )
+                try:
+                    with timing.stage('publish'):
+                        await self._publish_to_queue(
+                            routing_key=f'{notification_type}.queue',
+                            message=message,
+                            priority=priority,
+                            correlation_id=correlation_id
+                        )
+                except Exception:
+                    # Nothing will ever report back on this notification, so hand its reservation back now
+                    if quota_block is not None:
+                        await quota_block.refund(notification_id)
+                    await quota_periods.release(
+                        redis_client,
+                        org_id,
+                        notification_id,
+                        cap_keys=[key for _, key, _, _ in caps],
+                        org_lease=quota_block is None
+                    )
+                    raise
 
                 
-                await redis_client.setex(idempotency_key, 600, json.dumps(response_data))
+                with timing.stage('idempotency_store'):
+                    await redis_client.setex(idempotency_key, 600, json.dumps(response_data))
 
                 
                 NOTIFICATIONS_ACCEPTED.labels(
                     notification_type=notification_type,
                     org_id_prefix=org_prefix
                 ).inc()
+                get_usage_recorder().record(org_id, 'accepted')
 
                 logger.info(
                     "Notification accepted",
@@ -826,51 +982,168 @@ class NotificationAPIView(AsyncAPIView):
                     }
                 )
 
-                return Response({
+                return http_status.HTTP_202_ACCEPTED, {
                     'success': True,
                     'data': response_data,
                     'message': 'Notification accepted for processing',
                     'meta': get_standard_meta()
-                }, status=http_status.HTTP_202_ACCEPTED)
+                }
 
             except Exception as e:
-                NOTIFICATIONS_REJECTED.labels(reason='internal_error', org_id_prefix=org_prefix).inc()
+                record_rejection('internal_error', org_id, org_prefix)
                 logger.error(
                     f"Failed to accept notification: {str(e)}",
-                    extra={'correlation_id': getattr(request, 'correlation_id', 'unknown')},
+                    extra={'correlation_id': correlation_id},
                     exc_info=True
                 )
-                return Response({
-                    'success': False,
-                    'error': 'Internal server error',
-                    'message': 'An unexpected error occurred',
-                    'meta': get_standard_meta()
-                }, status=http_status.HTTP_500_INTERNAL_SERVER_ERROR)
+                return http_status.HTTP_500_INTERNAL_SERVER_ERROR, REJECTIONS['internal_error']
+
+    @extend_schema(
+        operation_id='list_notifications',
+        summary='List notifications',
+        description='''
+        List the organization's notifications, newest first.
+
+        **Pagination:** cursor based. Pass `meta.next_cursor` from one page as `cursor`
+        to fetch the next one; `meta.has_next` is false on the last page. Deep pages cost
+        the same as the first one. Totals are not computed, so `meta.total` is the number
+        of items on the current page and `meta.page`/`meta.total_pages` are null.
+        ''',
+        tags=['Notifications'],
+        parameters=[
+            NotificationListQuerySerializer,
+            OpenApiParameter(
+                name='X-API-Key',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.HEADER,
+                required=True,
+                description='Organization API key'
+            ),
+        ],
+        responses={
+            200: OpenApiResponse(
+                response=StandardResponseSerializer,
+                description='Page of notifications',
+                examples=[
+                    OpenApiExample(
+                        'First Page',
+                        value={
+                            'success': True,
+                            'data': [
+                                {
+                                    'notification_id': 'abc123xyz',
+                                    'status': 'delivered',
+                                    'notification_type': 'email',
+                                    'template_code': 'welcome_email',
+                                    'created_at': '2025-01-01T12:00:00Z',
+                                    'updated_at': '2025-01-01T12:01:00Z',
+                                    'delivered_at': '2025-01-01T12:01:00Z',
+                                    'error_message': None
+                                }
+                            ],
+                            'message': 'Notifications retrieved',
+                            'meta': {
+                                'total': 1,
+                                'limit': 50,
+                                'page': None,
+                                'total_pages': None,
+                                'has_next': True,
+                                'has_previous': False,
+                                'next_cursor': 'WyIyMDI1LTAxLTAxVDEyOjAwOjAwKzAwOjAwIiwiYWJjMTIzeHl6Il0'
+                            }
+                        }
+                    )
+                ]
+            ),
+            400: OpenApiResponse(description='Bad request - invalid filter or cursor'),
+            401: OpenApiResponse(description='Unauthorized - invalid API key'),
+        },
+    )
+    @csrf_exempt
+    async def get(self, request):
+        """List notifications for the authenticated organization"""
+        query = NotificationListQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response({
+                'success': False,
+                'error': 'Invalid query parameters',
+                'message': query.errors,
+                'meta': get_standard_meta()
+            }, status=http_status.HTTP_400_BAD_REQUEST)
+
+        params = query.validated_data
+        limit = params['limit']
+        cursor = params.get('cursor')
+
+        queryset = Notification.objects.filter(organization_id=request.user.organization_id)
+        if 'status' in params:
+            queryset = queryset.filter(status=params['status'])
+        if 'notification_type' in params:
+            queryset = queryset.filter(notification_type=params['notification_type'])
+        if 'template_code' in params:
+            queryset = queryset.filter(template_code=params['template_code'])
+        if 'user_id' in params:
+            queryset = queryset.filter(user_id=params['user_id'])
+        if 'created_after' in params:
+            queryset = queryset.filter(created_at__gte=params['created_after'])
+        if 'created_before' in params:
+            queryset = queryset.filter(created_at__lt=params['created_before'])
+
+        try:
+            notifications, next_cursor = await database_sync_to_async(keyset_page)(queryset, cursor, limit)
+        except InvalidCursor:
+            return Response({
+                'success': False,
+                'error': 'Invalid cursor',
+                'message': 'cursor must be a value returned in meta.next_cursor',
+                'meta': get_standard_meta()
+            }, status=http_status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'success': True,
+            'data': [notification_to_dict(n) for n in notifications],
+            'message': 'Notifications retrieved',
+            'meta': get_standard_meta(
+                total=len(notifications),
+                limit=limit,
+                page=None,
+                total_pages=None,
+                has_next=next_cursor is not None,
+                has_previous=bool(cursor),
+                next_cursor=next_cursor
+            )
+        })
 
     async def _get_user_data(self, user_id, org_id, correlation_id, api_key):
-        redis_client = await get_redis_client() 
         """Get user data with Redis caching"""
+        redis_client = await get_redis_client()
         user_cache_key = f"user:{user_id}:{org_id}"
-        cached = await redis_client.get(user_cache_key)
+        with tracing.span('cache.get user') as span:
+            cached = await redis_client.get(user_cache_key)
+            if span is not None:
+                span.set('cache.hit', bool(cached))
         if cached:
             logger.debug(f"User cache hit: {user_id}")
             return json.loads(cached)
 
         try:
             async with httpx.AsyncClient(timeout=3.0) as client:
-                
-                response = await client.get (
-                    f"{settings.USER_SERVICE_URL}/users/{user_id}",
-                    headers={
-                        'X-Organization-ID': org_id,
-                        'X-Correlation-ID': correlation_id,
-                        'Content-Type': 'application/json',
-                        'X-Internal-Secret': settings.INTERNAL_API_SECRET,
-                        'X-API-Key': api_key
-
-                    },
-                    timeout=3
-                )
+                url = f"{settings.USER_SERVICE_URL}/users/{user_id}"
+                with tracing.span('GET user-service', tracing.CLIENT, **{'http.url': url}) as span:
+                    response = await client.get (
+                        url,
+                        headers=tracing.inject({
+                            'X-Organization-ID': org_id,
+                            'X-Correlation-ID': correlation_id,
+                            'Content-Type': 'application/json',
+                            'X-Internal-Secret': settings.INTERNAL_API_SECRET,
+                            'X-API-Key': api_key
+
+                        }),
+                        timeout=3
+                    )
+                    if span is not None:
+                        span.set('http.status_code', response.status_code)
                 
                 response.raise_for_status()
                 data = response.json()
@@ -881,26 +1154,33 @@ class NotificationAPIView(AsyncAPIView):
             return {'success': False, 'message': f'User service unavailable: {str(e)}'}
 
     async def _get_template(self, template_code, org_id, correlation_id):
-        redis_client = await get_redis_client() 
         """Get template data from Template Service with caching"""
+        redis_client = await get_redis_client()
         template_cache_key = f"template:{template_code}:en"
-        cached = await redis_client.get(template_cache_key)
+        with tracing.span('cache.get template') as span:
+            cached = await redis_client.get(template_cache_key)
+            if span is not None:
+                span.set('cache.hit', bool(cached))
         if cached:
             logger.debug(f"Template cache hit: {template_code}")
             return json.loads(cached)
 
         try:
             async with httpx.AsyncClient(timeout=3.0) as client:
-                response = await client.get(
-                    f"{settings.TEMPLATE_SERVICE_URL}/api/v1/templates/{template_code}/",
-                    headers={
-                        'X-Internal-Secret': settings.INTERNAL_API_SECRET,
-                        'X-Organization-ID': org_id,
-                        'X-Correlation-ID': correlation_id,
-                        'Content-Type': 'application/json'
-                    },
-                    timeout=3
-                )
+                url = f"{settings.TEMPLATE_SERVICE_URL}/api/v1/templates/{template_code}/"
+                with tracing.span('GET template-service', tracing.CLIENT, **{'http.url': url}) as span:
+                    response = await client.get(
+                        url,
+                        headers=tracing.inject({
+                            'X-Internal-Secret': settings.INTERNAL_API_SECRET,
+                            'X-Organization-ID': org_id,
+                            'X-Correlation-ID': correlation_id,
+                            'Content-Type': 'application/json'
+                        }),
+                        timeout=3
+                    )
+                    if span is not None:
+                        span.set('http.status_code', response.status_code)
                 response.raise_for_status()
                 data = response.json()
                 
@@ -948,16 +1228,19 @@ class NotificationAPIView(AsyncAPIView):
             exchange = await channel.get_exchange('notifications.direct')
             
             
-            await exchange.publish(
-                aio_pika.Message(
-                    body=json.dumps(message, default=str).encode(),
-                    delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
-                    priority=min(priority, 10),
-                    correlation_id=correlation_id,
-                    content_type='application/json'
-                ),
-                routing_key=routing_key
-            )
+            with tracing.span(f'publish {routing_key}', tracing.PRODUCER):
+                await exchange.publish(
+                    aio_pika.Message(
+                        body=encode_message(message),
+                        delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                        priority=min(priority, 10),
+                        correlation_id=correlation_id,
+                        content_type='application/json',
+                        # Workers continue the trace from here
+                        headers=tracing.inject({'X-Correlation-ID': correlation_id})
+                    ),
+                    routing_key=routing_key
+                )
             logger.debug(f"Published to queue: {routing_key}")
         except Exception as e:
             logger.critical(f"RabbitMQ publish failed: {e}", exc_info=True)
@@ -1053,22 +1336,13 @@ class NotificationStatusCheckView(AsyncAPIView):
             }, status=http_status.HTTP_400_BAD_REQUEST)
         
         try:
-            notification = await database_sync_to_async(Notification.objects.get)(
-                id=notification_id,
+            notification = await database_sync_to_async(get_notification)(
+                notification_id,
                 organization_id=request.user.organization_id
             )
             return Response({
                 'success': True,
-                'data': {
-                    'notification_id': str(notification.id),
-                    'status': notification.status,
-                    'notification_type': notification.notification_type,
-                    'template_code': notification.template_code,
-                    'created_at': notification.created_at.isoformat(),
-                    'updated_at': notification.updated_at.isoformat(),
-                    'delivered_at': notification.delivered_at.isoformat() if notification.delivered_at else None,
-                    'error_message': notification.error_message
-                },
+                'data': notification_to_dict(notification),
                 'message': 'Notification status retrieved',
                 'meta': get_standard_meta()
             })
@@ -1081,6 +1355,187 @@ class NotificationStatusCheckView(AsyncAPIView):
             }, status=http_status.HTTP_404_NOT_FOUND)
 
 
+class NotificationEventsView(AsyncAPIView):
+    """GET /api/v1/notifications/<notification_id>/events/ - Delivery timeline of a notification"""
+    authentication_classes = [APIKeyAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    MAX_EVENTS = 500
+
+    @extend_schema(
+        operation_id='notification_events',
+        summary='Get notification delivery timeline',
+        description='''
+        Every status transition recorded for a notification, oldest first, including
+        retries and the worker that reported each one.
+
+        Events are written in batches, so the newest transition can take up to a second
+        to appear here after the notification status itself has changed.
+        ''',
+        tags=['Notifications'],
+        responses={
+            200: OpenApiResponse(
+                response=StandardResponseSerializer,
+                description='Notification timeline retrieved',
+                examples=[
+                    OpenApiExample(
+                        'Retried Then Delivered',
+                        value={
+                            'success': True,
+                            'data': {
+                                'notification_id': 'abc123xyz',
+                                'status': 'delivered',
+                                'events': [
+                                    {'status': 'queued', 'previous_status': None, 'worker': 'gateway', 'attempt': None, 'error_message': None, 'occurred_at': '2025-01-01T12:00:00Z'},
+                                    {'status': 'failed', 'previous_status': 'queued', 'worker': 'email-worker-2', 'attempt': 1, 'error_message': 'SMTP timeout', 'occurred_at': '2025-01-01T12:00:05Z'},
+                                    {'status': 'delivered', 'previous_status': 'failed', 'worker': 'email-worker-1', 'attempt': 2, 'error_message': None, 'occurred_at': '2025-01-01T12:01:00Z'}
+                                ]
+                            },
+                            'message': 'Notification events retrieved',
+                            'meta': {}
+                        }
+                    )
+                ]
+            ),
+            401: OpenApiResponse(description='Unauthorized - invalid API key'),
+            404: OpenApiResponse(description='Not found - notification does not exist'),
+        },
+        parameters=[
+            OpenApiParameter(
+                name='X-API-Key',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.HEADER,
+                required=True,
+                description='Organization API key'
+            ),
+        ]
+    )
+    @csrf_exempt
+    async def get(self, request, notification_id):
+        try:
+            notification = await database_sync_to_async(get_notification)(
+                notification_id,
+                organization_id=request.user.organization_id
+            )
+        except Notification.DoesNotExist:
+            return Response({
+                'success': False,
+                'error': 'Notification not found',
+                'message': 'The requested notification does not exist',
+                'meta': get_standard_meta()
+            }, status=http_status.HTTP_404_NOT_FOUND)
+
+        events = await database_sync_to_async(lambda: list(
+            NotificationEvent.objects
+            .filter(notification_id=notification.id)
+            .order_by('occurred_at', 'id')[:self.MAX_EVENTS]
+        ))()
+
+        return Response({
+            'success': True,
+            'data': {
+                'notification_id': notification.id,
+                'status': notification.status,
+                'events': [
+                    {
+                        'status': event.status,
+                        'previous_status': event.previous_status,
+                        'worker': event.worker,
+                        'attempt': event.attempt,
+                        'error_message': event.error_message,
+                        'occurred_at': event.occurred_at.isoformat()
+                    }
+                    for event in events
+                ]
+            },
+            'message': 'Notification events retrieved',
+            'meta': get_standard_meta(total=len(events), limit=self.MAX_EVENTS)
+        })
+
+
+class UsageView(AsyncAPIView):
+    """GET /api/v1/usage/ - Per-org usage counters in time buckets"""
+    authentication_classes = [APIKeyAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        operation_id='get_usage',
+        summary='Get usage counters',
+        description='''
+        Accepted, rejected (by reason), delivered, failed, bounced and provider-rejected
+        notification counts for the organization, in minute, hour or day buckets.
+
+        Minute buckets are kept for a couple of hours and then folded into hour buckets;
+        hour buckets are folded into day buckets after a week. Where part of the range is
+        only kept at a coarser resolution than requested, those rows come back with the
+        coarser `granularity`. Buckets without any activity are omitted.
+        ''',
+        tags=['Usage'],
+        parameters=[
+            UsageQuerySerializer,
+            OpenApiParameter(
+                name='X-API-Key',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.HEADER,
+                required=True,
+                description='Organization API key'
+            ),
+        ],
+        responses={
+            200: OpenApiResponse(
+                response=StandardResponseSerializer,
+                description='Usage rows, oldest first',
+                examples=[
+                    OpenApiExample(
+                        'Hourly Usage',
+                        value={
+                            'success': True,
+                            'data': [
+                                {
+                                    'start': '2025-01-01T12:00:00+00:00',
+                                    'end': '2025-01-01T13:00:00+00:00',
+                                    'granularity': 'hour',
+                                    'counts': {'accepted': 120, 'delivered': 115, 'failed': 3, 'rejected:quota_exceeded': 4}
+                                }
+                            ],
+                            'message': 'Usage retrieved',
+                            'meta': {'total': 1, 'granularity': 'hour', 'start': '2025-01-01T00:00:00+00:00', 'end': '2025-01-02T00:00:00+00:00'}
+                        }
+                    )
+                ]
+            ),
+            400: OpenApiResponse(description='Bad request - invalid range or granularity'),
+            401: OpenApiResponse(description='Unauthorized - invalid API key'),
+        },
+    )
+    @csrf_exempt
+    async def get(self, request):
+        query = UsageQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response({
+                'success': False,
+                'error': 'Invalid query parameters',
+                'message': query.errors,
+                'meta': get_standard_meta()
+            }, status=http_status.HTTP_400_BAD_REQUEST)
+
+        params = query.validated_data
+        rows = await read_usage(request.user.organization_id, params['granularity'], params['start'], params['end'])
+
+        return Response({
+            'success': True,
+            'data': rows,
+            'message': 'Usage retrieved',
+            'meta': get_standard_meta(
+                total=len(rows),
+                limit=len(rows),
+                granularity=params['granularity'],
+                start=params['start'].isoformat(),
+                end=params['end'].isoformat()
+            )
+        })
+
+
 class InternalStatusView(AsyncAPIView):
     """
     Internal API for worker services to report notification status
@@ -1143,19 +1598,24 @@ class InternalStatusView(AsyncAPIView):
             }, status=http_status.HTTP_401_UNAUTHORIZED)
         
         
-        notification_id = request.data.get('notification_id')
-        organization_id = request.data.get('organization_id')
-        new_status = request.data.get('status')
-        timestamp = request.data.get('timestamp')
-        error = request.data.get('error')
-        
-        
+        payload = InternalStatusUpdateSerializer(data=request.data)
+        if not payload.is_valid():
+            return Response({
+                'success': False,
+                'error': 'Invalid status update',
+                'message': payload.errors,
+                'meta': get_standard_meta()
+            }, status=http_status.HTTP_400_BAD_REQUEST)
+
+        update = payload.validated_data
         result = await handle_status_update(
-            notification_id=notification_id,
-            organization_id=organization_id,
-            new_status=new_status,
-            timestamp=timestamp,
-            error=error
+            notification_id=update['notification_id'],
+            organization_id=update['organization_id'],
+            new_status=update['status'],
+            timestamp=update.get('timestamp'),
+            error=update.get('error'),
+            worker=update.get('worker') or notification_type,
+            attempt=update.get('attempt')
         )
         
         return Response({
@@ -1280,8 +1740,8 @@ class HealthCheckView(AsyncAPIView):
             return f'unhealthy: {str(e)}'
     
     async def _check_redis(self):
-        redis_client = await get_redis_client() 
         """Check Redis connection"""
+        redis_client = await get_redis_client()
         try:
 
             await redis_client.setex('health_check', 10, 'ok')
@@ -1343,7 +1803,7 @@ class HealthCheckView(AsyncAPIView):
 
 
 
-class UserServiceView(APIView):
+class UserServiceView(AsyncAPIView):
     
     #authentication_classes = [APIKeyAuthentication]
     #permission_classes = [IsAuthenticated]
@@ -1831,7 +2291,7 @@ class InternalOrganizationSyncView(AsyncAPIView):
  
     
 
-class TemplateDocsProxyView(APIView):
+class TemplateDocsProxyView(AsyncAPIView):
     """
     Proxy view to forward requests to the Template Service's Swagger UI.
     Adds the required X-Internal-Secret header for the template service's internal endpoints.
@@ -1975,7 +2435,7 @@ import logging
 
 
 
-class TemplateDocsProxyView(APIView):
+class TemplateDocsProxyView(AsyncAPIView):
     """
     Proxy view for Template Service docs.
     - GET /template-docs/            -> redirects to /template-docs/api/docs/
@@ -0,0 +1,47 @@
+# gunicorn.conf.py
+#
+# Multi-worker deployment: gunicorn supervises WEB_CONCURRENCY uvicorn workers
+# (one per CPU by default), each running the full ASGI application with its own
+# event loop, lifespan startup/shutdown and connection pools.
+#
+#     gunicorn -c gunicorn.conf.py notification_gateway.asgi:application
+
+import multiprocessing
+import os
+import shutil
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY') or multiprocessing.cpu_count())
+worker_class = 'uvicorn_worker.UvicornWorker'
+
+# Workers import the application after the fork, so Redis, RabbitMQ and database
+# connections (and the background tasks that use them) are created per worker.
+# Preloading would open them in the master and share the sockets between workers.
+preload_app = False
+
+# Matches LIFESPAN_SHUTDOWN_TIMEOUT (20s) plus a margin for closing connections
+graceful_timeout = 25
+timeout = 60
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+
+# Prometheus multiprocess mode: every worker writes its metric values to files in
+# this directory and /metrics sums them. It must be set before any worker imports
+# prometheus_client, which is why it is set here rather than in settings.py.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus-multiproc')
+
+
+def on_starting(server):
+    # Values left over from a previous run would be summed in as well
+    directory = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # Drop the dead worker's live gauges (e.g. its Redis pool connections)
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -14,4 +14,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'notification_gateway.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after Django is set up; adds startup warm-up and graceful shutdown
+from django.conf import settings  # noqa: E402
+from gateway_api.lifecycle import LifespanMiddleware  # noqa: E402
+
+if settings.FAST_INGEST_ENABLED:
+    from gateway_api.fast_ingest import FastIngestMiddleware
+    django_application = FastIngestMiddleware(django_application)
+
+application = LifespanMiddleware(django_application)
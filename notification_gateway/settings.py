@@ -14,7 +14,7 @@ import os
 from pathlib import Path
 import sys
 from urllib.parse import urlparse
-from decouple import config
+from decouple import config, Csv
 
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -44,14 +44,16 @@ INSTALLED_APPS = [
     'drf_spectacular',
 ]
 
+# Every middleware here runs natively in async mode, so async views are served
+# without thread hops (see gateway_api/middleware.py)
 MIDDLEWARE = [
-    'django_prometheus.middleware.PrometheusBeforeMiddleware',
+    'gateway_api.middleware.PrometheusBeforeMiddleware',
     'corsheaders.middleware.CorsMiddleware',
-    'django.middleware.security.SecurityMiddleware',
+    'gateway_api.middleware.SecurityMiddleware',
     
     
     'gateway_api.middleware.CorrelationIdMiddleware',
-    'django_prometheus.middleware.PrometheusAfterMiddleware',
+    'gateway_api.middleware.PrometheusAfterMiddleware',
 ]
 
 ROOT_URLCONF = 'notification_gateway.urls'
@@ -119,14 +121,17 @@ USE_I18N = True
 USE_TZ = True
 
 
+# orjson-backed drop-ins for DRF's JSONRenderer / JSONParser; point these back at
+# rest_framework.renderers.JSONRenderer / rest_framework.parsers.JSONParser to compare
 REST_FRAMEWORK = {
-    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+    'DEFAULT_RENDERER_CLASSES': ['gateway_api.renderers.ORJSONRenderer'],
+    'DEFAULT_PARSER_CLASSES': [
+        'gateway_api.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'EXCEPTION_HANDLER': 'gateway_api.exceptions.custom_exception_handler',
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
-    
-    
-    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
-
 }
 
 
@@ -181,6 +186,12 @@ SPECTACULAR_SETTINGS = {
 
 
 
+# Logging: the root handlers below run on a background thread behind a queue (see
+# gateway_api/logging_config.py), so log writes never block the event loop.
+# USE_JSON_LOGGING switches both to one JSON object per line.
+USE_JSON_LOGGING = config('USE_JSON_LOGGING', False, cast=bool)
+
+LOGGING_CONFIG = 'gateway_api.logging_config.configure'
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -193,6 +204,9 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'gateway_api.logging_config.JsonFormatter',
+        },
     },
     'filters': {
         'correlation_id': {
@@ -203,15 +217,17 @@ LOGGING = {
     'handlers': {
         'file': {
             'level': 'INFO', 
-            'class': 'logging.FileHandler', 
+            # Every gunicorn worker appends to this file, so none of them may rotate it:
+            # rotate externally (logrotate); the handler reopens the file once it moves
+            'class': 'logging.handlers.WatchedFileHandler', 
             'filename': os.path.join(LOG_DIR, 'app.log'), 
-            'formatter': 'verbose', 
+            'formatter': 'json' if USE_JSON_LOGGING else 'verbose', 
             'filters': ['correlation_id'], 
         },
         'console': { 
             'level': 'DEBUG', 
             'class': 'logging.StreamHandler',
-            'formatter': 'simple', 
+            'formatter': 'json' if USE_JSON_LOGGING else 'simple', 
             'filters': ['correlation_id'], 
         },
     },
@@ -219,25 +235,95 @@ LOGGING = {
         'handlers': ['file', 'console'], 
         'level': 'INFO', 
     },
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
 }
 
 
 
+# Notifications table partitioning (PostgreSQL only, see manage_partitions)
+NOTIFICATION_PARTITION_INTERVAL = config('NOTIFICATION_PARTITION_INTERVAL', 'month')
+NOTIFICATION_PARTITIONS_AHEAD = config('NOTIFICATION_PARTITIONS_AHEAD', 3, cast=int)
+NOTIFICATION_RETENTION_DAYS = config('NOTIFICATION_RETENTION_DAYS', 0, cast=int)
+NOTIFICATION_ARCHIVE_DIR = config('NOTIFICATION_ARCHIVE_DIR', os.path.join(BASE_DIR, 'archives'))
+
+# Notification event log writer (see gateway_api/events.py)
+NOTIFICATION_EVENTS_BATCH_SIZE = config('NOTIFICATION_EVENTS_BATCH_SIZE', 200, cast=int)
+NOTIFICATION_EVENTS_FLUSH_INTERVAL = config('NOTIFICATION_EVENTS_FLUSH_INTERVAL', 1.0, cast=float)
+
+# In-memory filter of known API key hashes: unknown keys are rejected without a
+# Redis or database lookup (capacity 0 disables it). The filter is refreshed every
+# API_KEY_FILTER_REFRESH seconds, and only rejects keys while the invalidation
+# listener is connected to tell it about keys created by other processes.
+API_KEY_FILTER_CAPACITY = config('API_KEY_FILTER_CAPACITY', 100000, cast=int)
+API_KEY_FILTER_ERROR_RATE = config('API_KEY_FILTER_ERROR_RATE', 0.001, cast=float)
+API_KEY_FILTER_REFRESH = config('API_KEY_FILTER_REFRESH', 10, cast=int)
+# Seconds a key the database does not know is remembered as invalid in Redis
+API_KEY_NEGATIVE_TTL = config('API_KEY_NEGATIVE_TTL', 60, cast=int)
+# Seconds a valid key's organization stays cached in Redis. Saves to Organization
+# are pushed to every gateway over pub/sub (see gateway_api/invalidation.py), so this
+# only bounds changes made without model signals (queryset.update(), raw SQL)
+API_KEY_CACHE_TTL = config('API_KEY_CACHE_TTL', 21600, cast=int)
+# Seconds the invalidation subscriber waits before resubscribing after a Redis error
+INVALIDATION_RETRY_INTERVAL = config('INVALIDATION_RETRY_INTERVAL', 1.0, cast=float)
+
+# Quota periods (see gateway_api/quota.py). Periods are UTC-aligned: 'day' or 'month'.
+# QUOTA_PERIODS overrides the default per plan, e.g. "enterprise:month,industry:month".
+QUOTA_DEFAULT_PERIOD = config('QUOTA_DEFAULT_PERIOD', 'day')
+QUOTA_PERIODS = dict(item.split(':', 1) for item in config('QUOTA_PERIODS', '', cast=Csv()))
+QUOTA_PLAN_CACHE_TTL = config('QUOTA_PLAN_CACHE_TTL', 300, cast=int)
+# Seconds each gateway process caches an organization's per-recipient / per-template caps
+QUOTA_CAP_CACHE_TTL = config('QUOTA_CAP_CACHE_TTL', 60, cast=int)
+# Seconds a notification's pending-quota reservation lasts if its worker never reports back
+QUOTA_LEASE_TTL = config('QUOTA_LEASE_TTL', 3600, cast=int)
+# Orgs with a quota_limit of at least QUOTA_LOCAL_BLOCK_MIN_LIMIT have each gateway process
+# lease blocks of QUOTA_LOCAL_BLOCK_SIZE units and spend them locally (0 disables)
+QUOTA_LOCAL_BLOCK_SIZE = config('QUOTA_LOCAL_BLOCK_SIZE', 500, cast=int)
+QUOTA_LOCAL_BLOCK_MIN_LIMIT = config('QUOTA_LOCAL_BLOCK_MIN_LIMIT', 100000, cast=int)
+QUOTA_LOCAL_BLOCK_TTL = config('QUOTA_LOCAL_BLOCK_TTL', 30, cast=int)
+QUOTA_LOCAL_BLOCK_FLUSH_INTERVAL = config('QUOTA_LOCAL_BLOCK_FLUSH_INTERVAL', 1.0, cast=float)
+
+# Per-org usage counters (see gateway_api/usage.py and compact_usage). Minute buckets older
+# than USAGE_MINUTE_RETENTION are folded into hours, hours older than USAGE_HOUR_RETENTION
+# into days. Values are seconds.
+USAGE_FLUSH_INTERVAL = config('USAGE_FLUSH_INTERVAL', 1.0, cast=float)
+USAGE_MINUTE_RETENTION = config('USAGE_MINUTE_RETENTION', 2 * 3600, cast=int)
+USAGE_MINUTE_TTL = config('USAGE_MINUTE_TTL', 2 * 86400, cast=int)
+USAGE_HOUR_RETENTION = config('USAGE_HOUR_RETENTION', 7 * 86400, cast=int)
+USAGE_HOUR_TTL = config('USAGE_HOUR_TTL', 8 * 86400, cast=int)
+USAGE_DAY_TTL = config('USAGE_DAY_TTL', 400 * 86400, cast=int)
+
+
 redis_url = config('REDIS_URL')
 REDIS_URL = redis_url
+# ASGI lifespan (see gateway_api/lifecycle.py): per-dependency warm-up budget, and the
+# total budget for draining requests and flushing buffers. Keep the shutdown budget
+# below the orchestrator's grace period (e.g. Kubernetes' 30s) and uvicorn's
+# --timeout-graceful-shutdown.
+LIFESPAN_STARTUP_TIMEOUT = config('LIFESPAN_STARTUP_TIMEOUT', 10.0, cast=float)
+LIFESPAN_SHUTDOWN_TIMEOUT = config('LIFESPAN_SHUTDOWN_TIMEOUT', 20.0, cast=float)
+# Raw ASGI ingest route (see gateway_api/fast_ingest.py): same contract as
+# POST /api/v1/notifications/ for JSON bodies, without Django middleware or DRF
+FAST_INGEST_ENABLED = config('FAST_INGEST_ENABLED', False, cast=bool)
+FAST_INGEST_PATH = config('FAST_INGEST_PATH', '/api/v1/notifications/fast/')
+# Send each notification request's per-stage timings (auth, user / template fetch,
+# quota, insert, publish...) back in a Server-Timing header. They are always
+# exported as gateway_ingest_stage_seconds.
+SERVER_TIMING_HEADER = config('SERVER_TIMING_HEADER', False, cast=bool)
+# Span tracing (see gateway_api/tracing.py). A TRACING_SAMPLE_RATE share of new
+# traces is recorded; requests carrying a traceparent header follow the caller's
+# decision. Spans go to an OTLP/HTTP collector (e.g. http://localhost:4318/v1/traces)
+# when TRACING_EXPORT_URL is set, else to a JSON lines file.
+TRACING_ENABLED = config('TRACING_ENABLED', False, cast=bool)
+TRACING_SAMPLE_RATE = config('TRACING_SAMPLE_RATE', 0.01, cast=float)
+TRACING_EXPORT_URL = config('TRACING_EXPORT_URL', '')
+TRACING_EXPORT_FILE = config('TRACING_EXPORT_FILE', os.path.join(LOG_DIR, 'spans.jsonl'))
+TRACING_BATCH_SIZE = config('TRACING_BATCH_SIZE', 512, cast=int)
+TRACING_EXPORT_INTERVAL = config('TRACING_EXPORT_INTERVAL', 2.0, cast=float)
+# Shared Redis pools (one per process for sync code, one per event loop for async
+# code). Async requests wait up to REDIS_POOL_TIMEOUT seconds for a free connection.
+REDIS_MAX_CONNECTIONS = config('REDIS_MAX_CONNECTIONS', 50, cast=int)
+REDIS_POOL_TIMEOUT = config('REDIS_POOL_TIMEOUT', 2.0, cast=float)
+REDIS_SOCKET_TIMEOUT = config('REDIS_SOCKET_TIMEOUT', 5.0, cast=float)
+# Idle connections are PINGed before reuse when unused for this many seconds
+REDIS_HEALTH_CHECK_INTERVAL = config('REDIS_HEALTH_CHECK_INTERVAL', 30, cast=int)
 EMAIL_SERVICE_URL = config("EMAIL_SERVICE_URL")
 PUSH_SERVICE_URL = config('PUSH_SERVICE_URL')
\ No newline at end of file
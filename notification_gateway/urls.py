@@ -22,6 +22,8 @@ from gateway_api.views import (
     HealthCheckView, 
     InternalStatusView, 
     NotificationStatusCheckView,
+    NotificationEventsView,
+    UsageView,
     UserServiceView,
     InternalOrganizationSyncView,
     InternalOrganizationCreationView,
@@ -49,6 +51,8 @@ urlpatterns = [
     
     path('api/v1/notifications/', NotificationAPIView.as_view(), name='create_notification'),
     path('api/v1/notifications/status/', NotificationStatusCheckView.as_view(), name='check_notification_status'),
+    path('api/v1/notifications/<str:notification_id>/events/', NotificationEventsView.as_view(), name='notification_events'),
+    path('api/v1/usage/', UsageView.as_view(), name='usage'),
    
     
     